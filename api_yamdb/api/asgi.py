@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+# Эндпоинты чтения, которые обслуживаются отдельным пулом потоков:
+# долгие выгрузки и запись не занимают потоки чтения.
+ASYNC_READ_VIEWS = frozenset((
+    'titles-list',
+    'titles-detail',
+    'titles-top',
+    'reviews-list',
+    'comments-list',
+))
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+
+class RequestInstance(WsgiToAsgiInstance):
+    """Обработка одного запроса: Django выполняется в потоке пула, а
+    ожидание клиента и отправка ответа — в цикле событий.
+
+    Обычный ответ собирается в потоке целиком, и поток освобождается до
+    отправки, поэтому медленный клиент его не держит. Потоковый ответ
+    (выгрузки) читается в одном потоке от начала до конца: серверный
+    курсор базы нельзя передавать между потоками.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        self.loop = asyncio.get_event_loop()
+        content = await self.loop.run_in_executor(
+            self.executor, self.get_response, body
+        )
+        if content is None:
+            return
+        await self.send(self.response_start)
+        await self.send({'type': 'http.response.body', 'body': content})
+
+    def get_response(self, body):
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            if not getattr(response, 'streaming', False):
+                return b''.join(response)
+            self.send_from_thread(self.response_start)
+            for chunk in response:
+                self.send_from_thread({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        finally:
+            # request_finished закрывает соединение с базой этого потока.
+            response.close()
+        self.send_from_thread({'type': 'http.response.body'})
+        return None
+
+    def send_from_thread(self, message):
+        asyncio.run_coroutine_threadsafe(
+            self.send(message), self.loop
+        ).result()
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await super().__call__(scope, receive, send)
+
+
+class ASGIHandler:
+    """ASGI-приложение проекта (в Django 2.2 встроенного нет).
+
+    Запросы ждут свободного потока в цикле событий, а не в очереди
+    воркера, поэтому один процесс держит много запросов одновременно.
+    Число потоков ограничивает число одновременных обращений к базе.
+    """
+
+    def __init__(self):
+        self.wsgi_application = WSGIHandler()
+        self.executor = ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi'
+        )
+        self.read_executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+
+    def executor_for(self, scope):
+        if scope['method'] not in READ_METHODS:
+            return self.executor
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return self.executor
+        if match.url_name in ASYNC_READ_VIEWS:
+            return self.read_executor
+        return self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(
+                f'Неподдерживаемый тип соединения {scope["type"]}'
+            )
+        await RequestInstance(
+            self.wsgi_application, self.executor_for(scope)
+        )(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.read_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
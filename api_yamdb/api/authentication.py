@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from users.tokens import CLAIMS, revocations
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по claims токена без загрузки пользователя из базы.
+
+    Токены, выпущенные до отзыва (смена роли, имени, блокировка или
+    удаление пользователя), отклоняются. Токены без claims роли,
+    выпущенные раньше, проверяются по базе, как в JWTAuthentication.
+    При выключенном JWT_STATELESS_AUTH все токены проверяются по базе.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS_AUTH or any(
+            claim not in validated_token for claim in CLAIMS
+        ):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed(
+                'Токен не содержит идентификатор пользователя.',
+                code='token_not_valid'
+            )
+        revoked_at = revocations.revoked_at(user_id)
+        if revoked_at is not None and (
+            validated_token.get('iat', 0) <= revoked_at
+        ):
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_not_valid'
+            )
+        return api_settings.TOKEN_USER_CLASS(validated_token)
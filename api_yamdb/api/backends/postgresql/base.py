@@ -0,0 +1,68 @@
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from api.pool import PoolTimeoutError, get_pool
+
+Database = base.Database
+
+
+def ping(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+def reset(connection):
+    """Откат незавершенной транзакции; False — соединение непригодно."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except Database.Error:
+            return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений процесса.
+
+    Закрытие соединения возвращает его в пул, открытие берет свободное
+    из пула. Параметры пула задаются ключом POOL в настройках базы
+    (см. api.pool.DEFAULT_POOL).
+    """
+
+    @property
+    def pool(self):
+        return get_pool(
+            self.alias, self.settings_dict, ping,
+            lambda connection: connection.close()
+        )
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.acquire(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeoutError as error:
+            raise Database.OperationalError(str(error)) from error
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.release(self.connection, reset(self.connection))
@@ -0,0 +1,732 @@
+import json
+import math
+import random
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import ADMIN, User
+from users.tokens import RoleAccessToken
+
+from .bulk import BatchWriter, explicit_pub_dates
+from .renderers import FastJSONRenderer
+from .rows import RowSerializer
+from .serializers import (
+    CommentSerializer,
+    ReadOnlyTitleSerializer,
+    ReviewSerializer,
+)
+
+BENCHMARK_USERNAME = 'benchmark'
+BENCHMARK_EMAIL = 'benchmark@bench.yamdb.fake'
+
+DEFAULT_SIZES = {
+    'categories': 20,
+    'genres': 50,
+    'users': 50000,
+    'titles': 100000,
+    'reviews': 5000000,
+    'comments': 10000000,
+}
+
+WORDS = (
+    'ночь', 'город', 'время', 'дорога', 'море', 'война', 'любовь', 'звезда',
+    'тайна', 'песня', 'история', 'жизнь', 'дом', 'огонь', 'ветер', 'снег',
+    'тень', 'сердце', 'мечта', 'свет', 'река', 'лес', 'сон', 'голос',
+    'отличный', 'скучный', 'сильный', 'слабый', 'яркий', 'долгий', 'новый',
+    'старый', 'сюжет', 'финал', 'актер', 'автор', 'режиссер', 'музыка',
+)
+FIRST_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+SAMPLE_SIZE = 200
+EXPORT_ROWS = 1000
+
+
+def _text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+class DatasetGenerator:
+    """Детерминированный синтетический набор данных.
+
+    У каждой таблицы свой генератор случайных чисел, поэтому изменение
+    размера одной таблицы не меняет содержимое остальных. Произведения,
+    пользователи, отзывы и комментарии получают id с 1, так что ссылки
+    между таблицами вычисляются без запросов к базе.
+    """
+
+    def __init__(self, sizes, seed=0):
+        self.sizes = {**DEFAULT_SIZES, **sizes}
+        self.seed = seed
+        if self.sizes['reviews'] > self.sizes['titles'] * self.sizes['users']:
+            raise ValueError(
+                'отзывов больше, чем пар пользователь-произведение'
+            )
+        if self.sizes['comments'] and not self.sizes['reviews']:
+            raise ValueError('комментариям нужны отзывы')
+
+    def _random(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def categories(self):
+        for number in range(1, self.sizes['categories'] + 1):
+            yield Category(
+                name=f'Категория {number}', slug=f'category-{number}'
+            ), ()
+
+    def genres(self):
+        for number in range(1, self.sizes['genres'] + 1):
+            yield Genre(name=f'Жанр {number}', slug=f'genre-{number}'), ()
+
+    def users(self):
+        password = make_password(None)
+        for number in range(1, self.sizes['users'] + 1):
+            yield User(
+                id=number,
+                username=f'user{number}',
+                email=f'user{number}@bench.yamdb.fake',
+                password=password,
+            ), ()
+
+    def titles(self, category_ids, genre_ids):
+        rng = self._random('titles')
+        for number in range(1, self.sizes['titles'] + 1):
+            title = Title(
+                id=number,
+                name=f'{_text(rng, 1, 3).capitalize()} {number}',
+                year=rng.randint(1900, 2020),
+                description=_text(rng, 10, 40),
+                category_id=(
+                    rng.choice(category_ids) if category_ids else None
+                ),
+            )
+            links = [
+                Title.genre.through(title_id=number, genre_id=genre_id)
+                for genre_id in rng.sample(
+                    genre_ids, min(len(genre_ids), rng.randint(1, 3))
+                )
+            ]
+            yield title, links
+
+    def review_title(self, review_id):
+        return (review_id - 1) % self.sizes['titles'] + 1
+
+    def reviews(self):
+        rng = self._random('reviews')
+        titles, users = self.sizes['titles'], self.sizes['users']
+        for number in range(1, self.sizes['reviews'] + 1):
+            title_id = self.review_title(number)
+            # k-й отзыв произведения пишет k-й по счету автор после
+            # смещения, зависящего от произведения: пары не повторяются.
+            position = (number - 1) // titles
+            yield Review(
+                id=number,
+                title_id=title_id,
+                author_id=(title_id * 7919 + position) % users + 1,
+                text=_text(rng, 5, 60),
+                score=rng.randint(1, 10),
+                pub_date=FIRST_DATE + timedelta(minutes=number),
+            ), ()
+
+    def comments(self):
+        rng = self._random('comments')
+        reviews, users = self.sizes['reviews'], self.sizes['users']
+        for number in range(1, self.sizes['comments'] + 1):
+            review_id = (number - 1) % reviews + 1
+            yield Comment(
+                id=number,
+                review_id=review_id,
+                title_id=self.review_title(review_id),
+                author_id=rng.randint(1, users),
+                text=_text(rng, 3, 30),
+                pub_date=(
+                    FIRST_DATE + timedelta(minutes=review_id, seconds=number)
+                ),
+            ), ()
+
+    def write(self, batch_size, report):
+        """Запись набора пакетами; report(table, rows, started)
+        вызывается после каждой таблицы."""
+        with explicit_pub_dates():
+            self._write(
+                Category, self.categories(), batch_size, report, False
+            )
+            self._write(Genre, self.genres(), batch_size, report, False)
+            self._write(User, self.users(), batch_size, report, True)
+            category_ids = list(
+                Category.objects.order_by('id').values_list('id', flat=True)
+            )
+            genre_ids = list(
+                Genre.objects.order_by('id').values_list('id', flat=True)
+            )
+            self._write(
+                Title, self.titles(category_ids, genre_ids),
+                batch_size, report, True
+            )
+            self._write(Review, self.reviews(), batch_size, report, True)
+            self._write(Comment, self.comments(), batch_size, report, True)
+
+    def _write(self, model, rows, batch_size, report, explicit_pk):
+        writer = BatchWriter(model, batch_size, explicit_pk)
+        links_writer = BatchWriter(Title.genre.through, batch_size)
+        started = time.monotonic()
+        written = 0
+        batch, links = [], []
+        for obj, obj_links in rows:
+            batch.append(obj)
+            links.extend(obj_links)
+            if len(batch) >= batch_size:
+                written += self._flush(writer, links_writer, batch, links)
+                batch, links = [], []
+        if batch:
+            written += self._flush(writer, links_writer, batch, links)
+        report(model._meta.model_name, written, started)
+
+    def _flush(self, writer, links_writer, batch, links):
+        with transaction.atomic():
+            writer.write(batch)
+            if links:
+                links_writer.write(links)
+        return len(batch)
+
+
+def benchmark_user():
+    """Администратор, от имени которого выполняются запросы."""
+    user, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={'email': BENCHMARK_EMAIL, 'role': ADMIN},
+    )
+    return user
+
+
+class Scenario:
+    """Запрос к одному маршруту API.
+
+    build(rng, samples) возвращает путь и тело запроса. Изменяющие
+    запросы выполняются в транзакции, которая затем откатывается, чтобы
+    каждый прогон видел одни и те же данные.
+    """
+
+    def __init__(self, name, method, build, status=200, auth=True):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.status = status
+        self.auth = auth
+
+    @property
+    def writes(self):
+        return self.method != 'GET'
+
+
+def _title(rng, samples):
+    return rng.choice(samples['titles'])
+
+
+def _review(rng, samples):
+    return rng.choice(samples['reviews'])
+
+
+def _comment(rng, samples):
+    return rng.choice(samples['comments'])
+
+
+def _new_slug(rng, samples):
+    return f'bench-{rng.getrandbits(32):x}'
+
+
+def _new_title(rng, samples):
+    return {
+        'name': _text(rng, 1, 3),
+        'year': rng.randint(1900, 2020),
+        'description': _text(rng, 10, 40),
+        'category': rng.choice(samples['categories']),
+        'genre': rng.sample(
+            samples['genres'], min(2, len(samples['genres']))
+        ),
+    }
+
+
+def _review_path(rng, samples):
+    title_id, review_id = _review(rng, samples)
+    return f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+
+def _comments_path(rng, samples):
+    title_id, review_id = _review(rng, samples)
+    return f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+
+def _comment_path(rng, samples):
+    title_id, review_id, comment_id = _comment(rng, samples)
+    return (
+        f'/api/v1/titles/{title_id}/reviews/{review_id}'
+        f'/comments/{comment_id}/'
+    )
+
+
+SCENARIOS = (
+    Scenario('root', 'GET', lambda rng, s: ('/api/v1/', None)),
+    Scenario('auth-signup', 'POST', lambda rng, s: (
+        '/api/v1/auth/signup/',
+        {'username': _new_slug(rng, s), 'email': f'{_new_slug(rng, s)}@x.ru'},
+    ), auth=False),
+    Scenario('auth-token', 'POST', lambda rng, s: (
+        '/api/v1/auth/token/',
+        {'username': BENCHMARK_USERNAME,
+         'confirmation_code': s['confirmation_code']},
+    ), auth=False),
+    Scenario('metrics', 'GET', lambda rng, s: ('/api/v1/_metrics', None)),
+    Scenario('export-reviews', 'GET', lambda rng, s: (
+        f'/api/v1/export/reviews/?since_id={s["export_reviews"]}', None
+    )),
+    Scenario('export-comments', 'GET', lambda rng, s: (
+        f'/api/v1/export/comments/?since_id={s["export_comments"]}'
+        '&output=ndjson', None
+    )),
+    Scenario('users-list', 'GET', lambda rng, s: ('/api/v1/users/', None)),
+    Scenario('users-search', 'GET', lambda rng, s: (
+        f'/api/v1/users/?search=user{rng.randint(1, 99)}', None
+    )),
+    Scenario('users-detail', 'GET', lambda rng, s: (
+        f'/api/v1/users/{rng.choice(s["users"])}/', None
+    )),
+    Scenario('users-create', 'POST', lambda rng, s: (
+        '/api/v1/users/',
+        {'username': _new_slug(rng, s), 'email': f'{_new_slug(rng, s)}@x.ru'},
+    ), status=201),
+    Scenario('users-update', 'PATCH', lambda rng, s: (
+        f'/api/v1/users/{rng.choice(s["users"])}/', {'bio': _text(rng, 3, 9)}
+    )),
+    Scenario('users-delete', 'DELETE', lambda rng, s: (
+        f'/api/v1/users/{rng.choice(s["users"])}/', None
+    ), status=204),
+    Scenario('users-me', 'GET', lambda rng, s: ('/api/v1/users/me/', None)),
+    Scenario('users-me-update', 'PATCH', lambda rng, s: (
+        '/api/v1/users/me/', {'bio': _text(rng, 3, 9)}
+    )),
+    Scenario('users-me-feed', 'GET', lambda rng, s: (
+        '/api/v1/users/me/feed/', None
+    )),
+    Scenario('categories-list', 'GET', lambda rng, s: (
+        '/api/v1/categories/', None
+    )),
+    Scenario('categories-search', 'GET', lambda rng, s: (
+        f'/api/v1/categories/?search={rng.randint(1, 9)}', None
+    )),
+    Scenario('categories-create', 'POST', lambda rng, s: (
+        '/api/v1/categories/',
+        {'name': _text(rng, 1, 2), 'slug': _new_slug(rng, s)},
+    ), status=201),
+    Scenario('categories-bulk', 'POST', lambda rng, s: (
+        '/api/v1/categories/bulk/', [
+            {'name': _text(rng, 1, 2), 'slug': _new_slug(rng, s)}
+            for _ in range(20)
+        ]
+    ), status=201),
+    Scenario('categories-delete', 'DELETE', lambda rng, s: (
+        f'/api/v1/categories/{rng.choice(s["categories"])}/', None
+    ), status=204),
+    Scenario('genres-list', 'GET', lambda rng, s: ('/api/v1/genres/', None)),
+    Scenario('genres-search', 'GET', lambda rng, s: (
+        f'/api/v1/genres/?search={rng.randint(1, 9)}', None
+    )),
+    Scenario('genres-create', 'POST', lambda rng, s: (
+        '/api/v1/genres/',
+        {'name': _text(rng, 1, 2), 'slug': _new_slug(rng, s)},
+    ), status=201),
+    Scenario('genres-bulk', 'POST', lambda rng, s: (
+        '/api/v1/genres/bulk/', [
+            {'name': _text(rng, 1, 2), 'slug': _new_slug(rng, s)}
+            for _ in range(20)
+        ]
+    ), status=201),
+    Scenario('genres-delete', 'DELETE', lambda rng, s: (
+        f'/api/v1/genres/{rng.choice(s["genres"])}/', None
+    ), status=204),
+    Scenario('titles-list', 'GET', lambda rng, s: (
+        f'/api/v1/titles/?offset={rng.randint(0, s["title_count"])}', None
+    )),
+    Scenario('titles-cursor', 'GET', lambda rng, s: (
+        '/api/v1/titles/?pagination=cursor', None
+    )),
+    Scenario('titles-filter-genre', 'GET', lambda rng, s: (
+        f'/api/v1/titles/?genre={rng.choice(s["genres"])}', None
+    )),
+    Scenario('titles-filter-category-year', 'GET', lambda rng, s: (
+        f'/api/v1/titles/?category={rng.choice(s["categories"])}'
+        f'&year={rng.randint(1900, 2020)}', None
+    )),
+    Scenario('titles-filter-name', 'GET', lambda rng, s: (
+        f'/api/v1/titles/?name={rng.choice(s["title_names"])}', None
+    )),
+    Scenario('titles-top', 'GET', lambda rng, s: (
+        '/api/v1/titles/top/', None
+    )),
+    Scenario('titles-top-genre', 'GET', lambda rng, s: (
+        f'/api/v1/titles/top/?genre={rng.choice(s["genres"])}'
+        f'&min_reviews={rng.choice((1, 10, 50))}', None
+    )),
+    Scenario('titles-detail', 'GET', lambda rng, s: (
+        f'/api/v1/titles/{_title(rng, s)}/', None
+    )),
+    Scenario('titles-create', 'POST', lambda rng, s: (
+        '/api/v1/titles/', _new_title(rng, s)
+    ), status=201),
+    Scenario('titles-bulk', 'POST', lambda rng, s: (
+        '/api/v1/titles/bulk/', [_new_title(rng, s) for _ in range(20)]
+    ), status=201),
+    Scenario('titles-update', 'PATCH', lambda rng, s: (
+        f'/api/v1/titles/{_title(rng, s)}/',
+        {'description': _text(rng, 10, 40)},
+    )),
+    Scenario('titles-follow', 'POST', lambda rng, s: (
+        f'/api/v1/titles/{_title(rng, s)}/follow/', None
+    ), status=201),
+    Scenario('titles-delete', 'DELETE', lambda rng, s: (
+        f'/api/v1/titles/{_title(rng, s)}/', None
+    ), status=204),
+    Scenario('search', 'GET', lambda rng, s: (
+        f'/api/v1/search/?q={rng.choice(WORDS)}', None
+    )),
+    Scenario('reviews-list', 'GET', lambda rng, s: (
+        f'/api/v1/titles/{_review(rng, s)[0]}/reviews/', None
+    )),
+    Scenario('reviews-cursor', 'GET', lambda rng, s: (
+        f'/api/v1/titles/{_review(rng, s)[0]}/reviews/?pagination=cursor',
+        None
+    )),
+    Scenario('reviews-detail', 'GET', lambda rng, s: (
+        _review_path(rng, s), None
+    )),
+    Scenario('reviews-create', 'POST', lambda rng, s: (
+        f'/api/v1/titles/{_title(rng, s)}/reviews/',
+        {'text': _text(rng, 5, 60), 'score': rng.randint(1, 10)},
+    ), status=201),
+    Scenario('reviews-update', 'PATCH', lambda rng, s: (
+        _review_path(rng, s), {'score': rng.randint(1, 10)}
+    )),
+    Scenario('reviews-delete', 'DELETE', lambda rng, s: (
+        _review_path(rng, s), None
+    ), status=204),
+    Scenario('comments-list', 'GET', lambda rng, s: (
+        _comments_path(rng, s), None
+    )),
+    Scenario('comments-detail', 'GET', lambda rng, s: (
+        _comment_path(rng, s), None
+    )),
+    Scenario('comments-create', 'POST', lambda rng, s: (
+        _comments_path(rng, s), {'text': _text(rng, 3, 30)}
+    ), status=201),
+    Scenario('comments-update', 'PATCH', lambda rng, s: (
+        _comment_path(rng, s), {'text': _text(rng, 3, 30)}
+    )),
+    Scenario('comments-delete', 'DELETE', lambda rng, s: (
+        _comment_path(rng, s), None
+    ), status=204),
+)
+
+
+def _sample(queryset, fields, rng, count=SAMPLE_SIZE):
+    """Случайная выборка строк по диапазону первичных ключей: по одному
+    запросу к индексу на строку вместо ORDER BY RANDOM()."""
+    bounds = queryset.order_by('pk').values_list('pk', flat=True)
+    first, last = bounds.first(), bounds.last()
+    if first is None:
+        return []
+    rows = set()
+    for _ in range(count):
+        row = queryset.filter(
+            pk__gte=rng.randint(first, last)
+        ).order_by('pk').values_list(*fields).first()
+        rows.add(row if len(fields) > 1 else row[0])
+    return sorted(rows)
+
+
+def load_samples(rng, user):
+    """Идентификаторы существующих объектов для построения запросов."""
+    samples = {
+        'titles': _sample(Title.objects.all(), ('id',), rng),
+        'title_names': _sample(Title.objects.all(), ('name',), rng),
+        'reviews': _sample(Review.objects.all(), ('title_id', 'id'), rng),
+        'comments': _sample(
+            Comment.objects.all(), ('title_id', 'review_id', 'id'), rng
+        ),
+        'users': _sample(
+            User.objects.exclude(pk=user.pk), ('username',), rng
+        ),
+        'categories': list(Category.objects.values_list('slug', flat=True)),
+        'genres': list(Genre.objects.values_list('slug', flat=True)),
+        'title_count': Title.objects.count(),
+        'confirmation_code': default_token_generator.make_token(user),
+    }
+    for kind, model in (('reviews', Review), ('comments', Comment)):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        samples[f'export_{kind}'] = max((last.first() or 0) - EXPORT_ROWS, 0)
+    missing = [
+        name for name in ('titles', 'reviews', 'comments', 'users',
+                          'categories', 'genres')
+        if not samples[name]
+    ]
+    if missing:
+        raise ValueError(
+            'нет данных для сценариев: ' + ', '.join(missing)
+            + ' (используйте seed_benchmark)'
+        )
+    return samples
+
+
+class QueryCounter:
+    """Счетчик запросов ко всем базам через execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias_connection in connections.all():
+            self._stack.enter_context(
+                alias_connection.execute_wrapper(self)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def percentile(values, rank):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def _perform(client, scenario, path, data):
+    if scenario.writes:
+        with transaction.atomic():
+            response = client.generic(
+                scenario.method, path,
+                data=_json(data), content_type='application/json'
+            )
+            _consume(response)
+            transaction.set_rollback(True)
+        return response
+    response = client.get(path)
+    _consume(response)
+    return response
+
+
+def _json(data):
+    return json.dumps(data) if data is not None else ''
+
+
+def run_scenario(scenario, client, samples, rng, requests, warmup,
+                 cold_cache=False):
+    """Замеры одного сценария: задержки, пропускная способность
+    последовательного клиента и количество запросов к базе."""
+    latencies, queries = [], []
+    errors = 0
+    for iteration in range(warmup + requests):
+        path, data = scenario.build(rng, samples)
+        if cold_cache:
+            cache.clear()
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            response = _perform(client, scenario, path, data)
+            elapsed = time.perf_counter() - started
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(counter.count)
+        if response.status_code != scenario.status:
+            errors += 1
+    total = sum(latencies)
+    return {
+        'method': scenario.method,
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(total / requests * 1000, 3),
+        'rps': round(requests / total, 1) if total else None,
+        'queries_mean': round(sum(queries) / requests, 2),
+        'queries_max': max(queries),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            stderr=subprocess.DEVNULL, universal_newlines=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(requests=50, warmup=5, seed=0, names=None,
+                  cold_cache=False, progress=None):
+    """Прогон сценариев и результаты в виде словаря для JSON."""
+    rng = random.Random(seed)
+    user = benchmark_user()
+    samples = load_samples(rng, user)
+    client = Client(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    anonymous = Client()
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not names or any(scenario.name.startswith(name) for name in names)
+    ]
+    results = {}
+    # Все запросы идут с одного адреса и упирались бы в ограничения частоты.
+    with override_settings(API_THROTTLE_RATES={}):
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(
+                scenario, client if scenario.auth else anonymous,
+                samples, random.Random(f'{seed}:{scenario.name}'),
+                requests, warmup, cold_cache
+            )
+            if progress is not None:
+                progress(scenario.name, results[scenario.name])
+    return {
+        'revision': git_revision(),
+        'created': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'dataset': {
+            'categories': len(samples['categories']),
+            'genres': len(samples['genres']),
+            'users': User.objects.count(),
+            'titles': samples['title_count'],
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        },
+        'settings': {
+            'requests': requests, 'warmup': warmup, 'seed': seed,
+            'cold_cache': cold_cache,
+        },
+        'scenarios': results,
+    }
+
+
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_max')
+
+
+def compare_results(baseline, current, threshold):
+    """Сравнение с предыдущим прогоном.
+
+    Возвращает строки (сценарий, метрика, было, стало, изменение в %,
+    регрессия). Регрессия — рост p95 больше threshold процентов или
+    любой рост количества запросов: оно не зависит от шума измерений.
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            if metric == 'queries_max':
+                regression = new > old
+            else:
+                regression = metric == 'p95_ms' and change > threshold
+            rows.append((name, metric, old, new, change, regression))
+    return rows
+
+
+SERIALIZATION_CASES = (
+    ('titles', ReadOnlyTitleSerializer, lambda: Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').defer('search_vector').order_by('id')),
+    ('reviews', ReviewSerializer, lambda: Review.objects.select_related(
+        'author'
+    ).defer('search_vector').order_by('id')),
+    ('comments', CommentSerializer, lambda: Comment.objects.select_related(
+        'author'
+    ).order_by('id')),
+)
+
+
+def _cpu_time(render, repeat):
+    """Лучшее из repeat процессорное время render() и его результат."""
+    best = math.inf
+    for _ in range(repeat):
+        started = time.process_time()
+        body = render()
+        best = min(best, time.process_time() - started)
+    return best, body
+
+
+def _serialization_case(serializer_class, queryset, items, repeat):
+    rows = RowSerializer(serializer_class)
+
+    def drf():
+        return JSONRenderer().render(
+            serializer_class(queryset()[:items], many=True).data
+        )
+
+    def fast():
+        return FastJSONRenderer().render(
+            rows.serialize(rows.values(queryset())[:items])
+        )
+
+    drf_time, drf_body = _cpu_time(drf, repeat)
+    fast_time, fast_body = _cpu_time(fast, repeat)
+    count = len(json.loads(fast_body))
+    if not count:
+        raise ValueError(
+            'Нет данных для замера: сначала выполните seed_benchmark.'
+        )
+    return {
+        'items': count,
+        'drf_us_per_item': drf_time / count * 1e6,
+        'fast_us_per_item': fast_time / count * 1e6,
+        'speedup': drf_time / fast_time if fast_time else math.inf,
+        'identical': drf_body == fast_body,
+    }
+
+
+def measure_serialization(items=500, repeat=5, progress=None):
+    """Процессорное время на элемент страницы: сериализатор DRF и
+    JSONRenderer против RowSerializer и FastJSONRenderer.
+
+    В замер входят разбор строк из базы, сериализация и рендеринг;
+    страницы берутся по первичному ключу, чтобы не замерять сортировку.
+    Тела ответов сравниваются побайтно.
+    """
+    results = {}
+    for name, serializer_class, queryset in SERIALIZATION_CASES:
+        results[name] = _serialization_case(
+            serializer_class, queryset, items, repeat
+        )
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        'revision': git_revision(),
+        'created': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'settings': {'items': items, 'repeat': repeat},
+        'resources': results,
+    }
@@ -0,0 +1,160 @@
+import csv
+import io
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .cache import bump_versions
+from .filter_index import title_filter_index
+
+
+@contextmanager
+def explicit_pub_dates():
+    """bulk_create перезаписывает auto_now_add текущим временем, а при
+    пакетной загрузке нужно сохранить заданные даты."""
+    fields = [
+        model._meta.get_field('pub_date') for model in (Review, Comment)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def lock_for_insert(model):
+    """Блокировка для назначения ключей до вставки в базах, которые не
+    возвращают ключи из пакетной вставки. Держится до конца транзакции:
+    параллельная вставка ждет ее и не получает те же ключи. Вызывается
+    первым запросом транзакции, пока в ней ничего не прочитано."""
+    if connection.features.can_return_ids_from_bulk_insert:
+        return
+    if connection.vendor == 'sqlite':
+        # Запись берет блокировку записи всей базы, как BEGIN IMMEDIATE.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = seq WHERE name = %s',
+                [model._meta.db_table]
+            )
+        return
+    list(model._base_manager.select_for_update().order_by(
+        '-pk'
+    ).values_list('pk', flat=True)[:1])
+
+
+def next_pk(model):
+    """Первый еще не выданный первичный ключ таблицы."""
+    lock_for_insert(model)
+    last = model._base_manager.aggregate(last=Max('pk'))['last'] or 0
+    if connection.vendor == 'sqlite':
+        # AUTOINCREMENT не выдает повторно ключи удаленных строк.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            last = max(last, row[0])
+    return last + 1
+
+
+def insert_objects(model, objects):
+    """bulk_create с заполнением первичных ключей. Базам, которые не
+    возвращают ключи из пакетной вставки (SQLite), ключи назначаются
+    заранее под lock_for_insert, так что post_save, как и везде, не
+    отправляется."""
+    with transaction.atomic():
+        if not connection.features.can_return_ids_from_bulk_insert:
+            start = next_pk(model)
+            for number, obj in enumerate(objects):
+                obj.pk = start + number
+        model.objects.bulk_create(objects)
+
+
+def set_prefetched(obj, name, related):
+    """Кладет связанные объекты в кэш prefetch_related, чтобы их вывод
+    не требовал запросов."""
+    queryset = getattr(obj, name).model.objects.all()
+    queryset._result_cache = list(related)
+    queryset._prefetch_done = True
+    obj.__dict__.setdefault('_prefetched_objects_cache', {})[name] = queryset
+
+
+class BatchWriter:
+    """Пакетная запись объектов: COPY в PostgreSQL, bulk_create в
+    остальных базах. Сигналы моделей не отправляются."""
+
+    def __init__(self, model, batch_size, explicit_pk=False):
+        self.model = model
+        self.batch_size = batch_size
+        # search_vector заполняет триггер базы данных.
+        self.fields = [
+            field for field in model._meta.concrete_fields
+            if field.name != 'search_vector'
+            and (explicit_pk or not field.primary_key)
+        ]
+
+    def write(self, objects):
+        if connection.vendor != 'postgresql':
+            # Не больше, чем допускает база (в SQLite — 500 строк
+            # в одном INSERT).
+            self.model.objects.bulk_create(objects, min(
+                self.batch_size,
+                connection.ops.bulk_batch_size(self.fields, objects)
+            ))
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            writer.writerow([
+                self._copy_value(field, obj) for field in self.fields
+            ])
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in self.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(self.model._meta.db_table)}'
+                f" ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+
+    def _copy_value(self, field, obj):
+        # pre_save заполняет поля auto_now, как это делает bulk_create.
+        value = field.get_db_prep_save(field.pre_save(obj, True), connection)
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return value
+
+
+def refresh_derived_data(stdout):
+    """Пересчет производных данных, пропущенных при пакетной записи."""
+    stdout.write('Пересчет производных данных...')
+    Comment.objects.filter(title__isnull=True).update(
+        title_id=Subquery(
+            Review.objects.filter(
+                pk=OuterRef('review_id')
+            ).values('title_id')[:1]
+        )
+    )
+    sequences = connection.ops.sequence_reset_sql(
+        no_style(), (Category, Genre, Title, User, Review, Comment)
+    )
+    with connection.cursor() as cursor:
+        for sql in sequences:
+            cursor.execute(sql)
+    call_command('recalculate_ratings', stdout=stdout)
+    call_command('reconcile_user_stats', stdout=stdout)
+    bump_versions('category', 'genre')
+    title_filter_index.invalidate()
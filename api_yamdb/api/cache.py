@@ -0,0 +1,94 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import Counter
+
+VERSION_KEY = 'api:version:{}'
+# Ответ хранится вместе с валидаторами: (данные, ETag, Last-Modified).
+RESPONSE_KEY = 'api:response:v2:{}:{}'
+CHANGED_KEY = 'api:changed:{}'
+
+cache_requests = Counter(
+    'yamdb_response_cache_requests_total',
+    'Обращения к кэшу ответов API.',
+    ('view', 'result')
+)
+
+
+def object_version_name(model_name, pk):
+    """Имя счетчика версий отдельного объекта."""
+    return f'{model_name}:{pk}'
+
+
+def top_version_name(kind=None, value=None):
+    """Имя счетчика версий страницы лучших произведений: всех или в
+    категории, жанре (по slug) или году выпуска."""
+    if kind is None:
+        return object_version_name('top', 'all')
+    return object_version_name('top', f'{kind}:{value}')
+
+
+def get_versions(names):
+    """Текущие версии данных; отсутствующие счетчики заводятся заново.
+
+    Начальное значение берется от времени, чтобы вытесненный из кэша
+    счетчик не вернулся к версии, под которой уже лежат устаревшие ответы.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_versions(*names):
+    """Инвалидирует все ответы, зависящие от перечисленных данных."""
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(
+            {CHANGED_KEY.format(name): 1 for name in names},
+            settings.REPLICA_LAG_WINDOW
+        )
+
+
+def bump_versions_on_commit(*names):
+    """bump_versions после фиксации текущей транзакции: иначе
+    параллельный запрос успеет сохранить в кэше данные до фиксации
+    под новой версией, а при откате кэш сбросится впустую."""
+    transaction.on_commit(partial(bump_versions, *names))
+
+
+def recently_changed(names):
+    """Менялись ли данные за время возможного отставания реплик."""
+    return bool(cache.get_many([CHANGED_KEY.format(name) for name in names]))
+
+
+def response_key(request, view_name, version_names, kwargs):
+    """Ключ ответа: версии данных, параметры URL и строка запроса."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    fingerprint = repr((
+        get_versions(version_names),
+        request.get_host(),
+        sorted(kwargs.items()),
+        params,
+    )).encode()
+    return RESPONSE_KEY.format(
+        view_name,
+        hashlib.md5(fingerprint).hexdigest()
+    )
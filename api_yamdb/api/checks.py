@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def stateless_auth_cache(app_configs, **kwargs):
+    """Отзыв токенов в кэше процесса не виден другим воркерам."""
+    backend = settings.CACHES['default']['BACKEND']
+    local = backend in settings.LOCAL_CACHE_BACKENDS
+    if settings.JWT_STATELESS_AUTH and local:
+        return [Error(
+            'JWT_STATELESS_AUTH требует общего кэша: отозванные токены '
+            f'принимаются другими воркерами при {backend}.',
+            hint='Задайте CACHE_BACKEND (например, Redis) или '
+                 'JWT_STATELESS_AUTH=False.',
+            id='api.E001',
+        )]
+    return []
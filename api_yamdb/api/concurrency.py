@@ -0,0 +1,132 @@
+import http.client
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from .benchmark import _comments_path, _title, percentile
+
+# Команды запуска одного и того же проекта в двух режимах.
+SERVERS = {
+    'wsgi': ('api_yamdb.wsgi:application',),
+    'asgi': (
+        'api_yamdb.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ),
+}
+DEFAULT_LEVELS = (1, 8, 32, 128, 256)
+STARTUP_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+READ_PATHS = (
+    lambda rng, s: '/api/v1/titles/',
+    lambda rng, s: f'/api/v1/titles/{_title(rng, s)}/',
+    lambda rng, s: f'/api/v1/titles/{_title(rng, s)}/reviews/',
+    _comments_path,
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """Gunicorn в подпроцессе: синхронные воркеры или uvicorn."""
+
+    def __init__(self, mode, workers):
+        self.mode = mode
+        self.workers = workers
+        self.port = free_port()
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            (
+                sys.executable, '-m', 'gunicorn', *SERVERS[self.mode],
+                '--workers', str(self.workers),
+                '--bind', f'127.0.0.1:{self.port}',
+                '--log-level', 'warning',
+            ),
+            cwd=str(settings.BASE_DIR),
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'сервер {self.mode} не запустился')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), 1).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f'сервер {self.mode} не ответил за '
+                           f'{STARTUP_TIMEOUT} с')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def _client(port, paths, deadline, latencies, errors, lock):
+    connection = http.client.HTTPConnection(
+        '127.0.0.1', port, timeout=REQUEST_TIMEOUT
+    )
+    for path in paths:
+        if time.monotonic() > deadline:
+            break
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            failed = response.status != 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+    connection.close()
+
+
+def run_level(port, samples, concurrency, requests, duration, seed):
+    """Нагрузка concurrency одновременными клиентами с постоянными
+    соединениями; каждый делает requests запросов или работает
+    duration секунд."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = []
+    for number in range(concurrency):
+        rng = random.Random(f'{seed}:{concurrency}:{number}')
+        paths = [
+            rng.choice(READ_PATHS)(rng, samples) for _ in range(requests)
+        ]
+        threads.append(threading.Thread(
+            target=_client,
+            args=(port, paths, deadline, latencies, errors, lock),
+            daemon=True,
+        ))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
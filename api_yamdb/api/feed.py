@@ -0,0 +1,199 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from reviews.models import (
+    COMMENT_EVENT,
+    REVIEW_EVENT,
+    FeedEntry,
+    FeedEvent,
+    Follow,
+    Title,
+)
+
+from .metrics import Counter, Histogram
+
+logger = logging.getLogger('api.feed')
+
+BATCH_SIZE = 500
+# Записей ленты в одном INSERT.
+INSERT_BATCH_SIZE = 1000
+
+feed_events = Counter(
+    'yamdb_feed_events_total',
+    'Обработанные события лент.',
+    ('mode',)
+)
+feed_entries = Counter(
+    'yamdb_feed_entries_total', 'Записи, разосланные по лентам.'
+)
+feed_batch_duration = Histogram(
+    'yamdb_feed_batch_duration_seconds',
+    'Время рассылки одной пачки событий.'
+)
+
+
+def enqueue_review(review):
+    """Событие нового отзыва; рассылка — в обработчике очереди."""
+    return FeedEvent.objects.create(
+        kind=REVIEW_EVENT,
+        title_id=review.title_id,
+        review=review,
+        author_id=review.author_id,
+    )
+
+
+def enqueue_comment(comment):
+    return FeedEvent.objects.create(
+        kind=COMMENT_EVENT,
+        title_id=comment.title_id,
+        review_id=comment.review_id,
+        comment=comment,
+        author_id=comment.author_id,
+    )
+
+
+def popular_titles(title_ids=None):
+    """Произведения, события которых ленты читают сами."""
+    titles = Title.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_LIMIT
+    )
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    return titles.values('pk')
+
+
+class FeedWorker:
+    """Рассылка событий по лентам подписчиков пачками.
+
+    Пачка событий выбирается с блокировкой строк (SKIP LOCKED), так что
+    обработчики можно запускать параллельно. Подписчики всех
+    произведений пачки читаются одним запросом, записи лент вставляются
+    пакетами. События популярных произведений только отмечаются pulled:
+    их читает сама лента (read_feed).
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def fan_out_batch(self):
+        """Рассылка одной пачки; возвращает количество событий."""
+        started = time.monotonic()
+        with transaction.atomic():
+            events = list(
+                FeedEvent.objects.select_for_update(
+                    skip_locked=True
+                ).filter(fanned_out=False).order_by('id').values_list(
+                    'pk', 'title_id', 'author_id'
+                )[:self.batch_size]
+            )
+            if not events:
+                return 0
+            title_ids = {title_id for _, title_id, _ in events}
+            popular = {
+                row['pk'] for row in popular_titles(title_ids)
+            }
+            followers = {}
+            for title_id, user_id in Follow.objects.filter(
+                title_id__in=title_ids - popular
+            ).values_list('title_id', 'user_id').iterator():
+                followers.setdefault(title_id, []).append(user_id)
+            entries = [
+                FeedEntry(user_id=user_id, event_id=pk)
+                for pk, title_id, author_id in events
+                for user_id in followers.get(title_id, ())
+                if user_id != author_id
+            ]
+            FeedEntry.objects.bulk_create(
+                entries, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True
+            )
+            pulled = [
+                pk for pk, title_id, _ in events if title_id in popular
+            ]
+            FeedEvent.objects.filter(
+                pk__in=[pk for pk, _, _ in events]
+            ).update(fanned_out=True)
+            if pulled:
+                FeedEvent.objects.filter(pk__in=pulled).update(pulled=True)
+        feed_events.inc(len(events) - len(pulled), mode='push')
+        feed_events.inc(len(pulled), mode='pull')
+        feed_entries.inc(len(entries))
+        elapsed = time.monotonic() - started
+        feed_batch_duration.observe(elapsed)
+        logger.info(
+            'Разослано %s событий (%s записей) за %.2f с',
+            len(events), len(entries), elapsed
+        )
+        return len(events)
+
+
+def read_feed(user_id, limit, before=None):
+    """Страница ленты: события новее before в порядке убывания id и id
+    для следующей страницы (None — страница последняя).
+
+    Разосланные записи читаются диапазоном уникального индекса
+    (user, event), неразосланные события (pulled) произведений из
+    подписок — по индексу (title, id); две выборки сливаются.
+    Популярность произведения на момент чтения не важна: способ
+    доставки записан в самом событии.
+    """
+    # События удаленных произведений и авторов скрыты до очистки
+    # (purge_deleted).
+    entries = FeedEntry.objects.filter(
+        user_id=user_id,
+        event__title__deleted_at__isnull=True,
+        event__author__deleted_at__isnull=True,
+    )
+    pulled = FeedEvent.objects.filter(
+        pulled=True,
+        title__deleted_at__isnull=True,
+        author__deleted_at__isnull=True,
+        title_id__in=Follow.objects.filter(
+            user_id=user_id
+        ).values('title_id')
+    ).exclude(author_id=user_id)
+    if before is not None:
+        entries = entries.filter(event_id__lt=before)
+        pulled = pulled.filter(pk__lt=before)
+    related = ('review', 'comment', 'author')
+    events = {
+        entry.event.pk: entry.event
+        for entry in entries.select_related(*(
+            f'event__{name}' for name in related
+        )).order_by('-event_id')[:limit + 1]
+    }
+    events.update(
+        (event.pk, event) for event in
+        pulled.select_related(*related).order_by('-id')[:limit + 1]
+    )
+    page = sorted(events.values(), key=lambda event: -event.pk)
+    if len(page) > limit:
+        return page[:limit], page[limit - 1].pk
+    return page, None
+
+
+@transaction.atomic
+def follow_title(user_id, title_id):
+    """Подписка; возвращает False, если она уже была."""
+    _, created = Follow.objects.get_or_create(
+        user_id=user_id, title_id=title_id
+    )
+    if created:
+        Title.objects.filter(pk=title_id).update(
+            followers_count=F('followers_count') + 1
+        )
+    return created
+
+
+@transaction.atomic
+def unfollow_title(user_id, title_id):
+    deleted, _ = Follow.objects.filter(
+        user_id=user_id, title_id=title_id
+    ).delete()
+    if deleted:
+        Title.objects.filter(pk=title_id).update(
+            followers_count=F('followers_count') - 1
+        )
+    return bool(deleted)
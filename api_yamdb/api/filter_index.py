@@ -0,0 +1,317 @@
+import json
+import logging
+import threading
+from functools import partial
+
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    connections,
+    models,
+    transaction,
+)
+from django.db.models import Lookup
+from reviews.models import Title
+
+from .cache import VERSION_KEY, get_versions
+from .metrics import Counter
+
+logger = logging.getLogger('api.filter_index')
+
+VERSION_NAME = 'title-filter-index'
+# Журнал изменений: id произведений, измененных в каждой версии.
+CHANGES_KEY = 'api:title-filter-index:changes:{}'
+CHANGES_TIMEOUT = 3600
+# Больше версий догонять по журналу дороже, чем загрузить индекс.
+MAX_CHANGES = 100
+# Изменения, которые применяются только полной загрузкой.
+ALL_CHANGED = '*'
+
+index_loads = Counter(
+    'yamdb_title_filter_index_loads_total',
+    'Полные загрузки индекса фильтров произведений.',
+)
+index_fallbacks = Counter(
+    'yamdb_title_filter_index_fallbacks_total',
+    'Фильтры, отвеченные запросом к базе, пока индекс загружается.',
+)
+
+# Номера установленных битов для каждого значения байта.
+_BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1)
+    for value in range(256)
+)
+
+
+def _bitmap(ids):
+    """Битовая карта (целое число) с установленными битами ids."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def bitmap_ids(bitmap):
+    """Возрастающий список номеров установленных битов."""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for index, value in enumerate(data):
+        if value:
+            base = index << 3
+            ids.extend(base + bit for bit in _BYTE_BITS[value])
+    return ids
+
+
+@models.AutoField.register_lookup
+class InIds(Lookup):
+    """pk__in_ids=[...]: список передается одним параметром запроса,
+    а не параметром на каждый элемент, как у __in."""
+    lookup_name = 'in_ids'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, params = self.process_lhs(compiler, connection)
+        return f'{lhs} = ANY(%s)', [*params, list(self.rhs)]
+
+    def as_sqlite(self, compiler, connection):
+        lhs, params = self.process_lhs(compiler, connection)
+        return (
+            f'{lhs} IN (SELECT value FROM json_each(%s))',
+            [*params, json.dumps(list(self.rhs))]
+        )
+
+
+class TitleFilterIndex:
+    """Индекс фильтров произведений в памяти процесса.
+
+    Каждому жанру, категории и году соответствует битовая карта
+    первичных ключей произведений (целое число: id почти подряд, и
+    плотная карта на 100 000 произведений занимает 12 КБ). Фильтр
+    отвечает пересечением объединений карт, после чего произведения
+    выбираются по первичному ключу без соединения с жанрами.
+
+    Индекс загружается при старте воркера, изменения своего процесса
+    применяются после фиксации транзакции по сигналам. Каждое изменение
+    увеличивает версию VERSION_NAME в общем кэше и записывает в журнал
+    (CHANGES_KEY) id измененных произведений; другие процессы
+    перечитывают только их. Если журнал не покрывает пропущенные
+    версии, индекс загружается заново в фоновом потоке, а фильтры до
+    конца загрузки отвечаются запросом к базе (select возвращает None).
+    """
+    # False — загрузка в вызывающем потоке (тесты).
+    background = True
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loading = None
+        self.version = None
+        self.rows = {}
+        self.genres = {}
+        self.categories = {}
+        self.years = {}
+
+    # Индекс читается с основной базы: версия в кэше меняется после
+    # фиксации на ней, а реплика может отставать.
+    def _titles(self):
+        return Title.objects.using(DEFAULT_DB_ALIAS)
+
+    def _links(self):
+        return Title.genre.through.objects.using(DEFAULT_DB_ALIAS)
+
+    def _read(self, title_ids=None):
+        """Строки (категория, год, жанры) произведений; None — всех."""
+        titles, links = self._titles(), self._links()
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+            links = links.filter(title_id__in=title_ids)
+        rows = {
+            pk: (category, year, set())
+            for pk, category, year in titles.values_list(
+                'pk', 'category__slug', 'year'
+            ).iterator()
+        }
+        for pk, genre in links.values_list(
+            'title_id', 'genre__slug'
+        ).iterator():
+            rows[pk][2].add(genre)
+        return rows
+
+    def load(self):
+        """Полная загрузка; запросы к базе идут без блокировки индекса,
+        готовый индекс подменяет прежний."""
+        version = get_versions((VERSION_NAME,))[0]
+        rows = self._read()
+        bitmaps = self._build(rows)
+        with self._lock:
+            self.rows = rows
+            self.genres, self.categories, self.years = bitmaps
+            self.version = version
+        index_loads.inc()
+
+    def _build(self, rows):
+        genres, categories, years = {}, {}, {}
+        for pk, (category, year, slugs) in rows.items():
+            for slug in slugs:
+                genres.setdefault(slug, []).append(pk)
+            if category is not None:
+                categories.setdefault(category, []).append(pk)
+            years.setdefault(year, []).append(pk)
+        return tuple(
+            {key: _bitmap(ids) for key, ids in values.items()}
+            for values in (genres, categories, years)
+        )
+
+    def warm(self):
+        """Загрузка при старте воркера и в фоновом потоке; соединения с
+        базой закрываются, чтобы не достаться процессам после fork."""
+        try:
+            self.load()
+        except DatabaseError as error:
+            logger.warning('Индекс фильтров не загружен: %r', error)
+        finally:
+            connections.close_all()
+
+    def _load_later(self):
+        with self._lock:
+            if not self.background:
+                self.load()
+                return
+            if self.loading is None or not self.loading.is_alive():
+                self.loading = threading.Thread(
+                    target=self.warm, name='title-filter-index', daemon=True
+                )
+                self.loading.start()
+
+    def _changes(self, version):
+        """Версия, до которой журнал покрывает изменения, и id измененных
+        произведений; None — изменения неизвестны."""
+        base = self.version
+        if base is None or not 0 < version - base <= MAX_CHANGES:
+            return None
+        versions = range(base + 1, version + 1)
+        entries = cache.get_many(
+            [CHANGES_KEY.format(number) for number in versions]
+        )
+        changed = set()
+        for number in versions:
+            ids = entries.get(CHANGES_KEY.format(number))
+            if ids is None and number == version:
+                # Версия увеличена, а журнал еще не записан.
+                return number - 1, changed
+            if ids is None or ids == ALL_CHANGED:
+                return None
+            changed.update(ids)
+        return version, changed
+
+    def _current(self):
+        """Догоняет изменения других процессов; False — индекс устарел и
+        загружается заново."""
+        version = get_versions((VERSION_NAME,))[0]
+        base = self.version
+        if version == base:
+            return True
+        changes = self._changes(version)
+        if changes is None:
+            self._load_later()
+            return self.version == version
+        version, title_ids = changes
+        rows = self._read(title_ids)
+        with self._lock:
+            if self.version == base:
+                for pk in title_ids:
+                    self._apply(pk, rows.get(pk))
+                self.version = version
+        return True
+
+    def select(self, genres=(), categories=(), years=None):
+        """Возрастающий список id произведений, у которых есть хоть один
+        из жанров, одна из категорий и год в диапазоне years (low, high;
+        None — без границы). None — индекс загружается, условия нужно
+        проверить запросом к базе."""
+        if not self._current():
+            index_fallbacks.inc()
+            return None
+        with self._lock:
+            groups = []
+            if genres:
+                groups.append((self.genres, genres))
+            if categories:
+                groups.append((self.categories, categories))
+            if years is not None:
+                low, high = years
+                groups.append((self.years, [
+                    year for year in self.years
+                    if (low is None or year >= low)
+                    and (high is None or year <= high)
+                ]))
+            result = None
+            for bitmaps, keys in groups:
+                union = 0
+                for key in keys:
+                    union |= bitmaps.get(key, 0)
+                result = union if result is None else result & union
+        return [] if result is None else bitmap_ids(result)
+
+    def _set_bits(self, bitmaps, key, pk, present):
+        bitmap = bitmaps.get(key, 0)
+        bitmaps[key] = bitmap | 1 << pk if present else bitmap & ~(1 << pk)
+
+    def _apply(self, pk, row):
+        old = self.rows.pop(pk, None)
+        if old is not None:
+            category, year, slugs = old
+            for slug in slugs:
+                self._set_bits(self.genres, slug, pk, False)
+            if category is not None:
+                self._set_bits(self.categories, category, pk, False)
+            self._set_bits(self.years, year, pk, False)
+        if row is not None:
+            category, year, slugs = row
+            for slug in slugs:
+                self._set_bits(self.genres, slug, pk, True)
+            if category is not None:
+                self._set_bits(self.categories, category, pk, True)
+            self._set_bits(self.years, year, pk, True)
+            self.rows[pk] = row
+
+    def refresh(self, title_ids):
+        """Перечитывает произведения title_ids (удаленные убираются)."""
+        title_ids = set(title_ids)
+        rows = self._read(title_ids)
+        with self._lock:
+            if self.version is not None:
+                for pk in title_ids:
+                    self._apply(pk, rows.get(pk))
+            self._bump(sorted(title_ids))
+
+    def invalidate(self):
+        with self._lock:
+            self._bump(ALL_CHANGED)
+
+    def _bump(self, changes):
+        """Новая версия в кэше и запись журнала. Если между версиями не
+        было изменений других процессов, свой индекс остается
+        актуальным; иначе их изменения догоняются по журналу."""
+        key = VERSION_KEY.format(VERSION_NAME)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            # Счетчик вытеснен: get_versions заведет новый.
+            self.version = None
+            return
+        cache.set(CHANGES_KEY.format(version), changes, CHANGES_TIMEOUT)
+        if changes != ALL_CHANGED and self.version == version - 1:
+            self.version = version
+
+    def refresh_on_commit(self, title_ids):
+        transaction.on_commit(partial(self.refresh, title_ids))
+
+    def invalidate_on_commit(self):
+        transaction.on_commit(self.invalidate)
+
+
+title_filter_index = TitleFilterIndex()
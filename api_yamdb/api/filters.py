@@ -1,14 +1,82 @@
 from django_filters import rest_framework as filters
 from reviews.models import Title
 
+from .filter_index import title_filter_index
+
+
+def _slugs(value):
+    return [slug for slug in value.split(',') if slug]
+
 
 class FilterForTitle(filters.FilterSet):
-    """Описание фильтрации по полям модели Title для ViewSet."""
+    """Описание фильтрации по полям модели Title для ViewSet.
+
+    category и genre принимают несколько slug через запятую (любой из
+    них), year_min и year_max задают диапазон лет. Эти фильтры
+    отвечаются индексом в памяти (api.filter_index) одним условием на
+    первичный ключ, а пока индекс загружается — запросом к базе; name
+    всегда фильтруется запросом к базе.
+    """
     name = filters.CharFilter(field_name='name')
     category = filters.CharFilter(field_name='category__slug')
     genre = filters.CharFilter(field_name='genre__slug')
     year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+
+    indexed = ('category', 'genre', 'year', 'year_min', 'year_max')
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year',)
+        fields = (
+            'name', 'category', 'genre', 'year', 'year_min', 'year_max',
+        )
+
+    def filter_queryset(self, queryset):
+        data = {
+            name: value for name, value in self.form.cleaned_data.items()
+            if value not in (None, '')
+        }
+        indexed = {
+            name: data.pop(name) for name in self.indexed if name in data
+        }
+        if indexed:
+            conditions = self.conditions(indexed)
+            ids = title_filter_index.select(**conditions)
+            if ids is None:
+                queryset = self.filter_in_db(queryset, **conditions)
+            else:
+                queryset = queryset.filter(pk__in_ids=ids)
+        for name, value in data.items():
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    def conditions(self, values):
+        lows = [int(values[name]) for name in ('year', 'year_min')
+                if name in values]
+        highs = [int(values[name]) for name in ('year', 'year_max')
+                 if name in values]
+        return {
+            'genres': _slugs(values.get('genre', '')),
+            'categories': _slugs(values.get('category', '')),
+            'years': (
+                (max(lows, default=None), min(highs, default=None))
+                if lows or highs else None
+            ),
+        }
+
+    def filter_in_db(self, queryset, genres, categories, years):
+        """Те же условия запросом к базе, пока индекс загружается."""
+        lookups = {}
+        if genres:
+            lookups['pk__in'] = Title.genre.through.objects.filter(
+                genre__slug__in=genres
+            ).values('title_id')
+        if categories:
+            lookups['category__slug__in'] = categories
+        low, high = years or (None, None)
+        if low is not None:
+            lookups['year__gte'] = low
+        if high is not None:
+            lookups['year__lte'] = high
+        return queryset.filter(**lookups)
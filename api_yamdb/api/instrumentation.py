@@ -0,0 +1,61 @@
+import threading
+import time
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Стоимость обработки одного запроса: обращения к БД и сериализация."""
+
+    def __init__(self, capture_sql=False):
+        self.capture_sql = capture_sql
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка connection.execute_wrapper для учета запросов к БД."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_queries += 1
+            self.db_time += duration
+            if self.capture_sql and len(self.queries) < 100:
+                self.queries.append((duration, sql))
+
+
+def start_request(capture_sql=False):
+    _local.stats = RequestStats(capture_sql)
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в статистике запроса.
+
+    Вложенные сериализаторы вызываются внутри внешнего и отдельно не
+    учитываются.
+    """
+
+    def to_representation(self, instance):
+        stats = current_stats()
+        if stats is None or stats.serializer_depth:
+            return super().to_representation(instance)
+        stats.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.serializer_depth -= 1
@@ -0,0 +1,198 @@
+import logging
+import smtplib
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from users.models import FAILED, PENDING, SENDING, SENT, OutgoingEmail
+
+from .metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger('api.mail')
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 3600
+# Срок аренды пачки обработчиком: должен превышать время ее отправки.
+LEASE_TIMEOUT = 600
+
+mail_sent = Counter(
+    'yamdb_mail_sent_total', 'Отправленные письма из очереди.'
+)
+mail_failed = Counter(
+    'yamdb_mail_failed_total',
+    'Неудачные попытки отправки писем.',
+    ('final',)
+)
+mail_batch_duration = Histogram(
+    'yamdb_mail_batch_duration_seconds',
+    'Время отправки одной пачки писем.'
+)
+mail_throughput = Gauge(
+    'yamdb_mail_throughput_per_second',
+    'Скорость отправки последней пачки писем.'
+)
+mail_connections = Counter(
+    'yamdb_mail_smtp_connections_total', 'Открытые SMTP-соединения.'
+)
+
+# Ошибки соединения: оно закрывается и открывается заново для
+# следующего письма.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, OSError)
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """Постановка письма в очередь вместо отправки в запросе."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        to=','.join(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(
+        seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    )
+
+
+class MailWorker:
+    """Отправка писем из очереди пачками через одно SMTP-соединение.
+
+    Пачка захватывается короткой транзакцией с блокировкой строк (SKIP
+    LOCKED в PostgreSQL): письма помечаются отправляемыми и арендуются
+    на LEASE_TIMEOUT секунд. Отправка идет вне транзакции, результаты
+    записываются второй короткой транзакцией. Письма остановившегося
+    обработчика после истечения аренды выбираются снова.
+    Неудачные письма откладываются с экспоненциальной задержкой,
+    после max_attempts попыток помечаются недоставленными.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.connection = None
+
+    def _connection(self):
+        if self.connection is None:
+            self.connection = get_connection()
+            self.connection.open()
+            mail_connections.inc()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except CONNECTION_ERRORS:
+                pass
+            self.connection = None
+
+    def send_batch(self):
+        """Отправка одной пачки; возвращает количество обработанных писем."""
+        started = time.monotonic()
+        batch, lease = self._claim()
+        processed = sent = 0
+        for email in batch:
+            try:
+                connection = self._connection()
+            except CONNECTION_ERRORS + (smtplib.SMTPException,) as error:
+                # Сервер недоступен: письма не виноваты, попытка
+                # не засчитывается, остаток пачки ждет следующего раза.
+                logger.warning('SMTP-сервер недоступен: %r', error)
+                self.close()
+                break
+            sent += self._send(email, connection)
+            processed += 1
+        self._record(batch[:processed], batch[processed:], lease)
+        if processed:
+            elapsed = time.monotonic() - started
+            mail_batch_duration.observe(elapsed)
+            mail_throughput.set(round(sent / max(elapsed, 1e-6), 1))
+            logger.info(
+                'Отправлено %s из %s писем за %.2f с',
+                sent, processed, elapsed
+            )
+        return processed
+
+    def _claim(self):
+        """Захват готовых писем и писем с истекшей арендой."""
+        now = timezone.now()
+        lease = now + timedelta(seconds=LEASE_TIMEOUT)
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(
+                    skip_locked=True
+                ).filter(
+                    status__in=(PENDING, SENDING), send_after__lte=now
+                ).order_by('send_after', 'id')[:self.batch_size]
+            )
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(
+                status=SENDING, send_after=lease, attempts=F('attempts') + 1
+            )
+        for email in batch:
+            email.status, email.send_after = SENDING, lease
+            email.attempts += 1
+        return batch, lease
+
+    def _record(self, processed, unsent, lease):
+        """Запись результатов; письма, аренду которых уже перехватил
+        другой обработчик, не меняются."""
+        leased = OutgoingEmail.objects.filter(status=SENDING, send_after=lease)
+        sent = [email.pk for email in processed if email.status == SENT]
+        with transaction.atomic():
+            if sent:
+                leased.filter(pk__in=sent).update(
+                    status=SENT, sent_at=timezone.now(), last_error=''
+                )
+            for email in processed:
+                if email.status != SENT:
+                    leased.filter(pk=email.pk).update(
+                        status=email.status,
+                        send_after=email.send_after,
+                        last_error=email.last_error
+                    )
+            if unsent:
+                leased.filter(pk__in=[email.pk for email in unsent]).update(
+                    status=PENDING,
+                    send_after=timezone.now(),
+                    attempts=F('attempts') - 1
+                )
+
+    def _send(self, email, connection):
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, email.recipients,
+            connection=connection
+        )
+        try:
+            message.send()
+        except Exception as error:
+            if isinstance(error, CONNECTION_ERRORS):
+                self.close()
+            self._fail(email, error)
+            return 0
+        email.status = SENT
+        mail_sent.inc()
+        return 1
+
+    def _fail(self, email, error):
+        email.last_error = repr(error)
+        final = email.attempts >= self.max_attempts
+        if final:
+            email.status = FAILED
+        else:
+            email.status = PENDING
+            email.send_after = timezone.now() + retry_delay(email.attempts)
+        mail_failed.inc(final=str(final).lower())
+        logger.warning(
+            'Письмо %s не отправлено (попытка %s): %r',
+            email.pk, email.attempts, error
+        )
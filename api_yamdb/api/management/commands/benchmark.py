@@ -0,0 +1,104 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import SCENARIOS, compare_results, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержек (p50/p95/p99), пропускной способности и количества '
+        'запросов к базе для каждого маршрута API через тестовый клиент. '
+        'Изменяющие запросы откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество замеряемых запросов на сценарий.'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Количество разогревающих запросов на сценарий.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help=(
+                'Префикс имени сценария; можно указать несколько раз. '
+                'Сценарии: ' + ', '.join(s.name for s in SCENARIOS) + '.'
+            )
+        )
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help='Очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+        parser.add_argument(
+            '--compare',
+            help='Файл результатов предыдущего прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=20.0,
+            help='Допустимый рост p95 в процентах при сравнении.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должно быть положительным.')
+        try:
+            results = run_benchmark(
+                requests=options['requests'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                names=options['scenarios'],
+                cold_cache=options['cold_cache'],
+                progress=self.report,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline:
+                self.compare(json.load(baseline), results,
+                             options['threshold'])
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<30} p50 {result["p50_ms"]:>9.2f} мс  '
+            f'p95 {result["p95_ms"]:>9.2f} мс  '
+            f'p99 {result["p99_ms"]:>9.2f} мс  '
+            f'{result["rps"] or 0:>8.1f} запр/с  '
+            f'запросов к БД {result["queries_max"]:>3}  '
+            f'ошибок {result["errors"]}'
+        )
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        for name, metric, old, new, change, regression in compare_results(
+            baseline, results, threshold
+        ):
+            marker = ' РЕГРЕССИЯ' if regression else ''
+            self.stdout.write(
+                f'{name:<30} {metric:<12} {old:>10} -> {new:<10} '
+                f'{change:+7.1f}%{marker}'
+            )
+            if regression:
+                regressions.append(f'{name} {metric}')
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно '
+                f'{baseline.get("revision") or "базового прогона"}: '
+                + ', '.join(regressions)
+            )
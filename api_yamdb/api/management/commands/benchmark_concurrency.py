@@ -0,0 +1,109 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmark import benchmark_user, git_revision, load_samples
+from api.concurrency import DEFAULT_LEVELS, SERVERS, Server, run_level
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение WSGI (синхронные воркеры gunicorn) и ASGI (uvicorn) '
+        'на одних и тех же данных: пропускная способность, p50/p99 и '
+        'ошибки чтения при растущем числе одновременных клиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            action='append',
+            dest='modes',
+            choices=tuple(SERVERS),
+            help='Режим сервера; по умолчанию оба.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            action='append',
+            dest='levels',
+            help=(
+                'Число одновременных клиентов; можно указать несколько '
+                'раз. По умолчанию '
+                + ', '.join(map(str, DEFAULT_LEVELS)) + '.'
+            )
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Количество процессов сервера в каждом режиме.'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Количество запросов на клиента.'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30.0,
+            help='Предельная длительность одного уровня в секундах.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['workers'] < 1:
+            raise CommandError(
+                '--requests и --workers должны быть положительными.'
+            )
+        try:
+            samples = load_samples(
+                random.Random(options['seed']), benchmark_user()
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        # Серверы открывают свои соединения с базой.
+        connection.close()
+        results = {}
+        for mode in options['modes'] or tuple(SERVERS):
+            try:
+                with Server(mode, options['workers']) as server:
+                    results[mode] = [
+                        self.report(mode, run_level(
+                            server.port, samples, level,
+                            options['requests'], options['duration'],
+                            options['seed']
+                        ))
+                        for level in options['levels'] or DEFAULT_LEVELS
+                    ]
+            except RuntimeError as error:
+                raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump({
+                    'revision': git_revision(),
+                    'created': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'settings': {
+                        'workers': options['workers'],
+                        'requests': options['requests'],
+                        'duration': options['duration'],
+                        'seed': options['seed'],
+                    },
+                    'modes': results,
+                }, output, ensure_ascii=False, indent=2)
+
+    def report(self, mode, result):
+        self.stdout.write(
+            f'{mode:<5} клиентов {result["concurrency"]:>5}  '
+            f'{result["rps"]:>8.1f} запр/с  '
+            f'p50 {result["p50_ms"]:>9.2f} мс  '
+            f'p99 {result["p99_ms"]:>9.2f} мс  '
+            f'ошибок {result["errors"]}'
+        )
+        return result
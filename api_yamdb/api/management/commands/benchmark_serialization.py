@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import measure_serialization
+
+
+class Command(BaseCommand):
+    help = (
+        'Процессорное время на элемент страницы произведений, отзывов и '
+        'комментариев: сериализаторы DRF и JSONRenderer против строк '
+        '.values() и orjson. Проверяет побайтное совпадение ответов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=500,
+            help='Количество элементов на странице.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Количество повторов; берется лучший.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        if options['items'] < 1 or options['repeat'] < 1:
+            raise CommandError(
+                '--items и --repeat должны быть положительными.'
+            )
+        try:
+            results = measure_serialization(
+                options['items'], options['repeat'], progress=self.report
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if not all(r['identical'] for r in results['resources'].values()):
+            raise CommandError('Ответы быстрого пути отличаются от DRF.')
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<10} {result["items"]:>6} эл.  '
+            f'DRF {result["drf_us_per_item"]:>8.1f} мкс/эл.  '
+            f'values+orjson {result["fast_us_per_item"]:>8.1f} мкс/эл.  '
+            f'x{result["speedup"]:.1f}'
+            + ('' if result['identical'] else '  ОТЛИЧАЕТСЯ')
+        )
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from api.export import CHUNK_SIZE, EXPORTS, RENDERERS, export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка отзывов или комментариев в CSV/NDJSON. '
+        'Для инкрементальной выгрузки передайте --since-id последней '
+        'выгруженной записи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(EXPORTS))
+        parser.add_argument(
+            '--output-format', choices=tuple(RENDERERS), default='csv'
+        )
+        parser.add_argument('--output', help='Файл (по умолчанию stdout).')
+        parser.add_argument('--since-id', type=int)
+        parser.add_argument(
+            '--since', help='Дата публикации (ISO 8601), после которой '
+                            'выгружаются записи.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since_date = None
+        if options['since']:
+            since_date = parse_datetime(options['since'])
+            if since_date is None:
+                raise CommandError('Некорректная дата в --since.')
+        rows = export_rows(
+            options['kind'],
+            since_id=options['since_id'],
+            since_date=since_date,
+            chunk_size=options['chunk_size'],
+        )
+        watermark = WatermarkRows(rows)
+        render, _ = RENDERERS[options['output_format']]
+        chunks = render(options['kind'], watermark)
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+        self.stderr.write(
+            f'Выгружено {watermark.count} записей, '
+            f'водяной знак --since-id {watermark.last_id}'
+        )
+
+
+class WatermarkRows:
+    """Запоминает количество и id последней выгруженной строки."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+        self.last_id = None
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            self.last_id = row[0]
+            yield row
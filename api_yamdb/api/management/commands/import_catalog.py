@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import USER, User
+
+from api.bulk import BatchWriter, explicit_pub_dates, refresh_derived_data
+
+# Порядок загрузки: каждый файл ссылается только на уже загруженные.
+# Произведения, отзывы и комментарии загружаются со своими id, на которые
+# ссылаются следующие файлы; остальное связывается по slug и username.
+SOURCES = (
+    ('category', Category, False),
+    ('genre', Genre, False),
+    ('titles', Title, True),
+    ('users', User, False),
+    ('review', Review, True),
+    ('comments', Comment, True),
+)
+PROGRESS_EVERY = 10
+
+
+def read_rows(path):
+    """Построчное чтение CSV или JSONL без загрузки файла в память."""
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.jsonl'):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(source)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'некорректная дата {value!r}')
+    if timezone.is_naive(date):
+        return timezone.make_aware(date, timezone.utc)
+    return date
+
+
+def split_slugs(value):
+    if isinstance(value, list):
+        return value
+    return [slug.strip() for slug in (value or '').split(',') if slug]
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая загрузка каталога из CSV/JSONL файлов каталога SOURCE: '
+        'category, genre, titles, users, review, comments (.csv или .jsonl).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Каталог с файлами данных.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк, записываемых одной транзакцией.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки (по умолчанию в каталоге SOURCE).'
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        self.batch_size = options['batch_size']
+        self.checkpoint_path = options['checkpoint'] or os.path.join(
+            source, '.import_checkpoint.json'
+        )
+        self.checkpoint = self.load_checkpoint()
+        self.categories = dict(Category.objects.values_list('slug', 'pk'))
+        self.genres = dict(Genre.objects.values_list('slug', 'pk'))
+        self.users = dict(User.objects.values_list('username', 'pk'))
+
+        self.genre_writer = BatchWriter(Title.genre.through, self.batch_size)
+        with explicit_pub_dates():
+            for name, model, explicit_pk in SOURCES:
+                path = self.find_source(source, name)
+                if path is not None:
+                    writer = BatchWriter(model, self.batch_size, explicit_pk)
+                    self.import_file(name, path, writer)
+        self.finalize()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def find_source(self, source, name):
+        for extension in ('.csv', '.jsonl'):
+            path = os.path.join(source, name + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, encoding='utf-8') as checkpoint:
+            return json.load(checkpoint)
+
+    def save_checkpoint(self):
+        temporary = self.checkpoint_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint:
+            json.dump(self.checkpoint, checkpoint)
+        os.replace(temporary, self.checkpoint_path)
+
+    def import_file(self, name, path, writer):
+        """Загрузка одного файла пакетами с сохранением номера последней
+        записанной строки в контрольную точку."""
+        build = getattr(self, f'build_{name}')
+        done = self.checkpoint.get(name, 0)
+        started = time.monotonic()
+        imported = batches = 0
+        batch, links = [], []
+        number = done
+        for number, row in enumerate(read_rows(path), start=1):
+            if number <= done:
+                continue
+            try:
+                obj, obj_links = build(row)
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'{path}, строка {number}: {error!r}')
+            batch.append(obj)
+            links.extend(obj_links)
+            if len(batch) >= self.batch_size:
+                self.write_batch(name, writer, batch, links, number)
+                imported += len(batch)
+                batch, links = [], []
+                batches += 1
+                if batches % PROGRESS_EVERY == 0:
+                    self.report(name, imported, started)
+        if batch:
+            self.write_batch(name, writer, batch, links, number)
+            imported += len(batch)
+        self.report(name, imported, started)
+
+    def write_batch(self, name, writer, batch, links, position):
+        with transaction.atomic():
+            writer.write(batch)
+            if links:
+                self.genre_writer.write(links)
+            self.after_batch(name, batch)
+        self.checkpoint[name] = position
+        self.save_checkpoint()
+
+    def after_batch(self, name, batch):
+        if name == 'category':
+            self.categories.update(
+                Category.objects.filter(
+                    slug__in=[obj.slug for obj in batch]
+                ).values_list('slug', 'pk')
+            )
+        elif name == 'genre':
+            self.genres.update(
+                Genre.objects.filter(
+                    slug__in=[obj.slug for obj in batch]
+                ).values_list('slug', 'pk')
+            )
+        elif name == 'users':
+            self.users.update(
+                User.objects.filter(
+                    username__in=[obj.username for obj in batch]
+                ).values_list('username', 'pk')
+            )
+
+    def report(self, name, imported, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{name}: {imported} строк, {imported / elapsed:.0f} строк/с'
+        )
+
+    def build_category(self, row):
+        return Category(name=row['name'], slug=row['slug']), ()
+
+    def build_genre(self, row):
+        return Genre(name=row['name'], slug=row['slug']), ()
+
+    def build_titles(self, row):
+        title_id = int(row['id'])
+        category = row.get('category')
+        title = Title(
+            id=title_id,
+            name=row['name'],
+            year=int(row['year']),
+            description=row.get('description') or '',
+            category_id=self.categories[category] if category else None,
+        )
+        links = [
+            Title.genre.through(title_id=title_id, genre_id=self.genres[slug])
+            for slug in split_slugs(row.get('genre'))
+        ]
+        return title, links
+
+    def build_users(self, row):
+        return User(
+            username=row['username'],
+            email=row['email'],
+            role=row.get('role') or USER,
+            bio=row.get('bio') or '',
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            password=make_password(None),
+        ), ()
+
+    def build_review(self, row):
+        return Review(
+            id=int(row['id']),
+            title_id=int(row['title_id']),
+            author_id=self.users[row['author']],
+            text=row['text'],
+            score=int(row['score']),
+            pub_date=parse_date(row.get('pub_date')),
+        ), ()
+
+    def build_comments(self, row):
+        title_id = row.get('title_id')
+        return Comment(
+            id=int(row['id']),
+            review_id=int(row['review_id']),
+            title_id=int(title_id) if title_id else None,
+            author_id=self.users[row['author']],
+            text=row['text'],
+            pub_date=parse_date(row.get('pub_date')),
+        ), ()
+
+    def finalize(self):
+        refresh_derived_data(self.stdout)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.feed import BATCH_SIZE, FeedWorker
+from api.metrics import serve_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработчик очереди событий лент: рассылает новые отзывы и '
+        'комментарии по лентам подписчиков пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество событий в пачке.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разослать накопленные события и завершиться.'
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            help='Порт HTTP для метрик обработчика.'
+        )
+
+    def handle(self, *args, **options):
+        if options['metrics_port']:
+            serve_metrics(options['metrics_port'])
+        worker = FeedWorker(options['batch_size'])
+        total = 0
+        while True:
+            processed = worker.fan_out_batch()
+            total += processed
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+        self.stdout.write(f'Обработано событий: {total}')
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Title
+
+from api.benchmark import DEFAULT_SIZES, DatasetGenerator
+from api.bulk import refresh_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение пустой базы детерминированным синтетическим набором '
+        'данных для benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                default=default,
+                help=f'Количество записей (по умолчанию {default}).'
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно дает одинаковые данные.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество строк, записываемых одной транзакцией.'
+        )
+
+    def handle(self, *args, **options):
+        if Title.objects.exists():
+            raise CommandError(
+                'База уже содержит произведения; очистите ее командой flush.'
+            )
+        try:
+            generator = DatasetGenerator(
+                {name: options[name] for name in DEFAULT_SIZES},
+                options['seed']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        generator.write(options['batch_size'], self.report)
+        refresh_derived_data(self.stdout)
+
+    def report(self, name, written, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{name}: {written} строк, {written / elapsed:.0f} строк/с'
+        )
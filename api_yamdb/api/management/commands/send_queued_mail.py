@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.mail import BATCH_SIZE, MAX_ATTEMPTS, MailWorker
+from api.metrics import serve_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработчик очереди исходящей почты: отправляет письма пачками '
+        'через одно SMTP-соединение с повторами и задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество писем в пачке.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='Попыток отправки, после которых письмо не доставлено.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.'
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            help='Порт HTTP для метрик обработчика.'
+        )
+
+    def handle(self, *args, **options):
+        if options['metrics_port']:
+            serve_metrics(options['metrics_port'])
+        worker = MailWorker(options['batch_size'], options['max_attempts'])
+        total = 0
+        try:
+            while True:
+                processed = worker.send_batch()
+                total += processed
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            worker.close()
+        self.stdout.write(f'Обработано писем: {total}')
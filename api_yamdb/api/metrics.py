@@ -0,0 +1,274 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+
+REGISTRY = []
+# Как часто процесс сохраняет свои метрики в METRICS_DIR, секунд.
+FLUSH_INTERVAL = 5
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Metric:
+    """Метрика процесса с метками в формате Prometheus."""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        start_flusher()
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def items(self):
+        with self._lock:
+            return [(key, self._copy(value)) for key, value in
+                    self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def _add(value, other):
+        return value + other
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self, items):
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Counter):
+    """Текущее значение, которое может как расти, так и уменьшаться."""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Распределение наблюдений по корзинам."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    @staticmethod
+    def _copy(value):
+        counts, total, count = value
+        return [list(counts), total, count]
+
+    @staticmethod
+    def _add(value, other):
+        return [
+            [mine + theirs for mine, theirs in zip(value[0], other[0])],
+            value[1] + other[1],
+            value[2] + other[2],
+        ]
+
+    def samples(self, items):
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield (
+                    self.name + '_bucket',
+                    {**labels, 'le': repr(float(bound))},
+                    bucket_count
+                )
+            yield self.name + '_bucket', {**labels, 'le': '+Inf'}, count
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+def _escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _state_path(metrics_dir, pid):
+    return os.path.join(metrics_dir, f'{pid}.json')
+
+
+def write_state():
+    """Сохраняет метрики процесса в METRICS_DIR."""
+    if not settings.METRICS_DIR:
+        return
+    path = _state_path(settings.METRICS_DIR, os.getpid())
+    state = {
+        metric.name: [[list(key), value] for key, value in metric.items()]
+        for metric in REGISTRY
+    }
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(state, file)
+    os.replace(path + '.tmp', path)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        write_state()
+
+
+def start_flusher():
+    """Запускает периодическое сохранение метрик, если задан METRICS_DIR;
+    после fork воркера — заново в новом процессе."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid or not settings.METRICS_DIR:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+        threading.Thread(
+            target=_flush_forever, name='metrics-flush', daemon=True
+        ).start()
+        atexit.register(write_state)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _process_states():
+    """Метрики остальных процессов из METRICS_DIR. Счетчики и
+    гистограммы завершившихся процессов учитываются, их gauge — нет."""
+    own = os.getpid()
+    for entry in os.scandir(settings.METRICS_DIR):
+        name, ext = os.path.splitext(entry.name)
+        if ext != '.json' or not name.isdigit() or int(name) == own:
+            continue
+        try:
+            with open(entry.path) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            continue
+        yield _alive(int(name)), state
+
+
+def collect():
+    """Значения метрик процесса, а при заданном METRICS_DIR — сумма по
+    всем процессам, сохранившим метрики в этот каталог."""
+    values = {metric.name: OrderedDict(metric.items()) for metric in REGISTRY}
+    if not settings.METRICS_DIR:
+        return values
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    kinds = {metric.name: metric for metric in REGISTRY}
+    for alive, state in _process_states():
+        for name, items in state.items():
+            metric = kinds.get(name)
+            if metric is None or (metric.kind == 'gauge' and not alive):
+                continue
+            merged = values[name]
+            for key, value in items:
+                key = tuple(key)
+                merged[key] = (
+                    metric._add(merged[key], value) if key in merged
+                    else value
+                )
+    return values
+
+
+def render_metrics():
+    """Текстовое представление метрик для Prometheus."""
+    values = collect()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples(
+            values[metric.name].items()
+        ):
+            lines.append(f'{name}{_format_labels(labels)} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдача метрик фонового обработчика в формате Prometheus."""
+
+    def do_GET(self):  # noqa: N802
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port):
+    """Запускает в фоновом потоке HTTP-сервер метрик на порту port."""
+    server = ThreadingHTTPServer(('', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,112 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import finish_request, start_request
+from .metrics import Histogram
+
+logger = logging.getLogger('api.slow_requests')
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+request_duration = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки запроса.',
+    ('view', 'method', 'status')
+)
+request_db_queries = Histogram(
+    'yamdb_http_request_db_queries',
+    'Количество запросов к БД на один запрос.',
+    ('view',),
+    QUERY_BUCKETS
+)
+request_db_duration = Histogram(
+    'yamdb_http_request_db_duration_seconds',
+    'Время выполнения запросов к БД на один запрос.',
+    ('view',)
+)
+request_serializer_duration = Histogram(
+    'yamdb_http_request_serializer_duration_seconds',
+    'Время сериализации ответа.',
+    ('view',)
+)
+response_size = Histogram(
+    'yamdb_http_response_size_bytes',
+    'Размер тела ответа.',
+    ('view',),
+    SIZE_BUCKETS
+)
+
+
+def view_name(view_func, method):
+    """Имя представления DRF вида TitleViewSet.list."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'view')
+    actions = getattr(view_func, 'actions', None)
+    if actions and method.lower() in actions:
+        return f'{cls.__name__}.{actions[method.lower()]}'
+    return cls.__name__
+
+
+class RequestMetricsMiddleware:
+    """Метрики запросов по представлениям: время ответа, количество и
+    время запросов к БД, время сериализации и размер ответа.
+
+    Запросы дольше SLOW_REQUEST_THRESHOLD секунд пишутся в лог
+    api.slow_requests вместе с самыми долгими SQL-запросами.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = settings.SLOW_REQUEST_THRESHOLD
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        stats = start_request(capture_sql=self.slow_threshold is not None)
+        request._metrics_view = 'unmatched'
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            finish_request()
+        duration = time.perf_counter() - started
+        view = request._metrics_view
+        request_duration.observe(
+            duration,
+            view=view,
+            method=request.method,
+            status=response.status_code
+        )
+        request_db_queries.observe(stats.db_queries, view=view)
+        request_db_duration.observe(stats.db_time, view=view)
+        request_serializer_duration.observe(stats.serializer_time, view=view)
+        if not response.streaming:
+            response_size.observe(len(response.content), view=view)
+        if self.slow_threshold is not None and duration > self.slow_threshold:
+            self.log_slow_request(request, view, duration, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_name(view_func, request.method)
+
+    def log_slow_request(self, request, view, duration, stats):
+        slowest = sorted(stats.queries, reverse=True)[:10]
+        logger.warning(
+            'Медленный запрос %s %s (%s): %.3f с, %d запросов к БД '
+            '(%.3f с), сериализация %.3f с\n%s',
+            request.method,
+            request.get_full_path(),
+            view,
+            duration,
+            stats.db_queries,
+            stats.db_time,
+            stats.serializer_time,
+            '\n'.join(f'{seconds:.4f} с  {sql}' for seconds, sql in slowest)
+        )
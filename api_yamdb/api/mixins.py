@@ -1,4 +1,29 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from .bulk import insert_objects, lock_for_insert, set_prefetched
+from .cache import (
+    bump_versions_on_commit,
+    cache_requests,
+    get_versions,
+    object_version_name,
+    recently_changed,
+    response_key,
+)
+from .conditional import make_etag, not_modified, set_validators
+from .renderers import FastJSONRenderer
+from .replicas import replica_alias, use_replica
 
 
 class CLDViewSet(
@@ -9,3 +34,509 @@ class CLDViewSet(
 ):
     """Класс-родитель для представлений категорий и жанров."""
     pass
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают с реплики (см. api.replicas)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user)
+
+
+class NestedResourceMixin:
+    """Ресурс, вложенный в другой (отзывы произведения, комментарии
+    отзыва).
+
+    parent_lookups связывает поля родителя с параметрами URL, так что
+    вся цепочка родителей проверяется одним запросом. Родитель
+    загружается при первом вызове get_parent() и запоминается в
+    request.nested_parent для разрешений, сериализаторов и perform_*.
+    Действия над одним объектом не загружают родителя: queryset
+    фильтруется по тем же параметрам и условиям parent_conditions
+    (например, произведение не удалено) через parent_field.
+    nested_queryset — объекты ресурса без фильтра по родителю.
+    """
+    nested_queryset = None
+    parent_model = None
+    parent_field = None
+    parent_lookups = {}
+    parent_conditions = {}
+
+    def get_parent_queryset(self):
+        return self.parent_model.objects.all()
+
+    def get_parent(self):
+        parent = getattr(self.request, 'nested_parent', None)
+        if parent is None:
+            parent = get_object_or_404(self.get_parent_queryset(), **{
+                field: self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookups.items()
+            })
+            self.request.nested_parent = parent
+        return parent
+
+    def get_nested_queryset(self):
+        assert self.nested_queryset is not None, (
+            f"'{self.__class__.__name__}' should either include a "
+            '`nested_queryset` attribute, or override the '
+            '`get_nested_queryset()` method.'
+        )
+        return self.nested_queryset.all()
+
+    def get_queryset(self):
+        if self.detail:
+            lookups = {
+                f'{self.parent_field}__{field}': self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookups.items()
+            }
+            lookups.update(
+                (f'{self.parent_field}__{field}', value)
+                for field, value in self.parent_conditions.items()
+            )
+        else:
+            lookups = {self.parent_field: self.get_parent()}
+        return self.get_nested_queryset().filter(**lookups)
+
+
+class ConditionalReadMixin:
+    """ETag и Last-Modified для list и retrieve.
+
+    Валидаторы строятся по метаданным: updated_at объекта, а для списка —
+    ключам и updated_at строк самой страницы и числу объектов, которое
+    пагинация limit/offset считает и так (курсорной оно не нужно). При
+    совпадении If-None-Match или If-Modified-Since ответ 304 отдается без
+    сериализации. Версии данных из cache_related учитываются в ETag.
+    """
+    validators = (None, None)
+
+    def get_validators(self, updated_at, *parts):
+        etag = make_etag(
+            f'{self.__class__.__name__}.{self.action}',
+            self.request.get_host(),
+            updated_at,
+            get_versions(getattr(self, 'cache_related', ())),
+            *parts
+        )
+        return etag, int(updated_at.timestamp()) if updated_at else None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.list_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        rows = list(rows) if page is None else page
+        versions = [self.row_version(row) for row in rows]
+        self.validators = self.get_validators(
+            max((updated_at for _, updated_at in versions), default=None),
+            versions,
+            getattr(self.paginator, 'count', None),
+            sorted(request.query_params.lists())
+        )
+        response = not_modified(request, *self.validators)
+        if response is not None:
+            return response
+        data = self.serialize_rows(rows)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return set_validators(response, *self.validators)
+
+    def list_rows(self, queryset):
+        return queryset
+
+    def row_version(self, row):
+        return row.pk, row.updated_at
+
+    def serialize_rows(self, rows):
+        return self.get_serializer(rows, many=True).data
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.validators = self.get_validators(instance.updated_at, instance.pk)
+        response = not_modified(request, *self.validators) or Response(
+            self.get_serializer(instance).data
+        )
+        return set_validators(response, *self.validators)
+
+
+class RowReadMixin:
+    """Список по строкам .values() вместо объектов модели.
+
+    row_serializer (api.rows.RowSerializer) строит тот же ответ, что и
+    сериализатор действия list; ответ рендерится orjson. Подключается
+    перед ConditionalReadMixin.
+    """
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    row_serializer = None
+
+    def list_rows(self, queryset):
+        return self.row_serializer.values(queryset, 'updated_at')
+
+    def row_version(self, row):
+        return row[self.row_serializer.pk], row['updated_at']
+
+    def serialize_rows(self, rows):
+        return self.row_serializer.serialize(rows)
+
+
+class CachedReadMixin:
+    """Кэширование сериализованных ответов list и retrieve.
+
+    cache_model — имя данных самого представления, cache_related — имена
+    данных, от которых зависит ответ. Ответ retrieve зависит от версии
+    конкретного объекта, а не от версии всех объектов модели; версия
+    '<cache_model>:*' сбрасывает все объекты модели сразу.
+    """
+    cache_model = None
+    cache_related = ()
+
+    def get_cache_version_names(self):
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            own = (
+                object_version_name(self.cache_model, lookup),
+                object_version_name(self.cache_model, '*'),
+            )
+        else:
+            own = (self.cache_model,)
+        return own + tuple(self.cache_related)
+
+    def get_cache_timeout(self):
+        return settings.API_CACHE_TIMEOUT
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        view_name = f'{self.__class__.__name__}.{self.action}'
+        version_names = self.get_cache_version_names()
+        key = response_key(request, view_name, version_names, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            cache_requests.inc(view=view_name, result='hit')
+            data, *validators = cached
+            response = not_modified(request, *validators) or Response(data)
+            response['X-Cache'] = 'HIT'
+            return set_validators(response, *validators)
+        cache_requests.inc(view=view_name, result='miss')
+        response = handler(request, *args, **kwargs)
+        # Реплика может еще не получить только что сделанные изменения:
+        # такой ответ не должен попасть в кэш под новой версией.
+        if response.status_code == status.HTTP_200_OK and not (
+            replica_alias() and recently_changed(version_names)
+        ):
+            cache.set(
+                key,
+                (response.data, *getattr(self, 'validators', (None, None))),
+                self.get_cache_timeout()
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+NOT_APPLIED = {
+    'status': 424,
+    'errors': {
+        'non_field_errors': ['Не записано из-за ошибок в других элементах.']
+    },
+}
+
+
+def _without_unique_validators(field):
+    """Убирает UniqueValidator поля; True, если он был."""
+    validators = [
+        validator for validator in field.validators
+        if not isinstance(validator, UniqueValidator)
+    ]
+    if len(validators) == len(field.validators):
+        return False
+    field.validators = validators
+    return True
+
+
+class BulkWriteMixin:
+    """Пакетные create (POST), update (PATCH) и delete (DELETE) по списку
+    в теле запроса к .../bulk/.
+
+    Связи по slug всех элементов загружаются одним запросом на модель,
+    уникальность тоже проверяется одним запросом. Если хоть один элемент
+    не прошел проверку, ничего не записывается и возвращается 400.
+    Запись идет в одной транзакции через bulk_create, bulk_update и
+    пакетную вставку в промежуточные таблицы; ответ содержит результат
+    по каждому элементу в порядке запроса. Изменение и удаление ищут
+    объекты по bulk_key (по умолчанию lookup_field); для удаления
+    передается список значений bulk_key.
+    """
+    bulk_key = None
+    preloaded = None
+
+    def get_bulk_key(self):
+        return self.bulk_key or self.lookup_field
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.preloaded is not None:
+            context['preloaded'] = self.preloaded
+        return context
+
+    def bulk_changed(self, objects, created):
+        """Пакетная запись не отправляет post_save: сброс кэша."""
+        bump_versions_on_commit(self.cache_model)
+
+    @action(detail=False, methods=('post', 'patch', 'delete'))
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {'non_field_errors': ['Ожидается непустой список.']}
+            )
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {settings.API_BULK_MAX_ITEMS} элементов '
+                'в одном запросе.'
+            ]})
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_destroy,
+        }[request.method]
+        with transaction.atomic():
+            results, response_status = handler(items)
+        return Response(results, status=response_status)
+
+    def preload(self, items):
+        """Объекты связей по slug из всех элементов, по запросу на модель."""
+        preloaded = {}
+        for name, field in self.get_serializer().fields.items():
+            field = getattr(field, 'child_relation', field)
+            if not hasattr(field, 'slug_field'):
+                continue
+            slugs = set()
+            for item in items:
+                value = item.get(name) if isinstance(item, dict) else None
+                for slug in value if isinstance(value, list) else [value]:
+                    if isinstance(slug, (str, int)):
+                        slugs.add(str(slug))
+            preloaded[field.queryset.model] = {
+                str(getattr(obj, field.slug_field)): obj
+                for obj in field.queryset.filter(
+                    **{f'{field.slug_field}__in': slugs}
+                )
+            }
+        return preloaded
+
+    def unique_errors(self, serializer, items):
+        """Проверка уникальных полей всех элементов одним запросом на
+        поле вместо UniqueValidator у каждого элемента."""
+        errors = [{} for _ in items]
+        model = serializer.child.Meta.model
+        for name, field in serializer.child.fields.items():
+            if not _without_unique_validators(field):
+                continue
+            values = [
+                item.get(name) if isinstance(item, dict) else None
+                for item in items
+            ]
+            existing = set(model.objects.filter(
+                **{f'{name}__in': [v for v in values if v is not None]}
+            ).values_list(name, flat=True))
+            seen = set()
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                if value in existing or value in seen:
+                    errors[index][name] = [
+                        f'{model._meta.verbose_name} с таким {name} '
+                        'уже существует.'
+                    ]
+                seen.add(value)
+        return errors
+
+    def bulk_create(self, items):
+        # Ключи назначаются в этой же транзакции после проверок.
+        lock_for_insert(self.get_queryset().model)
+        self.preloaded = self.preload(items)
+        serializer = self.get_serializer(data=items, many=True)
+        unique = self.unique_errors(serializer, items)
+        serializer.is_valid()
+        errors = serializer.errors or [{} for _ in items]
+        if serializer.errors or any(unique):
+            return [
+                {'status': 400, 'errors': {**error, **extra}}
+                if error or extra else NOT_APPLIED
+                for error, extra in zip(errors, unique)
+            ], status.HTTP_400_BAD_REQUEST
+        objects = self.perform_bulk_create(serializer.validated_data)
+        return [
+            {'status': 201, 'data': data}
+            for data in self.get_serializer(objects, many=True).data
+        ], status.HTTP_201_CREATED
+
+    def perform_bulk_create(self, validated_data):
+        model = self.get_queryset().model
+        many_to_many = [
+            field for field in model._meta.many_to_many
+            if field.name in validated_data[0]
+        ]
+        objects, related = [], []
+        for data in validated_data:
+            data = dict(data)
+            related.append(
+                {field.name: data.pop(field.name) for field in many_to_many}
+            )
+            objects.append(model(**data))
+        insert_objects(model, objects)
+        self._set_many_to_many(objects, related, many_to_many)
+        self.bulk_changed(objects, created=True)
+        return objects
+
+    def _set_many_to_many(self, objects, related, fields):
+        """Замена связей многие-ко-многим пакетной вставкой."""
+        for field in fields:
+            owners = [
+                (obj, values[field.name])
+                for obj, values in zip(objects, related)
+                if field.name in values
+            ]
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            through.objects.filter(**{
+                f'{source}__in': [obj.pk for obj, _ in owners]
+            }).delete()
+            through.objects.bulk_create(
+                through(**{source: obj.pk, target: value.pk})
+                for obj, values in owners
+                for value in values
+            )
+            for obj, values in owners:
+                set_prefetched(obj, field.name, values)
+
+    def _find(self, keys):
+        """Объекты по значениям bulk_key и ошибки для ненайденных."""
+        key = self.get_bulk_key()
+        field = self.get_queryset().model._meta.get_field(key)
+        values = []
+        for value in keys:
+            try:
+                values.append(
+                    None if isinstance(value, (dict, list))
+                    else field.to_python(value)
+                )
+            except DjangoValidationError:
+                values.append(None)
+        found = self.get_queryset().in_bulk(
+            {value for value in values if value is not None},
+            field_name=key
+        )
+        objects = [found.get(value) for value in values]
+        counts = {}
+        for value in values:
+            counts[value] = counts.get(value, 0) + 1
+        errors = [
+            {'status': 404, 'errors': {key: ['Объект не найден.']}}
+            if obj is None else
+            {'status': 400, 'errors': {key: ['Объект указан дважды.']}}
+            if counts[value] > 1 else None
+            for obj, value in zip(objects, values)
+        ]
+        return objects, errors
+
+    def bulk_update(self, items):
+        key = self.get_bulk_key()
+        objects, errors = self._find([
+            item.get(key) if isinstance(item, dict) else None
+            for item in items
+        ])
+        self.preloaded = self.preload(items)
+        serializers = []
+        for index, (obj, item) in enumerate(zip(objects, items)):
+            if errors[index] is not None:
+                continue
+            serializer = self.get_serializer(obj, data=item, partial=True)
+            # Значение bulk_key совпадает с текущим: проверять его
+            # уникальность не нужно.
+            if key in serializer.fields:
+                _without_unique_validators(serializer.fields[key])
+            if serializer.is_valid():
+                serializers.append(serializer)
+            else:
+                errors[index] = {'status': 400, 'errors': serializer.errors}
+        if any(errors):
+            return [
+                error or NOT_APPLIED for error in errors
+            ], status.HTTP_400_BAD_REQUEST
+        self.perform_bulk_update(serializers)
+        return [
+            {'status': 200, 'data': data}
+            for data in self.get_serializer(objects, many=True).data
+        ], status.HTTP_200_OK
+
+    def perform_bulk_update(self, serializers):
+        model = self.get_queryset().model
+        names = {field.name for field in model._meta.many_to_many}
+        many_to_many = {}
+        fields = set()
+        now = timezone.now()
+        objects, related = [], []
+        for serializer in serializers:
+            obj = serializer.instance
+            values = {}
+            for name, value in serializer.validated_data.items():
+                if name in names:
+                    values[name] = value
+                    many_to_many[name] = model._meta.get_field(name)
+                else:
+                    setattr(obj, name, value)
+                    fields.add(name)
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    setattr(obj, field.attname, now)
+                    fields.add(field.name)
+            objects.append(obj)
+            related.append(values)
+        if fields:
+            model.objects.bulk_update(objects, fields)
+        self._set_many_to_many(objects, related, many_to_many.values())
+        self.bulk_changed(objects, created=False)
+
+    def bulk_destroy(self, keys):
+        objects, errors = self._find(keys)
+        if any(errors):
+            return [
+                error or NOT_APPLIED for error in errors
+            ], status.HTTP_400_BAD_REQUEST
+        self.perform_bulk_destroy(objects)
+        return [{'status': 204} for _ in objects], status.HTTP_200_OK
+
+    def perform_bulk_destroy(self, objects):
+        # Удаление через QuerySet отправляет сигналы удаления каждого
+        # объекта, поэтому кэш, рейтинги и поиск обновляются как обычно.
+        self.get_queryset().model.objects.filter(
+            pk__in=[obj.pk for obj in objects]
+        ).delete()
+
+
+class SoftDeleteMixin:
+    """Удаление помечает объект (модель SoftDeleteModel) удаленным при
+    settings.SOFT_DELETE; зависимые строки удаляет purge_deleted."""
+
+    def perform_destroy(self, instance):
+        if not settings.SOFT_DELETE:
+            super().perform_destroy(instance)
+            return
+        instance.soft_delete()
+
+    def perform_bulk_destroy(self, objects):
+        if not settings.SOFT_DELETE:
+            super().perform_bulk_destroy(objects)
+            return
+        self.get_queryset().model.objects.filter(
+            pk__in=[obj.pk for obj in objects]
+        ).soft_delete()
@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Пагинация по ключу сортировки представления (cursor_ordering)."""
+    page_size_query_param = 'limit'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return view.cursor_ordering
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с переходом на курсоры по запросу клиента.
+
+    Курсорный режим включается параметром pagination=cursor (первая
+    страница) или cursor=<...> (ссылки next/previous) и доступен только
+    представлениям с атрибутом cursor_ordering.
+    """
+    max_limit = settings.API_MAX_PAGE_SIZE
+    mode_query_param = 'pagination'
+    cursor_paginator = None
+
+    def use_cursor(self, request, view):
+        if getattr(view, 'cursor_ordering', None) is None:
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.cursor_paginator = KeysetPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
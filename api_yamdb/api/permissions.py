@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -29,7 +30,18 @@ class IsAuthorOrModeratorOrAdminOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderator
         )
+
+
+class IsMetricsScraper(permissions.BasePermission):
+    """Разрешение для сборщика метрик с доверенного адреса или
+    Admin-пользователя. """
+    def has_permission(self, request, view):
+        return (
+            request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            or request.user.is_authenticated
+            and (request.user.is_superuser or request.user.is_admin)
+        )
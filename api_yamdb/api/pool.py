@@ -0,0 +1,169 @@
+import collections
+import os
+import threading
+import time
+
+from .metrics import Counter, Gauge, Histogram
+
+DEFAULT_POOL = {
+    'SIZE': 5,
+    'MAX_OVERFLOW': 10,
+    'TIMEOUT': 10.0,
+    'RECYCLE': 1800,
+    'PING_INTERVAL': 30.0,
+}
+
+pool_wait = Histogram(
+    'yamdb_db_pool_wait_seconds',
+    'Ожидание соединения из пула.',
+    ('alias',),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+pool_timeouts = Counter(
+    'yamdb_db_pool_timeouts_total',
+    'Запросы соединения, не дождавшиеся свободного места в пуле.',
+    ('alias',)
+)
+pool_discarded = Counter(
+    'yamdb_db_pool_discarded_total',
+    'Соединения, закрытые пулом вместо повторного использования.',
+    ('alias', 'reason')
+)
+pool_connections = Gauge(
+    'yamdb_db_pool_connections',
+    'Соединения пула по состоянию.',
+    ('alias', 'state')
+)
+
+
+class PoolTimeoutError(Exception):
+    """Свободное соединение не появилось за отведенное время."""
+
+
+class ConnectionPool:
+    """Пул соединений процесса с ограничением размера.
+
+    Постоянно держится не больше size свободных соединений, еще
+    max_overflow открываются при пиковой нагрузке и закрываются при
+    возврате. Когда открыто size + max_overflow соединений, запрос ждет
+    возврата не дольше timeout секунд. Соединение старше recycle секунд
+    закрывается при возврате; простоявшее дольше ping_interval секунд
+    перед выдачей проверяется функцией ping и при ошибке заменяется.
+    """
+
+    def __init__(self, alias, size, max_overflow, timeout, recycle,
+                 ping_interval, ping, close):
+        self.alias = alias
+        self.size = size
+        self.limit = size + max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.ping = ping
+        self.close = close
+        # Последним возвращенное соединение выдается первым: лишние
+        # простаивают и закрываются по recycle.
+        self._idle = collections.deque()
+        self._created = {}
+        self._opened = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, connect):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._condition:
+            while not self._idle and self._opened >= self.limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    pool_timeouts.inc(alias=self.alias)
+                    raise PoolTimeoutError(
+                        f'Нет свободного соединения с базой {self.alias} '
+                        f'за {self.timeout} с ({self.limit} открыто)'
+                    )
+                self._condition.wait(remaining)
+            if self._idle:
+                connection, released = self._idle.pop()
+            else:
+                connection = None
+                self._opened += 1
+            self._update_gauges()
+        pool_wait.observe(time.monotonic() - started, alias=self.alias)
+        if connection is not None:
+            if self._healthy(connection, released):
+                return connection
+            self._discard(connection, 'unhealthy')
+        return self._open(connect)
+
+    def release(self, connection, reusable=True):
+        """Возврат соединения; reusable=False — соединение испорчено."""
+        age = time.monotonic() - self._created.get(id(connection), 0)
+        recycled = age >= self.recycle
+        with self._condition:
+            if reusable and not recycled and len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                reason = None
+            else:
+                self._opened -= 1
+                reason = (
+                    'broken' if not reusable
+                    else 'recycled' if recycled else 'overflow'
+                )
+            self._update_gauges()
+            self._condition.notify()
+        if reason is not None:
+            self._discard(connection, reason)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._opened -= 1
+                self._update_gauges()
+                self._condition.notify()
+            raise
+        self._created[id(connection)] = time.monotonic()
+        return connection
+
+    def _healthy(self, connection, released):
+        if time.monotonic() - released < self.ping_interval:
+            return True
+        return self.ping(connection)
+
+    def _discard(self, connection, reason):
+        self._created.pop(id(connection), None)
+        pool_discarded.inc(alias=self.alias, reason=reason)
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _update_gauges(self):
+        idle = len(self._idle)
+        pool_connections.set(idle, alias=self.alias, state='idle')
+        pool_connections.set(
+            self._opened - idle, alias=self.alias, state='in_use'
+        )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, ping, close):
+    """Пул процесса для базы alias; после fork создается заново."""
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            options = dict(DEFAULT_POOL, **settings_dict.get('POOL', {}))
+            _pools[key] = ConnectionPool(
+                alias,
+                size=options['SIZE'],
+                max_overflow=options['MAX_OVERFLOW'],
+                timeout=options['TIMEOUT'],
+                recycle=options['RECYCLE'],
+                ping_interval=options['PING_INTERVAL'],
+                ping=ping,
+                close=close,
+            )
+        return _pools[key]
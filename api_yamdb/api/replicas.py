@@ -0,0 +1,93 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import Counter
+
+PINNED_KEY = 'api:replica:pinned:{}'
+
+replica_reads = Counter(
+    'yamdb_replica_requests_total',
+    'Безопасные запросы по базе, с которой они читали.',
+    ('database',)
+)
+
+_state = threading.local()
+
+
+def replica_alias():
+    """Реплика, с которой читает текущий запрос, или None."""
+    return getattr(_state, 'alias', None)
+
+
+def use_replica(user):
+    """Чтение с реплики до конца запроса, если пользователь недавно
+    ничего не записывал."""
+    if not settings.DATABASE_REPLICAS:
+        return
+    if user.is_authenticated and cache.get(PINNED_KEY.format(user.pk)):
+        replica_reads.inc(database=DEFAULT_DB_ALIAS)
+        return
+    _state.alias = random.choice(settings.DATABASE_REPLICAS)
+    replica_reads.inc(database=_state.alias)
+
+
+def pin(user):
+    if user is not None and user.is_authenticated:
+        cache.set(PINNED_KEY.format(user.pk), 1, settings.REPLICA_LAG_WINDOW)
+
+
+def reset():
+    _state.alias = None
+    _state.wrote = False
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной для запроса, запись — в основную базу.
+
+    После первой записи, а также внутри транзакции основной базы запрос
+    до конца читает с основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _state.alias = None
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Сбрасывает выбор реплики между запросами.
+
+    Пользователь, изменивший данные, REPLICA_LAG_WINDOW секунд читает с
+    основной базы, чтобы увидеть свои изменения несмотря на отставание
+    реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset()
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and _state.wrote:
+                pin(getattr(request, 'user', None))
+        finally:
+            reset()
+        return response
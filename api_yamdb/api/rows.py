@@ -0,0 +1,139 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import SlugRelatedField
+
+from .instrumentation import current_stats
+
+
+def _converter(field):
+    # CharField.to_representation — str(value), для строк из базы лишний.
+    if isinstance(field, serializers.CharField):
+        return None
+    return field.to_representation
+
+
+def _value(key, convert):
+    if convert is None:
+        return lambda row, related: row[key]
+
+    def get(row, related):
+        value = row[key]
+        return None if value is None else convert(value)
+    return get
+
+
+def _nested(key, getters):
+    def get(row, related):
+        if row[key] is None:
+            return None
+        return {name: getter(row, related) for name, getter in getters}
+    return get
+
+
+def _many(name, key):
+    return lambda row, related: related[name].get(row[key], [])
+
+
+class RowSerializer:
+    """Сериализация строк .values() по описанию сериализатора DRF.
+
+    Пути для values() и функции получения значений полей вычисляются
+    один раз, так что результат совпадает с to_representation
+    сериализатора, но без создания объектов модели и обхода полей DRF.
+    Поддерживаются поля модели, SlugRelatedField, вложенный сериализатор
+    связи ForeignKey и вложенный many=True по ManyToManyField (один
+    дополнительный запрос на страницу).
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.paths = [self.pk]
+        self.many = []
+        self.getters = [
+            (name, self._compile(field))
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+
+    def _compile(self, field, prefix=''):
+        source = prefix + field.source
+        if isinstance(field, serializers.ListSerializer):
+            if prefix:
+                raise ImproperlyConfigured(
+                    f'Вложенный many=True внутри связи: {source}'
+                )
+            self.many.append((field.field_name, field))
+            return _many(field.field_name, self.pk)
+        if isinstance(field, serializers.Serializer):
+            self._add_path(source)
+            return _nested(source, [
+                (name, self._compile(child, f'{source}__'))
+                for name, child in field.fields.items()
+                if not child.write_only
+            ])
+        if isinstance(field, SlugRelatedField):
+            source = f'{source}__{field.slug_field}'
+            self._add_path(source)
+            return _value(source, None)
+        if isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(
+                f'Неподдерживаемое поле {field.__class__.__name__}: {source}'
+            )
+        self._add_path(source)
+        return _value(source, _converter(field))
+
+    def _add_path(self, path):
+        if path not in self.paths:
+            self.paths.append(path)
+
+    def _load_many(self, field, pks):
+        """Значения many=True для всех строк страницы одним запросом."""
+        relation = self.model._meta.get_field(field.source)
+        children = [
+            (name, child.source, _converter(child))
+            for name, child in field.child.fields.items()
+            if not child.write_only
+        ]
+        # Та же форма запроса, что у prefetch_related: порядок совпадает.
+        rows = relation.related_model.objects.filter(**{
+            f'{relation.related_query_name()}__in': pks
+        }).values_list(
+            relation.related_query_name(),
+            *(source for _, source, _ in children)
+        )
+        values = {}
+        for owner, *row in rows:
+            values.setdefault(owner, []).append({
+                name: value if value is None or convert is None
+                else convert(value)
+                for (name, _, convert), value in zip(children, row)
+            })
+        return values
+
+    def values(self, queryset, *extra):
+        """Строки для serialize; extra — дополнительные поля строк."""
+        return queryset.prefetch_related(None).values(*self.paths, *(
+            path for path in extra if path not in self.paths
+        ))
+
+    def serialize(self, rows):
+        rows = list(rows)
+        pks = [row[self.pk] for row in rows]
+        related = {
+            name: self._load_many(field, pks) if pks else {}
+            for name, field in self.many
+        }
+        stats = current_stats()
+        started = time.perf_counter()
+        try:
+            return [
+                {name: get(row, related) for name, get in self.getters}
+                for row in rows
+            ]
+        finally:
+            if stats is not None:
+                stats.serializer_time += time.perf_counter() - started
@@ -0,0 +1,178 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Substr
+from reviews.models import Review, Title
+
+SEARCH_CONFIG = 'russian'
+SNIPPET_LENGTH = 200
+
+# Веса полей соответствуют весам A, B, C триггеров PostgreSQL.
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+REVIEW_WEIGHT = 0.2
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class PostgresSearchBackend:
+    """Полнотекстовый поиск по колонкам search_vector (GIN-индексы)."""
+
+    def search(self, text):
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        titles = Title.objects.filter(search_vector=query).annotate(
+            type=Value('title', CharField()),
+            parent=F('id'),
+            snippet=Substr('name', 1, SNIPPET_LENGTH),
+            rank=SearchRank(F('search_vector'), query),
+        ).values('id', 'type', 'parent', 'snippet', 'rank')
+        reviews = Review.objects.filter(
+            search_vector=query,
+            title__deleted_at__isnull=True,
+            author__deleted_at__isnull=True,
+        ).annotate(
+            type=Value('review', CharField()),
+            parent=F('title_id'),
+            snippet=Substr('text', 1, SNIPPET_LENGTH),
+            rank=SearchRank(F('search_vector'), query),
+        ).values('id', 'type', 'parent', 'snippet', 'rank')
+        return titles.union(reviews, all=True).order_by(
+            '-rank', 'type', 'id'
+        )
+
+    # Векторы обновляют триггеры базы данных (миграция 0007).
+    def index_title(self, title):
+        pass
+
+    def index_review(self, review):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+
+class InMemorySearchBackend:
+    """Инвертированный индекс в памяти процесса для баз без
+    полнотекстового поиска (SQLite в тестах).
+
+    Индекс строится при первом поиске и затем обновляется сигналами
+    отзывов и произведений. Все слова запроса должны встретиться в
+    документе; релевантность — сумма tf-idf с весами полей.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._postings = defaultdict(dict)
+        self._documents = {}
+
+    def _add(self, key, parent, snippet, weighted_texts):
+        self._remove(key)
+        weights = defaultdict(float)
+        for text, weight in weighted_texts:
+            for token in tokenize(text):
+                weights[token] += weight
+        for token, weight in weights.items():
+            self._postings[token][key] = weight
+        self._documents[key] = (parent, snippet[:SNIPPET_LENGTH], weights)
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for token in document[2]:
+            postings = self._postings[token]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+
+    def _load(self):
+        titles = Title.objects.values_list('id', 'name', 'description')
+        for pk, name, description in titles.iterator():
+            self._add_title(pk, name, description)
+        reviews = Review.objects.filter(
+            title__deleted_at__isnull=True, author__deleted_at__isnull=True
+        ).values_list('id', 'title_id', 'text')
+        for pk, title_id, text in reviews.iterator():
+            self._add_review(pk, title_id, text)
+        self._loaded = True
+
+    def _add_title(self, pk, name, description):
+        self._add(('title', pk), pk, name, (
+            (name, NAME_WEIGHT), (description, DESCRIPTION_WEIGHT),
+        ))
+
+    def _add_review(self, pk, title_id, text):
+        self._add(('review', pk), title_id, text, (
+            (text, REVIEW_WEIGHT),
+        ))
+
+    def search(self, text):
+        tokens = set(tokenize(text))
+        if not tokens:
+            return []
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            postings = [self._postings.get(token, {}) for token in tokens]
+            if not all(postings):
+                return []
+            total = len(self._documents)
+            keys = set.intersection(*(set(posting) for posting in postings))
+            results = []
+            for kind, pk in keys:
+                rank = sum(
+                    posting[(kind, pk)] * math.log(1 + total / len(posting))
+                    for posting in postings
+                )
+                parent, snippet, _ = self._documents[(kind, pk)]
+                results.append({
+                    'id': pk,
+                    'type': kind,
+                    'parent': parent,
+                    'snippet': snippet,
+                    'rank': rank,
+                })
+        results.sort(
+            key=lambda item: (-item['rank'], item['type'], item['id'])
+        )
+        return results
+
+    def index_title(self, title):
+        with self._lock:
+            if self._loaded:
+                self._add_title(title.pk, title.name, title.description)
+
+    def index_review(self, review):
+        with self._lock:
+            if self._loaded:
+                self._add_review(review.pk, review.title_id, review.text)
+
+    def remove(self, kind, pk):
+        """Удаление документа; у произведения — вместе с отзывами."""
+        with self._lock:
+            self._remove((kind, pk))
+            if kind == 'title':
+                for key in [
+                    key for key, (parent, _, _) in self._documents.items()
+                    if key[0] == 'review' and parent == pk
+                ]:
+                    self._remove(key)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Поисковый движок, подходящий для текущей базы данных."""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return InMemorySearchBackend()
@@ -1,24 +1,38 @@
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (
+    Category,
+    Comment,
+    FeedEvent,
+    Genre,
+    Review,
+    Title,
+)
 from users.models import User
 
+from .instrumentation import TimedSerializerMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Базовый сериализатор моделей с учетом времени в метриках."""
+
+
+class CategorySerializer(TimedModelSerializer):
     """Сериализатор для категорий."""
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     """Сериализатор для жанров."""
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class ReadOnlyTitleSerializer(serializers.ModelSerializer):
+class ReadOnlyTitleSerializer(TimedModelSerializer):
     """Сериализатор для произведений (только для чтения)"""
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
@@ -26,17 +40,37 @@ class ReadOnlyTitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'category', 'genre', 'rating', 'name', 'year', 'description',
+        )
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class PreloadedSlugRelatedField(SlugRelatedField):
+    """Связь по slug; при пакетной записи объекты берутся из словаря
+    context['preloaded'][модель], загруженного одним запросом."""
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded')
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        try:
+            return preloaded[self.queryset.model][str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=str(data)
+            )
+
+
+class TitleSerializer(TimedModelSerializer):
     """Сериализатор для произведений (для записи)."""
-    category = serializers.SlugRelatedField(
+    category = PreloadedSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
 
     )
-    genre = serializers.SlugRelatedField(
+    genre = PreloadedSlugRelatedField(
         slug_field='slug',
         queryset=Genre.objects.all(),
         many=True
@@ -44,10 +78,10 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'category', 'genre', 'name', 'year', 'description',)
 
 
-class ReviewUpdateSerializer(serializers.ModelSerializer):
+class ReviewUpdateSerializer(TimedModelSerializer):
     """Сериализатор для отзывов (только для редактирования)."""
     author = SlugRelatedField(
         slug_field='username',
@@ -63,12 +97,10 @@ class ReviewUpdateSerializer(serializers.ModelSerializer):
 class ReviewSerializer(ReviewUpdateSerializer):
     """Сериализатор для отзывов (кроме редактирования)."""
     def validate(self, data):
-        request = self.context['request']
-        author_id = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(
-            author=author_id, title=title_id
-        ).exists():
+        if (
+            self.instance is None
+            and self.context['view'].get_parent().has_own_review
+        ):
             raise serializers.ValidationError(
                 'Каждый пользователь может оставить только один отзыв '
                 'к произведению'
@@ -76,7 +108,7 @@ class ReviewSerializer(ReviewUpdateSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedModelSerializer):
     """Сериализатор для комментариев."""
     author = SlugRelatedField(
         slug_field='username',
@@ -89,7 +121,70 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date',)
 
 
-class SendCodeSerializer(serializers.ModelSerializer):
+class SearchResultSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Сериализатор для результатов полнотекстового поиска."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField(source='parent')
+    text = serializers.CharField(source='snippet')
+    rank = serializers.FloatField()
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    """Параметры запроса лучших произведений."""
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    year = serializers.IntegerField(required=False)
+    min_reviews = serializers.IntegerField(min_value=1, default=1)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.API_MAX_PAGE_SIZE, default=10
+    )
+
+    def validate(self, data):
+        if len({'category', 'genre', 'year'} & set(data)) > 1:
+            raise serializers.ValidationError(
+                'Укажите не больше одного из параметров category, genre, '
+                'year.'
+            )
+        return data
+
+
+class FeedEventSerializer(TimedModelSerializer):
+    """Сериализатор для событий ленты."""
+    author = SlugRelatedField(slug_field='username', read_only=True)
+    text = serializers.SerializerMethodField()
+    pub_date = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FeedEvent
+        fields = (
+            'id', 'kind', 'title', 'review', 'comment', 'author', 'text',
+            'pub_date',
+        )
+
+    def _source(self, event):
+        return event.comment or event.review
+
+    def get_text(self, event):
+        return self._source(event).text
+
+    def get_pub_date(self, event):
+        return serializers.DateTimeField().to_representation(
+            self._source(event).pub_date
+        )
+
+
+class FeedQuerySerializer(serializers.Serializer):
+    """Параметры запроса ленты."""
+    before = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.API_MAX_PAGE_SIZE,
+        default=settings.REST_FRAMEWORK['PAGE_SIZE']
+    )
+
+
+class SendCodeSerializer(TimedModelSerializer):
     """Сериализатор для регистрации."""
     class Meta:
         model = User
@@ -102,8 +197,14 @@ class CheckConfirmationCodeSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
-    """Сериализатор для пользователей."""
+class UserSerializer(TimedModelSerializer):
+    """Сериализатор для пользователей. Счетчики активности выводятся
+    только с параметром запроса stats=true."""
+    stats_fields = (
+        'reviews_count', 'comments_count', 'average_score', 'last_activity',
+    )
+    average_score = serializers.FloatField(read_only=True)
+
     class Meta:
         model = User
         fields = (
@@ -113,4 +214,17 @@ class UserSerializer(serializers.ModelSerializer):
             'bio',
             'email',
             'role',
+            'reviews_count',
+            'comments_count',
+            'average_score',
+            'last_activity',
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.query_params.get(
+            'stats'
+        ) not in ('1', 'true'):
+            for name in self.stats_fields:
+                self.fields.pop(name)
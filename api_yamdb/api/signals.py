@@ -0,0 +1,149 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import titles_changed
+from users.models import User
+from users.soft_delete import soft_deleted
+
+from .cache import (
+    bump_versions_on_commit,
+    object_version_name,
+    top_version_name,
+)
+from .feed import enqueue_comment, enqueue_review
+from .filter_index import title_filter_index
+from .search import get_search_backend
+
+
+def invalidate_titles(title_ids):
+    """Сбрасывает списки и ответы по произведениям; None — по всем."""
+    if title_ids is None:
+        bump_versions_on_commit('title', object_version_name('title', '*'))
+        return
+    bump_versions_on_commit('title', *(
+        object_version_name('title', pk) for pk in title_ids
+    ))
+
+
+@receiver((post_save, post_delete), sender=Category)
+def category_changed(sender, **kwargs):
+    """Категории входят в ответы категорий и произведений."""
+    bump_versions_on_commit('category')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def genre_changed(sender, **kwargs):
+    """Жанры входят в ответы жанров и произведений."""
+    bump_versions_on_commit('genre')
+
+
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Genre)
+def filter_values_changed(sender, created=False, **kwargs):
+    """Новая категория или жанр еще не связаны с произведениями; при
+    изменении slug и удалении индекс фильтров загружается заново."""
+    if not created:
+        title_filter_index.invalidate_on_commit()
+
+
+@receiver((post_save, post_delete), sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate_titles((instance.pk,))
+    title_filter_index.refresh_on_commit((instance.pk,))
+
+
+@receiver(soft_deleted, sender=Title)
+def title_soft_deleted(sender, pks, **kwargs):
+    invalidate_titles(pks)
+    title_filter_index.refresh_on_commit(pks)
+    backend = get_search_backend()
+    for pk in pks:
+        backend.remove('title', pk)
+
+
+@receiver(soft_deleted, sender=User)
+def user_reviews_unindexed(sender, pks, **kwargs):
+    backend = get_search_backend()
+    for pk in Review.objects.filter(
+        author_id__in=pks
+    ).values_list('pk', flat=True).iterator():
+        backend.remove('review', pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_titles((instance.pk,))
+        title_filter_index.refresh_on_commit((instance.pk,))
+    else:
+        invalidate_titles(pk_set)
+        if pk_set is None:
+            title_filter_index.invalidate_on_commit()
+        else:
+            title_filter_index.refresh_on_commit(pk_set)
+
+
+def invalidate_ratings(title_ids):
+    """Сбрасывает ответы по произведениям и страницы лучших в их
+    категориях, жанрах и годах. Списки произведений не сбрасываются:
+    рейтинг в них обновляется по истечении срока хранения
+    (API_TITLE_LIST_CACHE_TIMEOUT)."""
+    names = {top_version_name()}
+    scopes = Title.all_objects.filter(pk__in=title_ids).values_list(
+        'year', 'category__slug', 'genre__slug'
+    )
+    for year, category, genre in scopes:
+        names.add(top_version_name('year', year))
+        if category is not None:
+            names.add(top_version_name('category', category))
+        if genre is not None:
+            names.add(top_version_name('genre', genre))
+    bump_versions_on_commit(*names, *(
+        object_version_name('title', pk) for pk in title_ids
+    ))
+
+
+@receiver(titles_changed)
+def titles_data_changed(sender, title_ids, **kwargs):
+    if title_ids is None:
+        invalidate_titles(None)
+    else:
+        invalidate_ratings(title_ids)
+
+
+@receiver(post_save, sender=Title)
+def title_indexed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_title(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_indexed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_review(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_unindexed(sender, instance, **kwargs):
+    get_search_backend().remove('title', instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def review_unindexed(sender, instance, **kwargs):
+    get_search_backend().remove('review', instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def review_to_feeds(sender, instance, created, raw=False, **kwargs):
+    """Новый отзыв ставится в очередь рассылки по лентам подписчиков."""
+    if created and not raw:
+        enqueue_review(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_to_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.title_id is not None:
+        enqueue_comment(instance)
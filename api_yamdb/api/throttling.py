@@ -0,0 +1,101 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import Counter
+
+THROTTLE_KEY = 'api:throttle:{}:{}:{}'
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+throttled_requests = Counter(
+    'yamdb_throttled_requests_total',
+    'Запросы, отклоненные ограничением частоты.',
+    ('rule',)
+)
+
+
+def parse_rate(rate):
+    """'5/hour' -> (5, 3600), как в DRF."""
+    number, period = rate.split('/')
+    return int(number), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Ограничение частоты скользящим окном по двум счетчикам.
+
+    Счетчики текущего и предыдущего окна увеличиваются атомарно через
+    cache.incr; число запросов за последние duration секунд оценивается
+    как текущий счетчик плюс доля предыдущего. Правило называется
+    '<scope>.<kind>', частота берется из settings.API_THROTTLE_RATES;
+    правило без частоты не ограничивает. Запросы считаются по полю kind
+    тела запроса, если get_ident_value не переопределен.
+    """
+    scope = None
+    kind = None
+
+    @property
+    def rule(self):
+        return f'{self.scope}.{self.kind}'
+
+    def get_ident_value(self, request):
+        """Значение, по которому считаются запросы; None — не считать."""
+        data = request.data
+        return data.get(self.kind) if hasattr(data, 'get') else None
+
+    def allow_request(self, request, view):
+        rate = settings.API_THROTTLE_RATES.get(self.rule)
+        if rate is None:
+            return True
+        value = self.get_ident_value(request)
+        if not value:
+            return True
+        limit, duration = parse_rate(rate)
+        ident = hashlib.md5(str(value).lower().encode()).hexdigest()
+        now = time.time()
+        window = int(now // duration)
+        key = THROTTLE_KEY.format(self.rule, ident, window)
+        cache.add(key, 0, timeout=duration * 2)
+        current = cache.incr(key)
+        previous = cache.get(
+            THROTTLE_KEY.format(self.rule, ident, window - 1), 0
+        )
+        elapsed = now - window * duration
+        self.wait_seconds = duration - elapsed
+        if current + previous * (1 - elapsed / duration) <= limit:
+            return True
+        throttled_requests.inc(rule=self.rule)
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(SlidingWindowThrottle):
+    kind = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(SlidingWindowThrottle):
+    kind = 'username'
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    kind = 'email'
+
+
+def scoped_throttles(scope, *throttles):
+    """Классы ограничений для одного эндпоинта, например
+    scoped_throttles('signup', IPThrottle, EmailThrottle)."""
+    return tuple(
+        type(
+            f'{scope.capitalize()}{throttle.__name__}',
+            (throttle,),
+            {'scope': scope}
+        )
+        for throttle in throttles
+    )
@@ -6,9 +6,12 @@ from .views import (
     CommentViewSet,
     GenreViewSet,
     ReviewViewSet,
+    SearchViewSet,
     TitleViewSet,
     UserViewSet,
+    export,
     get_jwt_token,
+    metrics,
     sign_up,
 )
 
@@ -20,6 +23,7 @@ router_v1.register(
     r'categories', CategoryViewSet, basename='categories'
 )
 router_v1.register(r'genres', GenreViewSet, basename='genres')
+router_v1.register(r'search', SearchViewSet, basename='search')
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -34,5 +38,7 @@ router_v1.register(
 urlpatterns = [
     path('v1/auth/signup/', sign_up, name='sign_up'),
     path('v1/auth/token/', get_jwt_token, name='send_conf_code'),
+    path('v1/_metrics', metrics, name='metrics'),
+    path('v1/export/<str:kind>/', export, name='export'),
     path('v1/', include(router_v1.urls)),
 ]
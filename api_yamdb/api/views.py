@@ -1,39 +1,89 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+    throttle_classes,
+)
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from rest_framework.utils.urls import replace_query_param
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.rankings import (
+    ALL_SCOPE,
+    category_scope,
+    genre_scope,
+    refresh_rankings,
+    top_titles,
+    year_scope,
+)
 from users.models import User
+from users.tokens import RoleAccessToken, as_user
 
+from .cache import top_version_name
+from .export import EXPORTS, RENDERERS, export_rows
+from .feed import follow_title, read_feed, unfollow_title
+from .filter_index import title_filter_index
 from .filters import FilterForTitle
-from .mixins import CLDViewSet
+from .mail import enqueue_mail
+from .metrics import render_metrics
+from .mixins import (
+    BulkWriteMixin,
+    CachedReadMixin,
+    CLDViewSet,
+    ConditionalReadMixin,
+    NestedResourceMixin,
+    ReplicaReadMixin,
+    RowReadMixin,
+    SoftDeleteMixin,
+)
 from .permissions import (
     IsAdminOrReadOnly,
     IsAuthorOrModeratorOrAdminOrReadOnly,
+    IsMetricsScraper,
     IsSuperUserOrAdmin,
 )
+from .rows import RowSerializer
+from .search import get_search_backend
 from .serializers import (
     CategorySerializer,
     CheckConfirmationCodeSerializer,
     CommentSerializer,
+    FeedEventSerializer,
+    FeedQuerySerializer,
     GenreSerializer,
     ReadOnlyTitleSerializer,
     ReviewSerializer,
     ReviewUpdateSerializer,
+    SearchResultSerializer,
     SendCodeSerializer,
     TitleSerializer,
+    TopTitlesQuerySerializer,
     UserSerializer,
 )
+from .signals import invalidate_titles
+from .throttling import (
+    EmailThrottle,
+    IPThrottle,
+    UsernameThrottle,
+    scoped_throttles,
+)
 
 
-class CategoryViewSet(CLDViewSet):
+class CategoryViewSet(
+    ReplicaReadMixin, CachedReadMixin, BulkWriteMixin, CLDViewSet
+):
     """Представление для категорий."""
+    cache_model = 'category'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -42,8 +92,11 @@ class CategoryViewSet(CLDViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CLDViewSet):
+class GenreViewSet(
+    ReplicaReadMixin, CachedReadMixin, BulkWriteMixin, CLDViewSet
+):
     """Представление для жанров."""
+    cache_model = 'genre'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -52,23 +105,136 @@ class GenreViewSet(CLDViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ReplicaReadMixin,
+    CachedReadMixin,
+    RowReadMixin,
+    ConditionalReadMixin,
+    SoftDeleteMixin,
+    BulkWriteMixin,
+    viewsets.ModelViewSet
+):
     """Представление для произведений."""
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    )
+    row_serializer = RowSerializer(ReadOnlyTitleSerializer)
+    cache_model = 'title'
+    cache_related = ('category', 'genre')
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').defer('search_vector').order_by('id')
+    cursor_ordering = ('id',)
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FilterForTitle
+    bulk_key = 'id'
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'top'):
             return ReadOnlyTitleSerializer
         return TitleSerializer
 
+    def get_cache_version_names(self):
+        if self.action != 'top':
+            return super().get_cache_version_names()
+        params = self.request.query_params
+        if 'category' in params:
+            scope = top_version_name('category', params['category'])
+        elif 'genre' in params:
+            scope = top_version_name('genre', params['genre'])
+        elif 'year' in params:
+            year = params['year'].strip()
+            scope = top_version_name(
+                'year', int(year) if year.isdigit() else year
+            )
+        else:
+            scope = top_version_name()
+        return (self.cache_model, scope) + self.cache_related
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_cache_timeout(self):
+        if self.action == 'list':
+            return min(
+                settings.API_CACHE_TIMEOUT,
+                settings.API_TITLE_LIST_CACHE_TIMEOUT
+            )
+        return super().get_cache_timeout()
+
+    def bulk_changed(self, objects, created):
+        ids = [obj.pk for obj in objects]
+        invalidate_titles(ids)
+        title_filter_index.refresh_on_commit(ids)
+        # У новых произведений нет отзывов, и в рейтинги они не входят.
+        if not created:
+            refresh_rankings(ids)
+        backend = get_search_backend()
+        for obj in objects:
+            backend.index_title(obj)
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по рейтингу: среди всех, в категории,
+        жанре или году выпуска."""
+        return self.cached_response(self.top_titles, request)
+
+    def top_titles(self, request):
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        if 'category' in data:
+            scope = category_scope(get_object_or_404(
+                Category.objects.only('pk'), slug=data['category']
+            ).pk)
+        elif 'genre' in data:
+            scope = genre_scope(get_object_or_404(
+                Genre.objects.only('pk'), slug=data['genre']
+            ).pk)
+        elif 'year' in data:
+            scope = year_scope(data['year'])
+        else:
+            scope = ALL_SCOPE
+        ids = top_titles(scope, data['limit'], data['min_reviews'])
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
+
+    @action(
+        methods=('post', 'delete',),
+        detail=True,
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def follow(self, request, pk=None):
+        """Подписка на новые отзывы и комментарии к произведению."""
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        if request.method == 'DELETE':
+            unfollow_title(request.user.pk, title.pk)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        created = follow_title(request.user.pk, title.pk)
+        return Response(
+            {'title': title.pk},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class ReviewViewSet(
+    ReplicaReadMixin,
+    RowReadMixin,
+    ConditionalReadMixin,
+    NestedResourceMixin,
+    viewsets.ModelViewSet
+):
     """Представление для отзывов."""
+    row_serializer = RowSerializer(ReviewSerializer)
+    cursor_ordering = ('pub_date', 'id')
+    # Отзывы удаленных пользователей ждут purge_deleted.
+    nested_queryset = Review.objects.filter(
+        author__deleted_at__isnull=True
+    ).select_related('author').defer('search_vector').order_by(
+        *cursor_ordering
+    )
+    parent_model = Title
+    parent_field = 'title'
+    parent_lookups = {'pk': 'title_id'}
+    parent_conditions = {'deleted_at__isnull': True}
 
     def get_serializer_class(self):
         if self.action == 'partial_update':
@@ -82,39 +248,95 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return (permissions.IsAuthenticated(),)
         return super().get_permissions()
 
-    def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+    def get_parent_queryset(self):
+        titles = Title.objects.only('pk')
+        if self.action != 'create':
+            return titles
+        # Проверка единственности отзыва автора — в том же запросе.
+        return titles.annotate(has_own_review=Exists(Review.objects.filter(
+            title=OuterRef('pk'), author_id=self.request.user.pk
+        )))
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(
+            author=as_user(self.request.user), title=self.get_parent()
+        )
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+
+class CommentViewSet(
+    ReplicaReadMixin,
+    RowReadMixin,
+    ConditionalReadMixin,
+    NestedResourceMixin,
+    viewsets.ModelViewSet
+):
     """Представление для комментариев к отзывам."""
     serializer_class = CommentSerializer
+    row_serializer = RowSerializer(CommentSerializer)
+    cursor_ordering = ('pub_date', 'id')
+    nested_queryset = Comment.objects.filter(
+        author__deleted_at__isnull=True
+    ).select_related('author').order_by(*cursor_ordering)
+    parent_model = Review
+    parent_field = 'review'
+    parent_lookups = {'pk': 'review_id', 'title': 'title_id'}
+    parent_conditions = {
+        'title__deleted_at__isnull': True,
+        'author__deleted_at__isnull': True,
+    }
 
     def get_permissions(self):
         if self.action not in ('list', 'retrieve',):
             return (IsAuthorOrModeratorOrAdminOrReadOnly(),)
         return super().get_permissions()
 
-    def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id', 'title__id')
+    def get_parent_queryset(self):
+        return Review.objects.filter(**self.parent_conditions).only(
+            'pk', 'title_id'
         )
-        return review.comments.all()
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review, pk=self.kwargs.get('review_id', 'title__id')
+        review = self.get_parent()
+        serializer.save(
+            author=as_user(self.request.user),
+            review=review,
+            title_id=review.title_id
         )
-        serializer.save(author=self.request.user, review=review)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """Полнотекстовый поиск по произведениям и отзывам."""
+    serializer_class = SearchResultSerializer
+    filter_backends = ()
+
+    def list(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'Обязательный параметр.'})
+        page = self.paginate_queryset(get_search_backend().search(text))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 @api_view(('POST',))
+@authentication_classes(())
+@throttle_classes(
+    scoped_throttles('signup', IPThrottle, UsernameThrottle, EmailThrottle)
+)
 def sign_up(request):
     """Представление для регистрации."""
     serializer = SendCodeSerializer(data=request.data)
@@ -133,13 +355,15 @@ def sign_up(request):
 
     mail_subject = 'Код подтверждения на Yamdb.ru'
     message = f'Ваш код подтверждения: {confirmation_code}'
-    send_mail(
+    enqueue_mail(
         mail_subject, message, settings.EMAIL_HOST_USER, [email]
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(('POST',))
+@authentication_classes(())
+@throttle_classes(scoped_throttles('token', IPThrottle, UsernameThrottle))
 def get_jwt_token(request):
     """Представление для получения токена."""
     serializer = CheckConfirmationCodeSerializer(data=request.data)
@@ -150,7 +374,7 @@ def get_jwt_token(request):
         User, username=serializer.validated_data['username']
     )
     if default_token_generator.check_token(user, confirmation_code):
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
         return Response(
             {'token': f'{token}'}, status=status.HTTP_200_OK
         )
@@ -159,7 +383,50 @@ def get_jwt_token(request):
     )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+@api_view(('GET',))
+@permission_classes((IsMetricsScraper,))
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@api_view(('GET',))
+@permission_classes((IsSuperUserOrAdmin,))
+def export(request, kind):
+    """Потоковая выгрузка отзывов или комментариев (CSV, NDJSON).
+
+    since_id и since — водяные знаки инкрементальной выгрузки.
+    """
+    if kind not in EXPORTS:
+        raise Http404
+    output = request.query_params.get('output', 'csv')
+    if output not in RENDERERS:
+        raise ValidationError({'output': f'Допустимо: {", ".join(RENDERERS)}'})
+    since_id = request.query_params.get('since_id')
+    if since_id is not None and not since_id.isdigit():
+        raise ValidationError({'since_id': 'Ожидается целое число.'})
+    since = request.query_params.get('since')
+    since_date = parse_datetime(since) if since else None
+    if since and since_date is None:
+        raise ValidationError({'since': 'Ожидается дата в формате ISO 8601.'})
+    render, content_type = RENDERERS[output]
+    response = StreamingHttpResponse(
+        render(kind, export_rows(
+            kind,
+            since_id=int(since_id) if since_id else None,
+            since_date=since_date,
+        )),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{output}"'
+    )
+    return response
+
+
+class UserViewSet(SoftDeleteMixin, viewsets.ModelViewSet):
     """Представление для пользователей."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -176,17 +443,40 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Обработка url users/me/."""
-        user = request.user
+        # request.user восстановлен из токена и содержит не все поля.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = UserSerializer(user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == 'PATCH':
-            serializer = UserSerializer(
+            serializer = self.get_serializer(
                 user, partial=True, data=request.data
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(
                 serializer.data, status=status.HTTP_200_OK
             )
         return None
+
+    @action(
+        detail=False,
+        url_path='me/feed',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def feed(self, request):
+        """Новые отзывы и комментарии к произведениям из подписок,
+        от новых к старым; следующая страница — по ссылке next."""
+        params = FeedQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        events, before = read_feed(
+            request.user.pk,
+            params.validated_data['limit'],
+            params.validated_data.get('before')
+        )
+        return Response({
+            'next': None if before is None else replace_query_param(
+                request.build_absolute_uri(), 'before', before
+            ),
+            'results': FeedEventSerializer(events, many=True).data,
+        })
@@ -0,0 +1,22 @@
+"""
+ASGI config for YaMDb project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with an ASGI server, for example::
+
+    gunicorn api_yamdb.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+django.setup(set_prefix=False)
+
+from api.asgi import ASGIHandler  # noqa: E402
+from api.filter_index import title_filter_index  # noqa: E402
+
+application = ASGIHandler()
+title_filter_index.warm()
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +64,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Потоки ASGI-приложения: общий пул и пул эндпоинтов чтения.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', 16))
+
 
 DATABASES = {
     'default': {
@@ -73,10 +79,90 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Время жизни соединения в секундах; с пулом процесса
+        # (DB_ENGINE=api.backends.postgresql) при 0 соединение
+        # возвращается в пул после каждого запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # Нужно при работе через pgbouncer в режиме transaction.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', 'False'
+        ) == 'True',
+        'POOL': {
+            'SIZE': int(os.getenv('DB_POOL_SIZE', 5)),
+            'MAX_OVERFLOW': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'RECYCLE': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            'PING_INTERVAL': float(os.getenv('DB_POOL_PING_INTERVAL', 30)),
+        },
     }
 }
 
+# Реплики только для чтения через запятую: host[:port], для SQLite —
+# файлы баз. Остальные параметры берутся из основной базы.
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'],
+        **(
+            {'NAME': replica}
+            if DATABASES['default']['ENGINE'].endswith('sqlite3') else
+            dict(zip(('HOST', 'PORT'), replica.split(':')))
+        ),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_LAG_WINDOW = float(os.getenv('DB_REPLICA_LAG_WINDOW', 5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
+    }
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+# Новые отзывы не сбрасывают кэш списков произведений: рейтинг в списках
+# обновляется через столько секунд.
+API_TITLE_LIST_CACHE_TIMEOUT = int(
+    os.getenv('API_TITLE_LIST_CACHE_TIMEOUT', 30)
+)
+
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+# Каталог, через который воркеры gunicorn складывают метрики: /_metrics
+# отдает сумму по всем воркерам. Без него — метрики одного процесса.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+
+SLOW_REQUEST_THRESHOLD = (
+    float(os.getenv('SLOW_REQUEST_THRESHOLD'))
+    if os.getenv('SLOW_REQUEST_THRESHOLD') else None
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,26 +198,83 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'users.User'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
+
+EMAIL_HOST = os.getenv('EMAIL_HOST') or 'localhost'
+
+EMAIL_PORT = int(os.getenv('EMAIL_PORT') or 25)
+
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+
+EMAIL_TIMEOUT = 10
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_HOST_USER = 'mail@yamdb.ru'
 
+# Кэши, данные которых видны только своему процессу.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Права берутся из claims токена, пользователь не загружается из базы.
+# Отзыв токенов хранится в кэше, поэтому по умолчанию режим включен
+# только с общим для воркеров кэшем (проверка api.E001).
+JWT_STATELESS_AUTH = os.getenv(
+    'JWT_STATELESS_AUTH',
+    str(CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS)
+) == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.LimitOffsetPagination',
+        'api.pagination.LimitOffsetOrCursorPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    # Число прокси перед приложением (nginx): адрес клиента для
+    # ограничений берется из X-Forwarded-For с учетом только их записей.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+}
+
+# Частота запросов по правилам '<эндпоинт>.<ip|username|email>'.
+API_THROTTLE_RATES = {
+    'signup.ip': '20/hour',
+    'signup.username': '5/hour',
+    'signup.email': '5/hour',
+    'token.ip': '60/hour',
+    'token.username': '10/hour',
 }
 
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 100))
+
+# Наибольшее число элементов в одном пакетном запросе (.../bulk/).
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', 500))
+
+# Произведения с большим числом подписчиков не рассылаются по лентам
+# при записи: ленты читают их события при чтении.
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10000))
+
+# Удаление произведений и пользователей через API только помечает их;
+# отзывы, комментарии и другие зависимые строки удаляет purge_deleted.
+SOFT_DELETE = os.getenv('SOFT_DELETE', 'True') == 'True'
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'users.tokens.RoleTokenUser',
 }
+
+# Как долго процесс доверяет ответу общего кеша об отзыве токенов.
+JWT_REVOCATION_CHECK_INTERVAL = int(
+    os.getenv('JWT_REVOCATION_CHECK_INTERVAL', 5)
+)
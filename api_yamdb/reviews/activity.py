@@ -0,0 +1,50 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, Now
+from users.models import User
+
+from .models import Comment, Review
+
+
+def update_user_activity(user_id, reviews=0, comments=0, score=0,
+                         active=False):
+    """Атомарно сдвигает счетчики автора одним UPDATE; active — новый
+    отзыв или комментарий, время последней активности обновляется."""
+    if user_id is None:
+        return
+    changes = {}
+    if reviews:
+        changes['reviews_count'] = F('reviews_count') + reviews
+    if comments:
+        changes['comments_count'] = F('comments_count') + comments
+    if score:
+        changes['score_sum'] = F('score_sum') + score
+    if active:
+        changes['last_activity'] = Now()
+    if changes:
+        User.objects.filter(pk=user_id).update(**changes)
+
+
+def _by_author(model, aggregate):
+    return Subquery(
+        model.objects.filter(author=OuterRef('pk')).order_by().values(
+            'author'
+        ).annotate(value=aggregate).values('value')
+    )
+
+
+def recalculate_user_activity(users=None):
+    """Пересчитывает счетчики пользователей по отзывам и комментариям."""
+    if users is None:
+        users = User.objects.all()
+    last_review = _by_author(Review, Max('pub_date'))
+    last_comment = _by_author(Comment, Max('pub_date'))
+    return users.update(
+        reviews_count=Coalesce(_by_author(Review, Count('pk')), 0),
+        comments_count=Coalesce(_by_author(Comment, Count('pk')), 0),
+        score_sum=Coalesce(_by_author(Review, Sum('score')), 0),
+        # GREATEST в PostgreSQL пропускает NULL, MAX в SQLite — нет.
+        last_activity=Greatest(
+            Coalesce(last_review, last_comment),
+            Coalesce(last_comment, last_review)
+        ),
+    )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.purge import BATCH_SIZE, Purger
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет помеченные удаленными произведения и пользователей '
+        'вместе с отзывами и комментариями, пачками ограниченного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк, удаляемых одним запросом.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=60.0,
+            help='Пауза в секундах, когда удалять нечего.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Удалить помеченные объекты и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        purger = Purger(options['batch_size'])
+        total = 0
+        while True:
+            total += purger.purge()
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+        self.stdout.write(f'Удалено объектов: {total}')
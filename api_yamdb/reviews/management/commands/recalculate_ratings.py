@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from reviews.models import Title
+from reviews.ratings import recalculate_ratings
+from reviews.signals import titles_changed
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг и число отзывов всех произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество произведений, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = Title.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            with transaction.atomic():
+                updated += recalculate_ratings(
+                    Title.objects.filter(
+                        pk__gte=start, pk__lt=start + batch_size
+                    )
+                )
+        titles_changed.send(sender=Title, title_ids=None)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг {updated} произведений.')
+        )
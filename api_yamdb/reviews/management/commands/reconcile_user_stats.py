@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from reviews.activity import recalculate_user_activity
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает число отзывов и комментариев, сумму оценок и '
+        'время последней активности пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество пользователей, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = User.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            with transaction.atomic():
+                updated += recalculate_user_activity(
+                    User.objects.filter(
+                        pk__gte=start, pk__lt=start + batch_size
+                    )
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Пересчитаны счетчики {updated} пользователей.'
+            )
+        )
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Поиск SearchFilter (icontains) в PostgreSQL строится как
+# UPPER("name"::text) LIKE UPPER(%s), поэтому индекс функциональный.
+TRIGRAM_INDEXES = (
+    ('category_name_trgm_idx', 'reviews_category', 'name'),
+    ('genre_name_trgm_idx', 'reviews_genre', 'name'),
+    ('title_name_trgm_idx', 'reviews_title', 'name'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
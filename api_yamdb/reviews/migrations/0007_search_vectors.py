@@ -0,0 +1,85 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:09
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Векторы поддерживаются триггерами: запись отзыва или произведения не
+# требует отдельного запроса, а массовая загрузка индексируется сама.
+CREATE_TRIGGERS = '''
+CREATE FUNCTION reviews_title_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+        || setweight(
+            to_tsvector('russian', coalesce(NEW.description, '')), 'B'
+        );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reviews_title_search_vector_update
+BEFORE INSERT OR UPDATE OF name, description, search_vector
+ON reviews_title
+FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector();
+
+CREATE FUNCTION reviews_review_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reviews_review_search_vector_update
+BEFORE INSERT OR UPDATE OF text, search_vector
+ON reviews_review
+FOR EACH ROW EXECUTE PROCEDURE reviews_review_search_vector();
+
+UPDATE reviews_title SET search_vector = NULL;
+UPDATE reviews_review SET search_vector = NULL;
+
+CREATE INDEX reviews_title_search_vector_idx
+ON reviews_title USING gin (search_vector);
+CREATE INDEX reviews_review_search_vector_idx
+ON reviews_review USING gin (search_vector);
+'''
+
+DROP_TRIGGERS = '''
+DROP TRIGGER IF EXISTS reviews_title_search_vector_update ON reviews_title;
+DROP FUNCTION IF EXISTS reviews_title_search_vector();
+DROP TRIGGER IF EXISTS reviews_review_search_vector_update ON reviews_review;
+DROP FUNCTION IF EXISTS reviews_review_search_vector();
+DROP INDEX IF EXISTS reviews_title_search_vector_idx;
+DROP INDEX IF EXISTS reviews_review_search_vector_idx;
+'''
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGGERS)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+THRESHOLDS = (1, 10, 100, 1000)
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    titles = Title.objects.filter(
+        reviews_count__gt=0, rating__isnull=False
+    ).order_by('pk')
+    last_id = 0
+    while True:
+        batch = list(titles.filter(pk__gt=last_id)[:2000])
+        if not batch:
+            return
+        genres = {}
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=[title.pk for title in batch]
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        rows = []
+        for title in batch:
+            scopes = ['all', f'year:{title.year}']
+            if title.category_id is not None:
+                scopes.append(f'category:{title.category_id}')
+            scopes.extend(
+                f'genre:{genre_id}' for genre_id in genres.get(title.pk, ())
+            )
+            rows.extend(
+                TitleRanking(
+                    scope=scope, threshold=threshold, title_id=title.pk,
+                    rating=title.rating, reviews_count=title.reviews_count,
+                )
+                for threshold in THRESHOLDS
+                if title.reviews_count >= threshold
+                for scope in scopes
+            )
+        TitleRanking.objects.bulk_create(rows)
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Область рейтинга')),
+                ('threshold', models.PositiveIntegerField(verbose_name='Порог числа отзывов')),
+                ('rating', models.FloatField(verbose_name='Рейтинг произведения')),
+                ('reviews_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Строка рейтинга',
+                'verbose_name_plural': 'Рейтинги произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', 'threshold', '-rating', '-reviews_count', 'title'], name='title_ranking_top_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
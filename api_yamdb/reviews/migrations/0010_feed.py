@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата подписки')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follows', to='reviews.Title', verbose_name='Произведение')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follows', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Подписка',
+                'verbose_name_plural': 'Подписки',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('review', 'Отзыв'), ('comment', 'Комментарий')], max_length=7, verbose_name='Тип события')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата события')),
+                ('fanned_out', models.BooleanField(default=False, verbose_name='Разослано по лентам')),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_events', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_events', to='reviews.Comment', verbose_name='Комментарий')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_events', to='reviews.Review', verbose_name='Отзыв')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_events', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Событие ленты',
+                'verbose_name_plural': 'События лент',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='reviews.FeedEvent', verbose_name='Событие')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Владелец ленты')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи лент',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['title', 'user'], name='follow_title_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='follow_user_title_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='feedevent',
+            index=models.Index(fields=['title', 'id'], name='feed_event_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedevent',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['id'], name='feed_event_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='feed_entry_user_event_unique'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled(apps, schema_editor):
+    """События, которые обработчик пропустил как события популярных
+    произведений: у них нет записей в лентах."""
+    FeedEvent = apps.get_model('reviews', 'FeedEvent')
+    FeedEvent.objects.filter(
+        fanned_out=True,
+        title__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedevent',
+            name='feed_event_title_idx',
+        ),
+        migrations.AddField(
+            model_name='feedevent',
+            name='pulled',
+            field=models.BooleanField(default=False, verbose_name='Читается лентами без рассылки'),
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='feedevent',
+            index=models.Index(condition=models.Q(pulled=True), fields=['title', 'id'], name='feed_event_pulled_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (
     MaxValueValidator,
     MinValueValidator,
@@ -5,6 +6,7 @@ from django.core.validators import (
 )
 from django.db import models
 from users.models import User
+from users.soft_delete import ActiveManager, SoftDeleteModel
 
 from .validators import validate_year
 
@@ -54,7 +56,7 @@ class Genre(models.Model):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+class Title(SoftDeleteModel):
     """Модель произведения"""
     name = models.CharField(
         verbose_name='Название произведения',
@@ -85,14 +87,78 @@ class Title(models.Model):
         related_name='titles',
     )
 
+    rating = models.FloatField(
+        verbose_name='Рейтинг произведения',
+        null=True,
+        editable=False
+    )
+
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False
+    )
+
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('name',), name='title_name_idx'),
+            models.Index(fields=('year',), name='title_year_idx'),
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+            models.Index(
+                fields=('deleted_at',),
+                name='title_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False)
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели."""
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из базы категорию и год, от которых
+        зависят рейтинги произведения."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_scopes = instance.ranking_scopes()
+        return instance
+
+    def ranking_scopes(self):
+        return (
+            self.__dict__.get('category_id'), self.__dict__.get('year')
+        )
+
 
 class Review(models.Model):
     """Модель отзыва на произведение."""
@@ -122,10 +188,25 @@ class Review(models.Model):
         verbose_name='Дата отзыва',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('author', 'title'),
@@ -137,6 +218,13 @@ class Review(models.Model):
         """Строковое представление объекта модели."""
         return self.text[:30]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженную из базы оценку для пересчета рейтинга."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
 class Comment(models.Model):
     """Модель комментария на отзыв."""
@@ -166,11 +254,214 @@ class Comment(models.Model):
         verbose_name='Дата отзыва',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели."""
         return self.text[:30]
+
+
+class TitleRanking(models.Model):
+    """Строка материализованного рейтинга произведений.
+
+    Произведение попадает в рейтинг каждой своей области (все
+    произведения, категория, жанр, год) для каждого порога числа
+    отзывов, который оно преодолело. Первые k строк области и порога
+    читаются по индексу без просмотра остальных.
+    """
+    scope = models.CharField(verbose_name='Область рейтинга', max_length=32)
+    threshold = models.PositiveIntegerField(
+        verbose_name='Порог числа отзывов'
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        related_name='rankings',
+        on_delete=models.CASCADE
+    )
+    rating = models.FloatField(verbose_name='Рейтинг произведения')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        verbose_name = 'Строка рейтинга'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = (
+            models.Index(
+                fields=(
+                    'scope', 'threshold', '-rating', '-reviews_count',
+                    'title',
+                ),
+                name='title_ranking_top_idx'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели."""
+        return f'{self.scope}/{self.threshold}: {self.title_id}'
+
+
+class Follow(models.Model):
+    """Подписка пользователя на новые отзывы и комментарии
+    к произведению."""
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        related_name='follows',
+        on_delete=models.CASCADE
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        related_name='follows',
+        on_delete=models.CASCADE
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата подписки',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'title'),
+                name='follow_user_title_unique'
+            ),
+        )
+        indexes = (
+            models.Index(fields=('title', 'user'), name='follow_title_idx'),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели."""
+        return f'{self.user_id} → {self.title_id}'
+
+
+REVIEW_EVENT = 'review'
+COMMENT_EVENT = 'comment'
+
+FEED_EVENT_KINDS = (
+    (REVIEW_EVENT, 'Отзыв'),
+    (COMMENT_EVENT, 'Комментарий'),
+)
+
+
+class FeedEvent(models.Model):
+    """Новый отзыв или комментарий для лент подписчиков произведения.
+
+    Пока fanned_out не установлен, событие ждет рассылки по лентам.
+    События популярных произведений не рассылаются, а отмечаются pulled:
+    ленты читают их отсюда по индексу (title, id), даже если
+    произведение потом перестало быть популярным.
+    """
+    kind = models.CharField(
+        verbose_name='Тип события',
+        max_length=7,
+        choices=FEED_EVENT_KINDS
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        related_name='feed_events',
+        on_delete=models.CASCADE
+    )
+    review = models.ForeignKey(
+        Review,
+        verbose_name='Отзыв',
+        related_name='feed_events',
+        on_delete=models.CASCADE
+    )
+    comment = models.ForeignKey(
+        Comment,
+        verbose_name='Комментарий',
+        related_name='feed_events',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        related_name='feed_events',
+        on_delete=models.CASCADE,
+        null=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата события',
+        auto_now_add=True
+    )
+    fanned_out = models.BooleanField(
+        verbose_name='Разослано по лентам',
+        default=False
+    )
+    pulled = models.BooleanField(
+        verbose_name='Читается лентами без рассылки',
+        default=False
+    )
+
+    class Meta:
+        verbose_name = 'Событие ленты'
+        verbose_name_plural = 'События лент'
+        indexes = (
+            models.Index(
+                fields=('title', 'id'),
+                name='feed_event_pulled_idx',
+                condition=models.Q(pulled=True)
+            ),
+            models.Index(
+                fields=('id',),
+                name='feed_event_pending_idx',
+                condition=models.Q(fanned_out=False)
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели."""
+        return f'{self.kind} {self.review_id}/{self.comment_id}'
+
+
+class FeedEntry(models.Model):
+    """Событие в ленте пользователя. Лента читается по уникальному
+    индексу (user, event) в обратном порядке событий."""
+    user = models.ForeignKey(
+        User,
+        verbose_name='Владелец ленты',
+        related_name='feed_entries',
+        on_delete=models.CASCADE
+    )
+    event = models.ForeignKey(
+        FeedEvent,
+        verbose_name='Событие',
+        related_name='entries',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'event'),
+                name='feed_entry_user_event_unique'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели."""
+        return f'{self.user_id}: {self.event_id}'
@@ -0,0 +1,138 @@
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from users.models import User
+
+from .activity import update_user_activity
+from .models import Comment, FeedEntry, FeedEvent, Follow, Review, Title
+
+logger = logging.getLogger('reviews.purge')
+
+BATCH_SIZE = 1000
+
+
+class Purger:
+    """Удаление помеченных удаленными произведений и пользователей.
+
+    Сборщик Django при delete() загружает в память все зависимые
+    отзывы и комментарии. Здесь зависимые строки удаляются снизу вверх
+    (записи лент, события, комментарии, отзывы) запросами DELETE по
+    пачкам id не больше batch_size, каждая пачка в своей транзакции,
+    так что память и время блокировок не зависят от числа строк.
+    Счетчики авторов сдвигаются по сводке пачки; рейтинги произведений
+    исключают отзывы удаленного пользователя еще при пометке
+    (reviews.signals.user_reviews_hidden). Сама строка удаляется через
+    delete(), когда зависимых не осталось, — со всеми сигналами
+    удаления.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def _batches(self, queryset):
+        """id очередной пачки, пока в queryset остаются строки; пачку
+        нужно удалить до запроса следующей."""
+        while True:
+            ids = list(
+                queryset.order_by().values_list('pk', flat=True)[
+                    :self.batch_size
+                ]
+            )
+            if not ids:
+                return
+            yield ids
+
+    def _raw_delete(self, model, ids):
+        # DELETE ... WHERE id IN (...) без сборщика: зависимые строки
+        # к этому моменту уже удалены.
+        model._base_manager.filter(pk__in=ids)._raw_delete(DEFAULT_DB_ALIAS)
+
+    def _purge(self, queryset):
+        for ids in self._batches(queryset):
+            with transaction.atomic():
+                self._raw_delete(queryset.model, ids)
+
+    def purge_comments(self, queryset):
+        for ids in self._batches(queryset):
+            self._purge(FeedEntry.objects.filter(event__comment_id__in=ids))
+            self._purge(FeedEvent.objects.filter(comment_id__in=ids))
+            with transaction.atomic():
+                authors = list(Comment.objects.filter(
+                    pk__in=ids, author__isnull=False
+                ).values('author_id').annotate(count=Count('pk')))
+                self._raw_delete(Comment, ids)
+                for row in authors:
+                    update_user_activity(
+                        row['author_id'], comments=-row['count']
+                    )
+
+    def purge_reviews(self, queryset):
+        for ids in self._batches(queryset):
+            self.purge_comments(Comment.objects.filter(review_id__in=ids))
+            self._purge(FeedEntry.objects.filter(event__review_id__in=ids))
+            self._purge(FeedEvent.objects.filter(review_id__in=ids))
+            with transaction.atomic():
+                reviews = Review.objects.filter(pk__in=ids)
+                authors = list(reviews.filter(
+                    author__isnull=False
+                ).values('author_id').annotate(
+                    count=Count('pk'), score=Sum('score')
+                ))
+                self._raw_delete(Review, ids)
+                for row in authors:
+                    update_user_activity(
+                        row['author_id'], -row['count'], score=-row['score']
+                    )
+
+    def purge_title(self, title):
+        self.purge_reviews(Review.objects.filter(title_id=title.pk))
+        self.purge_comments(Comment.objects.filter(title_id=title.pk))
+        self._purge(FeedEntry.objects.filter(event__title_id=title.pk))
+        self._purge(FeedEvent.objects.filter(title_id=title.pk))
+        self._purge(Follow.objects.filter(title_id=title.pk))
+        title.delete()
+
+    def purge_user(self, user):
+        self._purge(FeedEntry.objects.filter(user_id=user.pk))
+        follows = Follow.objects.filter(user_id=user.pk)
+        for ids in self._batches(follows):
+            with transaction.atomic():
+                Title.all_objects.filter(
+                    pk__in=follows.filter(pk__in=ids).values('title_id')
+                ).update(followers_count=F('followers_count') - 1)
+                self._raw_delete(Follow, ids)
+        self.purge_comments(Comment.objects.filter(author_id=user.pk))
+        self.purge_reviews(Review.objects.filter(author_id=user.pk))
+        self._purge(FeedEvent.objects.filter(author_id=user.pk))
+        user.delete()
+
+    def _next(self):
+        """Раньше всех помеченный объект и функция его удаления."""
+        for model, purge in (
+            (Title, self.purge_title), (User, self.purge_user)
+        ):
+            obj = model.all_objects.filter(
+                deleted_at__isnull=False
+            ).order_by('deleted_at', 'pk').first()
+            if obj is not None:
+                return obj, purge
+        return None, None
+
+    def purge(self, limit=None):
+        """Удаляет до limit помеченных объектов; возвращает их число."""
+        purged = 0
+        while limit is None or purged < limit:
+            obj, purge = self._next()
+            if obj is None:
+                break
+            try:
+                purge(obj)
+            except IntegrityError as error:
+                # Пока шло удаление, к отзыву пользователя добавили
+                # комментарий: объект удалится при следующем запуске.
+                logger.warning('%r не удален: %r', obj, error)
+                break
+            purged += 1
+            logger.info('Удален %s %s', obj._meta.model_name, obj.pk)
+        return purged
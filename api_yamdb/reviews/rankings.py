@@ -0,0 +1,131 @@
+from django.db import transaction
+
+from .models import Title, TitleRanking
+
+# Пороги числа отзывов, для которых хранятся отдельные рейтинги.
+THRESHOLDS = (1, 10, 100, 1000)
+# Число отзывов, при котором отзыв, добавленный или удаленный последним,
+# изменил набор преодоленных порогов.
+BOUNDARIES = frozenset(
+    bound for threshold in THRESHOLDS for bound in (threshold - 1, threshold)
+)
+ALL_SCOPE = 'all'
+REBUILD_BATCH_SIZE = 5000
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def year_scope(year):
+    return f'year:{year}'
+
+
+def threshold_for(min_reviews):
+    """Наибольший хранимый порог, не превышающий min_reviews."""
+    return max(
+        (threshold for threshold in THRESHOLDS if threshold <= min_reviews),
+        default=THRESHOLDS[0]
+    )
+
+
+def _ranking_rows(title, genre_ids):
+    if title['rating'] is None:
+        return []
+    scopes = [ALL_SCOPE, year_scope(title['year'])]
+    if title['category_id'] is not None:
+        scopes.append(category_scope(title['category_id']))
+    scopes.extend(genre_scope(genre_id) for genre_id in genre_ids)
+    return [
+        TitleRanking(
+            scope=scope,
+            threshold=threshold,
+            title_id=title['id'],
+            rating=title['rating'],
+            reviews_count=title['reviews_count'],
+        )
+        for threshold in THRESHOLDS
+        if title['reviews_count'] >= threshold
+        for scope in scopes
+    ]
+
+
+def _build_rows(titles):
+    titles = list(titles.values(
+        'id', 'rating', 'reviews_count', 'category_id', 'year'
+    ))
+    genres = {}
+    links = Title.genre.through.objects.filter(
+        title_id__in=[title['id'] for title in titles]
+    ).values_list('title_id', 'genre_id')
+    for title_id, genre_id in links:
+        genres.setdefault(title_id, []).append(genre_id)
+    return [
+        row for title in titles
+        for row in _ranking_rows(title, genres.get(title['id'], ()))
+    ]
+
+
+def refresh_rankings(title_ids):
+    """Пересборка строк рейтинга отдельных произведений."""
+    title_ids = list(title_ids)
+    with transaction.atomic(savepoint=False):
+        rows = _build_rows(Title.objects.filter(pk__in=title_ids))
+        TitleRanking.objects.filter(title_id__in=title_ids).delete()
+        TitleRanking.objects.bulk_create(rows)
+
+
+def update_rankings(title_ids):
+    """Перенос рейтинга в строки после добавления, удаления или
+    изменения одного отзыва каждого произведения.
+
+    Такое изменение сдвигает число отзывов не больше чем на единицу,
+    поэтому набор порогов меняется, только если число отзывов оказалось
+    на границе порога; в остальных случаях строки обновляются на месте.
+    """
+    titles = Title.objects.filter(pk__in=title_ids).values_list(
+        'pk', 'rating', 'reviews_count'
+    )
+    for pk, rating, reviews_count in titles:
+        if rating is None or reviews_count in BOUNDARIES:
+            refresh_rankings((pk,))
+        else:
+            TitleRanking.objects.filter(title_id=pk).update(
+                rating=rating, reviews_count=reviews_count
+            )
+
+
+def rebuild_rankings(batch_size=REBUILD_BATCH_SIZE):
+    """Полная пересборка рейтингов пачками произведений с отзывами."""
+    TitleRanking.objects.all().delete()
+    titles = Title.objects.filter(reviews_count__gte=THRESHOLDS[0])
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = titles.filter(pk__gt=last_id).order_by('pk')[:batch_size]
+            ids = list(batch.values_list('pk', flat=True))
+            if not ids:
+                return
+            # Строк больше, чем произведений: размер пачки вставки
+            # выбирает бэкенд с учетом ограничений базы.
+            TitleRanking.objects.bulk_create(
+                _build_rows(Title.objects.filter(pk__in=ids))
+            )
+        last_id = ids[-1]
+
+
+def top_titles(scope, limit, min_reviews=THRESHOLDS[0]):
+    """Идентификаторы лучших произведений области по убыванию рейтинга."""
+    return list(
+        TitleRanking.objects.filter(
+            scope=scope,
+            threshold=threshold_for(min_reviews),
+            reviews_count__gte=min_reviews,
+        ).order_by(
+            '-rating', '-reviews_count', 'title_id'
+        ).values_list('title_id', flat=True)[:limit]
+    )
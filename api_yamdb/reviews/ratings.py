@@ -0,0 +1,54 @@
+from django.db.models import (
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Now, NullIf
+
+from .models import Review, Title
+
+
+def rating_expression(score_sum, reviews_count):
+    """Выражение среднего балла; при отсутствии отзывов — NULL."""
+    return Cast(score_sum, FloatField()) / NullIf(reviews_count, Value(0))
+
+
+def update_title_rating(title_id, count_delta, score_delta):
+    """Атомарно сдвигает счетчики отзывов произведения одним UPDATE."""
+    if title_id is None:
+        return
+    reviews_count = F('reviews_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        reviews_count=reviews_count,
+        score_sum=score_sum,
+        rating=rating_expression(score_sum, reviews_count),
+        updated_at=Now(),
+    )
+
+
+def recalculate_ratings(titles=None):
+    """Пересчитывает счетчики и рейтинг произведений по таблице отзывов."""
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    titles.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count('pk')).values('count')),
+            0
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+    )
+    return titles.update(
+        rating=rating_expression(F('score_sum'), F('reviews_count')),
+        updated_at=Now(),
+    )
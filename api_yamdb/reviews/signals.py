@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from users.models import User
+from users.soft_delete import soft_deleted
+
+from .activity import update_user_activity
+from .models import Category, Comment, Genre, Review, Title, TitleRanking
+from .rankings import (
+    category_scope,
+    genre_scope,
+    rebuild_rankings,
+    refresh_rankings,
+    update_rankings,
+)
+from .ratings import update_title_rating
+
+# Отправляется, когда производные данные произведений (рейтинг, число
+# отзывов) изменены в обход save(): у каждого из title_ids добавлены,
+# удалены или изменены отзывы. title_ids=None — изменены все.
+titles_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый отзыв или измененную оценку в рейтинге."""
+    if raw:
+        return
+    if created:
+        count_delta, score_delta = 1, instance.score
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        count_delta = 0
+        score_delta = (
+            0 if loaded_score is None else instance.score - loaded_score
+        )
+    instance._loaded_score = instance.score
+    update_user_activity(
+        instance.author_id, count_delta, score=score_delta, active=created
+    )
+    if count_delta or score_delta:
+        update_title_rating(instance.title_id, count_delta, score_delta)
+        titles_changed.send(sender=Title, title_ids=(instance.title_id,))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает удаленный отзыв (в том числе каскадно) из рейтинга."""
+    update_title_rating(instance.title_id, -1, -instance.score)
+    update_user_activity(instance.author_id, -1, score=-instance.score)
+    titles_changed.send(sender=Title, title_ids=(instance.title_id,))
+
+
+@receiver(soft_deleted, sender=User)
+def user_reviews_hidden(sender, pks, **kwargs):
+    """Отзывы удаленных пользователей сразу исключаются из рейтингов;
+    purge_deleted удаляет их уже без пересчета."""
+    with transaction.atomic():
+        titles = list(Review.objects.filter(
+            author_id__in=pks
+        ).values('title_id').annotate(count=Count('pk'), score=Sum('score')))
+        for row in titles:
+            update_title_rating(
+                row['title_id'], -row['count'], -row['score']
+            )
+    if titles:
+        titles_changed.send(
+            sender=Title, title_ids=[row['title_id'] for row in titles]
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый комментарий в счетчиках автора."""
+    if created and not raw:
+        update_user_activity(instance.author_id, comments=1, active=True)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    update_user_activity(instance.author_id, comments=-1)
+
+
+@receiver(titles_changed)
+def rankings_changed(sender, title_ids, **kwargs):
+    """Переносит новые рейтинги произведений в таблицу рейтингов."""
+    if title_ids is None:
+        rebuild_rankings()
+    else:
+        update_rankings(title_ids)
+
+
+@receiver(post_save, sender=Title)
+def title_ranking_saved(sender, instance, created, raw=False, **kwargs):
+    """Смена категории или года переносит произведение в другие
+    рейтинги; у нового произведения отзывов еще нет."""
+    if raw or created:
+        return
+    scopes = instance.ranking_scopes()
+    if getattr(instance, '_loaded_scopes', None) != scopes:
+        refresh_rankings((instance.pk,))
+    instance._loaded_scopes = scopes
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_ranking_genres(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # Произведение без отзывов (например, новое) не входит ни в один
+        # рейтинг.
+        if Title.objects.filter(
+            pk=instance.pk, reviews_count__gt=0
+        ).exists():
+            refresh_rankings((instance.pk,))
+    elif action == 'post_clear':
+        TitleRanking.objects.filter(scope=genre_scope(instance.pk)).delete()
+    else:
+        refresh_rankings(pk_set)
+
+
+@receiver(post_delete, sender=Genre)
+def genre_ranking_deleted(sender, instance, **kwargs):
+    TitleRanking.objects.filter(scope=genre_scope(instance.pk)).delete()
+
+
+@receiver(post_delete, sender=Category)
+def category_ranking_deleted(sender, instance, **kwargs):
+    TitleRanking.objects.filter(scope=category_scope(instance.pk)).delete()
+
+
+@receiver(soft_deleted, sender=Title)
+def title_ranking_soft_deleted(sender, pks, **kwargs):
+    """Удаленное произведение сразу исчезает из рейтингов."""
+    TitleRanking.objects.filter(title_id__in=pks).delete()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -8,4 +8,11 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ('pk', 'email', 'bio', 'role')
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Класс отображения очереди исходящей почты."""
+    list_display = ('pk', 'to', 'subject', 'status', 'attempts', 'sent_at')
+    list_filter = ('status',)
+
+
 admin.site.register(User, UserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -1,7 +1,11 @@
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
 
+from .soft_delete import ActiveManager, SoftDeleteModel
 from .validators import validate_me
 
 USER = 'user'
@@ -14,8 +18,21 @@ USER_ROLES = (
     (ADMIN, 'Администратор'),
 )
 
+# Изменение этих полей отзывает выданные токены: они записаны в claims.
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
 
-class User(AbstractUser):
+# Счетчики активности меняются только запросами UPDATE с F(), поэтому
+# save() существующего пользователя их не записывает.
+STATS_FIELDS = (
+    'reviews_count', 'comments_count', 'score_sum', 'last_activity'
+)
+
+
+class ActiveUserManager(ActiveManager, UserManager):
+    """Менеджер пользователей без помеченных удаленными."""
+
+
+class User(SoftDeleteModel, AbstractUser):
     """Модель User проекта."""
     username = models.CharField(
         verbose_name='Имя пользователя',
@@ -46,10 +63,41 @@ class User(AbstractUser):
         null=True,
         default=USER
     )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    last_activity = models.DateTimeField(
+        verbose_name='Последний отзыв или комментарий',
+        null=True,
+        editable=False
+    )
 
     REQUIRED_FIELDS = ('email',)
 
-    objects = UserManager()
+    objects = ActiveUserManager()
+    all_objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        swappable = 'AUTH_USER_MODEL'
+        indexes = (
+            models.Index(
+                fields=('deleted_at',),
+                name='user_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False)
+            ),
+        )
 
     @property
     def is_admin(self):
@@ -67,6 +115,106 @@ class User(AbstractUser):
         пользователя. """
         return self.role == USER
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из базы данные claims токена."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.token_claims()
+        return instance
+
+    @classmethod
+    def soft_delete_changes(cls):
+        """Имя и почта освобождаются для новых регистраций: уникальность
+        проверяется только среди неудаленных пользователей."""
+        pk = Cast('pk', CharField())
+        return {
+            'username': Concat(Value('deleted-'), pk),
+            'email': Concat(Value('deleted-'), pk, Value('@yamdb.invalid')),
+        }
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in STATS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_score(self):
+        if not self.reviews_count:
+            return None
+        return self.score_sum / self.reviews_count
+
+    def token_claims(self):
+        return tuple(self.__dict__.get(name) for name in TOKEN_CLAIM_FIELDS)
+
     def __str__(self):
         """Строковое представление объекта модели."""
         return self.email
+
+
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+EMAIL_STATUSES = (
+    (PENDING, 'В очереди'),
+    (SENDING, 'Отправляется'),
+    (SENT, 'Отправлено'),
+    (FAILED, 'Не доставлено'),
+)
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди исходящей почты."""
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(verbose_name='Отправитель', max_length=254)
+    to = models.CharField(verbose_name='Получатели', max_length=1000)
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=7,
+        choices=EMAIL_STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Поставлено в очередь',
+        auto_now_add=True
+    )
+    # У отправляемого письма — срок аренды обработчиком: после него
+    # письмо снова выбирается из очереди.
+    send_after = models.DateTimeField(
+        verbose_name='Отправить не раньше',
+        default=timezone.now
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('send_after', 'id'),
+                name='outgoing_email_pending_idx',
+                condition=models.Q(status__in=(PENDING, SENDING))
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели."""
+        return f'{self.to}: {self.subject}'
+
+    @property
+    def recipients(self):
+        return self.to.split(',')
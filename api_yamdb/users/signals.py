@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .soft_delete import soft_deleted
+from .tokens import revocations
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    """Отзывает токены, если изменились данные, записанные в claims.
+
+    Если прежние данные неизвестны (объект не загружался из базы),
+    токены отзываются на всякий случай.
+    """
+    if raw:
+        return
+    claims = instance.token_claims()
+    if not created and getattr(instance, '_loaded_claims', None) != claims:
+        revocations.revoke(instance.pk)
+    instance._loaded_claims = claims
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revocations.revoke(instance.pk)
+
+
+@receiver(soft_deleted, sender=User)
+def user_soft_deleted(sender, pks, **kwargs):
+    for pk in pks:
+        revocations.revoke(pk)
@@ -0,0 +1,52 @@
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Отправляется после пометки объектов удаленными: pks — их ключи.
+# Строки остаются в базе до команды purge_deleted.
+soft_deleted = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+
+    def soft_delete(self):
+        """Помечает объекты удаленными одним UPDATE; возвращает их
+        количество."""
+        pks = list(self.values_list('pk', flat=True))
+        if pks:
+            self.model.all_objects.filter(pk__in=pks).update(
+                deleted_at=timezone.now(), **self.model.soft_delete_changes()
+            )
+            soft_deleted.send(sender=self.model, pks=pks)
+        return len(pks)
+
+
+class ActiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Менеджер по умолчанию: объекты, помеченные удаленными, не видны
+    ни в одном запросе через него и через обратные связи."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """Модель с мягким удалением. Наследники объявляют objects
+    (ActiveManager) и all_objects — менеджер всех строк."""
+    deleted_at = models.DateTimeField(
+        verbose_name='Помечено удаленным',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def soft_delete_changes(cls):
+        """Другие поля, изменяемые при пометке удаленными."""
+        return {}
+
+    def soft_delete(self):
+        type(self).objects.filter(pk=self.pk).soft_delete()
+        self.refresh_from_db()
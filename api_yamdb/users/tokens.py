@@ -0,0 +1,114 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import ADMIN, MODERATOR, USER, User
+
+REVOKED_KEY = 'auth:revoked:{}'
+LOCAL_REVOKED_LIMIT = 10000
+
+# Claims, по которым права проверяются без загрузки пользователя.
+CLAIMS = ('username', 'role', 'is_superuser')
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью, признаком суперпользователя, именем и
+    временем выпуска пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        token['iat'] = round(token.current_time.timestamp(), 3)
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, восстановленный из claims токена без запроса к базе.
+
+    Повторяет свойства User, которыми пользуются разрешения.
+    """
+
+    @property
+    def role(self):
+        return self.token.get('role', USER)
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == USER
+
+    def as_user(self):
+        """Экземпляр User для присваивания внешним ключам: заполнены
+        только поля из токена, сохранять его нельзя."""
+        user = User(
+            id=self.id,
+            **{claim: self.token.get(claim) for claim in CLAIMS}
+        )
+        user._state.adding = False
+        return user
+
+
+def as_user(user):
+    """Модель пользователя для request.user любого вида."""
+    if isinstance(user, RoleTokenUser):
+        return user.as_user()
+    return user
+
+
+class RevocationCache:
+    """Время последнего отзыва токенов пользователя.
+
+    Источник — общий кеш Django, отметки в нем живут не дольше
+    access-токена. Ответы общего кеша запоминаются в процессе на
+    JWT_REVOCATION_CHECK_INTERVAL секунд, отзывы из этого процесса видны
+    сразу, из других — не позже чем через этот интервал.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}
+
+    def revoke(self, user_id):
+        revoked_at = time.time()
+        cache.set(
+            REVOKED_KEY.format(user_id), revoked_at,
+            api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        )
+        with self._lock:
+            self._local[user_id] = (revoked_at, time.monotonic())
+
+    def revoked_at(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(user_id)
+        if entry is not None and (
+            now - entry[1] < settings.JWT_REVOCATION_CHECK_INTERVAL
+        ):
+            return entry[0]
+        revoked_at = cache.get(REVOKED_KEY.format(user_id))
+        with self._lock:
+            if len(self._local) >= LOCAL_REVOKED_LIMIT:
+                self._local.clear()
+            self._local[user_id] = (revoked_at, now)
+        return revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+revocations = RevocationCache()
@@ -1,9 +1,37 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def stateless_auth(settings):
+    # Тесты идут в одном процессе, поэтому отзыва токенов в локальном
+    # кэше достаточно для проверки режима без загрузки пользователя.
+    settings.JWT_STATELESS_AUTH = True
+
+
+@pytest.fixture(autouse=True)
+def load_filter_index_in_place(monkeypatch):
+    # Данные незавершенной транзакции теста не видны фоновому потоку.
+    from api.filter_index import title_filter_index
+    monkeypatch.setattr(title_filter_index, 'background', False)
+
+
+@pytest.fixture(autouse=True)
+def clear_process_state():
+    from api.search import get_search_backend
+    from django.core.cache import cache
+    from users.tokens import revocations
+    cache.clear()
+    get_search_backend.cache_clear()
+    revocations.clear()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.testing import ApplicationCommunicator
+from reviews.models import Review
+from users.tokens import RoleAccessToken
+
+from api.asgi import ASGIHandler
+
+
+def request(application, path, method='GET', query=b'', headers=()):
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'path': path,
+        'query_string': query,
+        'headers': [(b'host', b'testserver'), *headers],
+        'client': ('127.0.0.1', 50000),
+    }
+
+    async def run():
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        body = b''
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        await communicator.wait()
+        return start['status'], body
+
+    return asyncio.get_event_loop().run_until_complete(run())
+
+
+@pytest.fixture
+def application():
+    return ASGIHandler()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestASGI:
+
+    def test_read_view(self, application, title):
+        status, body = request(application, f'/api/v1/titles/{title.pk}/')
+
+        assert status == 200
+        assert json.loads(body)['name'] == title.name
+
+    def test_streaming_response(self, application, admin, user, title):
+        Review.objects.create(title=title, author=user, text='Текст', score=7)
+        token = RoleAccessToken.for_user(admin)
+        status, body = request(
+            application, '/api/v1/export/reviews/', query=b'output=ndjson',
+            headers=[(b'authorization', f'Bearer {token}'.encode())]
+        )
+
+        assert status == 200
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row['text'] for row in rows] == ['Текст']
+
+    def test_read_executor(self, application):
+        def executor(method, path):
+            return application.executor_for({'method': method, 'path': path})
+
+        assert executor('GET', '/api/v1/titles/') is application.read_executor
+        assert executor(
+            'GET', '/api/v1/titles/1/reviews/2/comments/'
+        ) is application.read_executor
+        assert executor('POST', '/api/v1/titles/') is application.executor
+        assert executor('GET', '/api/v1/users/me/') is application.executor
+        assert executor('GET', '/missing/') is application.executor
+
+    def test_lifespan(self, application):
+        async def run():
+            communicator = ApplicationCommunicator(
+                application, {'type': 'lifespan'}
+            )
+            await communicator.send_input({'type': 'lifespan.startup'})
+            started = await communicator.receive_output(1)
+            await communicator.send_input({'type': 'lifespan.shutdown'})
+            stopped = await communicator.receive_output(1)
+            return started['type'], stopped['type']
+
+        assert asyncio.get_event_loop().run_until_complete(run()) == (
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        )
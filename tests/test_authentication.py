@@ -0,0 +1,113 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
+from reviews.models import Review
+
+
+def client_with(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_token_claims(self, client, admin):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': admin.username,
+            'confirmation_code': default_token_generator.make_token(admin),
+        })
+
+        assert response.status_code == 200
+        token = UntypedToken(response.json()['token'])
+        assert token['username'] == admin.username
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert 'iat' in token
+
+    def test_no_user_lookup(self, user_client, user):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/categories/')
+
+        assert response.status_code == 200
+        assert not any(
+            'users_user' in query['sql'] for query in context.captured_queries
+        ), 'Пользователь не должен загружаться из базы для проверки прав'
+
+    def test_author_from_token(self, user_client, user, title):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Хорошо', 'score': 8}
+        )
+
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        review = Review.objects.get()
+        assert review.author_id == user.pk
+        response = user_client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/',
+            data={'score': 9}
+        )
+        assert response.status_code == 200
+
+    def test_role_change_revokes_token(self, admin_client, admin):
+        data = {'name': 'Книга', 'slug': 'books'}
+        assert admin_client.post(
+            '/api/v1/categories/', data=data
+        ).status_code == 201
+
+        admin.role = 'user'
+        admin.save()
+
+        response = admin_client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        )
+        assert response.status_code == 401, (
+            'Токен, выпущенный до смены роли, должен отклоняться'
+        )
+
+    def test_unrelated_change_keeps_token(self, user_client, user):
+        user.bio = 'Новая биография'
+        user.save()
+
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+
+    def test_deleted_user(self, user_client, user):
+        user.delete()
+
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_token_without_claims(self, user):
+        client = client_with(AccessToken.for_user(user))
+
+        response = client.get('/api/v1/users/me/')
+
+        assert response.status_code == 200
+        assert response.json()['username'] == user.username
+
+    def test_stateful_mode_loads_user(self, settings, user_client):
+        settings.JWT_STATELESS_AUTH = False
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/categories/')
+
+        assert response.status_code == 200
+        assert any(
+            'users_user' in query['sql'] for query in context.captured_queries
+        )
+
+    def test_local_cache_check(self, settings):
+        from api.checks import stateless_auth_cache
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+
+        assert [error.id for error in stateless_auth_cache(None)] == [
+            'api.E001'
+        ]
+        settings.JWT_STATELESS_AUTH = False
+        assert stateless_auth_cache(None) == []
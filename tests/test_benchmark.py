@@ -0,0 +1,101 @@
+import json
+import random
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import resolve
+from reviews.models import Comment, Review, Title
+
+from api.benchmark import SCENARIOS, DatasetGenerator
+from api.urls import router_v1, urlpatterns
+
+SIZES = {
+    'categories': 2, 'genres': 3, 'users': 6,
+    'titles': 4, 'reviews': 12, 'comments': 20,
+}
+
+
+def seed():
+    call_command(
+        'seed_benchmark', batch_size=5,
+        **{name: size for name, size in SIZES.items()}
+    )
+
+
+def route_names():
+    names = {
+        getattr(pattern, 'name', None) for pattern in urlpatterns
+    }
+    return (names | {pattern.name for pattern in router_v1.urls}) - {None}
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+
+    def test_dataset_is_deterministic(self):
+        first = [obj.name for obj, _ in DatasetGenerator(SIZES).titles(
+            [1], [1, 2]
+        )]
+        second = [obj.name for obj, _ in DatasetGenerator(SIZES).titles(
+            [1], [1, 2]
+        )]
+        assert first == second
+
+    def test_seed(self):
+        seed()
+
+        assert Title.objects.count() == 4
+        assert Review.objects.count() == 12
+        assert Comment.objects.filter(title__isnull=False).count() == 20
+        title = Title.objects.get(pk=1)
+        assert title.reviews_count == 3, (
+            'Проверьте, что рейтинг пересчитывается после заполнения'
+        )
+        with pytest.raises(CommandError):
+            seed()
+
+    def test_scenarios_cover_routes(self):
+        covered = set()
+        for scenario in SCENARIOS:
+            path, _ = scenario.build(
+                random.Random(0), {
+                    'titles': [1], 'title_names': ['a'],
+                    'reviews': [(1, 1)], 'comments': [(1, 1, 1)],
+                    'users': ['user1'], 'categories': ['c'],
+                    'genres': ['g'], 'title_count': 1,
+                    'confirmation_code': 'code',
+                    'export_reviews': 0, 'export_comments': 0,
+                }
+            )
+            covered.add(resolve(path.split('?')[0]).url_name)
+        assert route_names() - covered == set()
+
+    def test_run_and_compare(self, tmp_path):
+        seed()
+        output = tmp_path / 'results.json'
+        call_command(
+            'benchmark', requests=2, warmup=1, output=str(output)
+        )
+
+        results = json.loads(output.read_text(encoding='utf-8'))
+        assert results['dataset']['titles'] == 4
+        failed = {
+            name: result for name, result in results['scenarios'].items()
+            if result['errors']
+        }
+        assert not failed
+        for result in results['scenarios'].values():
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+
+        baseline = tmp_path / 'baseline.json'
+        results['scenarios']['titles-detail']['queries_max'] -= 1
+        baseline.write_text(json.dumps(results), encoding='utf-8')
+        # Откаченные записи не сбрасывают кэш: второй прогон с холодным.
+        cache.clear()
+        with pytest.raises(CommandError, match='titles-detail queries_max'):
+            call_command(
+                'benchmark', requests=2, warmup=1, scenario=['titles-detail'],
+                compare=str(baseline), threshold=1000
+            )
@@ -0,0 +1,147 @@
+import pytest
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Title
+
+
+def new_titles(count, category='films', genre=('drama', 'comedy')):
+    return [
+        {
+            'name': f'Произведение {number}', 'year': 2000,
+            'category': category, 'genre': list(genre),
+        }
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkWrite:
+
+    def test_create_titles(self, admin_client, category, genres):
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', new_titles(3), format='json'
+        )
+        assert response.status_code == 201
+        assert [item['status'] for item in response.data] == [201] * 3
+        data = response.data[0]['data']
+        assert data['category'] == 'films'
+        assert set(data['genre']) == {'drama', 'comedy'}
+        assert Title.objects.count() == 3
+        assert Title.genre.through.objects.count() == 6
+
+    def test_invalid_item_rejects_batch(self, admin_client, category, genres):
+        items = new_titles(3)
+        items[1]['category'] = 'missing'
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', items, format='json'
+        )
+        assert response.status_code == 400
+        assert [item['status'] for item in response.data] == [424, 400, 424]
+        assert 'category' in response.data[1]['errors']
+        assert not Title.objects.exists()
+
+    def test_relations_resolved_once(self, admin_client, category, genres):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                '/api/v1/titles/bulk/', new_titles(20), format='json'
+            )
+        assert response.status_code == 201
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        for table in ('reviews_category', 'reviews_genre'):
+            assert len([
+                sql for sql in selects
+                if sql.split(' FROM ')[1].startswith(f'"{table}"')
+            ]) == 1, table
+
+    def test_duplicate_slugs(self, admin_client, genres):
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Ужасы 2', 'slug': 'horror'},
+            {'name': 'Драма', 'slug': 'drama'},
+        ], format='json')
+        assert response.status_code == 400
+        assert [item['status'] for item in response.data] == [424, 400, 400]
+        assert Genre.objects.count() == 2
+
+    def test_update_titles(self, admin_client, title, category):
+        other = Category.objects.create(name='Книга', slug='books')
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'name': 'Новое', 'category': other.slug,
+             'genre': ['drama']},
+        ], format='json')
+        assert response.status_code == 200
+        assert response.data[0]['data']['name'] == 'Новое'
+        title.refresh_from_db()
+        assert title.category == other
+        assert [genre.slug for genre in title.genre.all()] == ['drama']
+
+    def test_update_missing_object(self, admin_client, title):
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'name': 'Новое'},
+            {'id': title.pk + 100, 'name': 'Нет'},
+        ], format='json')
+        assert response.status_code == 400
+        assert [item['status'] for item in response.data] == [424, 404]
+        title.refresh_from_db()
+        assert title.name != 'Новое'
+
+    def test_delete(self, admin_client, genres):
+        response = admin_client.delete(
+            '/api/v1/genres/bulk/', ['drama', 'missing'], format='json'
+        )
+        assert response.status_code == 400
+        assert Genre.objects.count() == 2
+        response = admin_client.delete(
+            '/api/v1/genres/bulk/', ['drama', 'comedy'], format='json'
+        )
+        assert response.status_code == 200
+        assert not Genre.objects.exists()
+
+    def test_limits(self, admin_client, user_client, settings):
+        item = [{'name': 'Фильм', 'slug': 'films'}]
+        assert user_client.post(
+            '/api/v1/categories/bulk/', item, format='json'
+        ).status_code == 403
+        assert admin_client.post(
+            '/api/v1/categories/bulk/', [], format='json'
+        ).status_code == 400
+        settings.API_BULK_MAX_ITEMS = 1
+        assert admin_client.post(
+            '/api/v1/categories/bulk/', item * 2, format='json'
+        ).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalidates_cached_lists(self, client, admin_client, category):
+        client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/categories/bulk/', [
+            {'name': 'Книга', 'slug': 'books'},
+        ], format='json')
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['count'] == 2
+
+    def test_create_sends_no_post_save(self, admin_client, title, category,
+                                       genres):
+        deleted_pk = title.pk
+        title.delete()
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance.pk)
+
+        post_save.connect(receiver, sender=Title)
+        try:
+            response = admin_client.post(
+                '/api/v1/titles/bulk/', new_titles(2), format='json'
+            )
+        finally:
+            post_save.disconnect(receiver, sender=Title)
+        assert response.status_code == 201
+        assert saved == [], 'Пакетная вставка не отправляет post_save'
+        ids = [item['data']['id'] for item in response.data]
+        assert ids == sorted(ids) and ids[0] > deleted_pk
+        assert set(Title.objects.values_list('pk', flat=True)) == set(ids)
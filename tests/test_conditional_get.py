@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review
+
+from api.serializers import ReviewSerializer
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title, author=user, text='Отзыв', score=6
+    )
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_title_detail(self, client, admin_client, title):
+        url = f'/api/v1/titles/{title.pk}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('W/"')
+        assert 'Last-Modified' in response
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+        assert admin_client.patch(
+            url, data={'name': 'Новое'}
+        ).status_code == 200
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_cached_revalidation_runs_no_queries(self, client, title):
+        etag = client.get('/api/v1/titles/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['X-Cache'] == 'HIT'
+        assert len(queries) == 0
+
+    def test_review_list_skips_serialization(self, client, title, review,
+                                             monkeypatch):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+
+        def fail(*args, **kwargs):
+            raise AssertionError('Сериализация при ответе 304')
+
+        monkeypatch.setattr(ReviewSerializer, 'to_representation', fail)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_review_list_changes(self, client, title, review, another_user):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        other = Review.objects.create(
+            title=title, author=another_user, text='Еще', score=3
+        )
+        second = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert second.status_code == 200
+        other.delete()
+        third = client.get(url, HTTP_IF_NONE_MATCH=second['ETag'])
+        assert third.status_code == 200
+        assert client.get(
+            url, {'limit': 1}, HTTP_IF_NONE_MATCH=third['ETag']
+        ).status_code == 200
+
+    def test_comment_list_if_modified_since(self, client, review, user):
+        Comment.objects.create(
+            title=review.title, review=review, author=user, text='Ответ'
+        )
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/comments/'
+        )
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_updates_title_validators(self, client, title, user):
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = client.get(url)['ETag']
+        Review.objects.create(title=title, author=user, text='a', score=9)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_cursor_list_skips_count(self, client, title, review):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert not any(
+            'COUNT(' in query['sql'] or 'MAX(' in query['sql']
+            for query in queries.captured_queries
+        ), 'Курсорный режим не должен считать объекты'
+        assert client.get(
+            url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+        review.text = 'Изменен'
+        review.save()
+        assert client.get(
+            url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200
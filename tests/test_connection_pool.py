@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from api.pool import (ConnectionPool, PoolTimeoutError, pool_discarded,
+                      pool_timeouts, pool_wait)
+
+
+class FakeConnection:
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class Connector:
+
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        self.opened.append(FakeConnection(len(self.opened)))
+        return self.opened[-1]
+
+
+def make_pool(alias, **options):
+    defaults = {
+        'size': 2, 'max_overflow': 1, 'timeout': 0.2, 'recycle': 60,
+        'ping_interval': 60,
+    }
+    defaults.update(options)
+    return ConnectionPool(
+        alias, ping=lambda connection: connection.healthy,
+        close=lambda connection: connection.close(), **defaults
+    )
+
+
+class TestConnectionPool:
+
+    def test_reuses_released_connection(self):
+        pool, connect = make_pool('reuse'), Connector()
+        first = pool.acquire(connect)
+        pool.release(first)
+        assert pool.acquire(connect) is first
+        assert len(connect.opened) == 1
+        assert pool_wait.count(alias='reuse') == 2
+
+    def test_overflow_is_closed_on_release(self):
+        pool, connect = make_pool('overflow'), Connector()
+        connections = [pool.acquire(connect) for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+        assert [c.closed for c in connections] == [False, False, True]
+        assert pool_discarded.value(alias='overflow', reason='overflow') == 1
+
+    def test_timeout_when_exhausted(self):
+        pool, connect = make_pool('exhausted'), Connector()
+        for _ in range(3):
+            pool.acquire(connect)
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(connect)
+        assert pool_timeouts.value(alias='exhausted') == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool, connect = make_pool('waiter', timeout=5), Connector()
+        connections = [pool.acquire(connect) for _ in range(3)]
+        received = []
+        waiter = threading.Thread(
+            target=lambda: received.append(pool.acquire(connect))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.release(connections[0])
+        waiter.join(5)
+        assert received == [connections[0]]
+        assert len(connect.opened) == 3
+
+    def test_unhealthy_connection_is_replaced(self):
+        pool, connect = make_pool('ping', ping_interval=0), Connector()
+        first = pool.acquire(connect)
+        pool.release(first)
+        first.healthy = False
+        second = pool.acquire(connect)
+        assert second is not first
+        assert first.closed
+        assert pool_discarded.value(alias='ping', reason='unhealthy') == 1
+
+    def test_broken_and_old_connections_are_closed(self):
+        pool, connect = make_pool('recycle', recycle=0), Connector()
+        old = pool.acquire(connect)
+        pool.release(old)
+        broken = pool.acquire(connect)
+        pool.release(broken, reusable=False)
+        assert old.closed and broken.closed
+        assert pool_discarded.value(alias='recycle', reason='recycled') == 1
+        assert pool_discarded.value(alias='recycle', reason='broken') == 1
+
+    def test_failed_connect_frees_slot(self):
+        pool = make_pool('failing', size=1, max_overflow=0)
+
+        def connect():
+            raise OSError('refused')
+
+        with pytest.raises(OSError):
+            pool.acquire(connect)
+        assert isinstance(pool.acquire(Connector()), FakeConnection)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from reviews.models import Comment, Review
+
+from api.export import export_rows
+
+
+@pytest.fixture
+def feedback(title, user, another_user):
+    first = Review.objects.create(
+        title=title, author=user, text='Первый, с запятой', score=8
+    )
+    second = Review.objects.create(
+        title=title, author=another_user, text='Второй', score=4
+    )
+    Comment.objects.create(
+        title=title, review=first, author=another_user, text='Ответ'
+    )
+    return first, second
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_command_exports_csv(self, feedback, title):
+        output = io.StringIO()
+        call_command('export_reviews', 'reviews', stdout=output)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        assert [row['id'] for row in rows] == [
+            str(review.pk) for review in feedback
+        ]
+        assert rows[0]['author'] == 'TestUser'
+        assert rows[0]['title'] == title.name
+        assert rows[0]['text'] == 'Первый, с запятой'
+
+    def test_command_exports_since_watermark(self, feedback):
+        output = io.StringIO()
+        call_command(
+            'export_reviews', 'reviews', output_format='ndjson',
+            since_id=feedback[0].pk, stdout=output
+        )
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [row['id'] for row in rows] == [feedback[1].pk]
+
+    def test_endpoint_requires_admin(self, user_client, feedback):
+        response = user_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 403
+
+    def test_endpoint_streams_ndjson(self, admin_client, feedback):
+        response = admin_client.get(
+            '/api/v1/export/comments/', {'output': 'ndjson'}
+        )
+        assert response.status_code == 200
+        assert response.streaming
+        body = b''.join(response.streaming_content).decode()
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert rows[0]['review_id'] == feedback[0].pk
+        assert rows[0]['author'] == 'TestUserAnother'
+
+    def test_endpoint_validates_params(self, admin_client):
+        assert admin_client.get(
+            '/api/v1/export/reviews/', {'since_id': 'x'}
+        ).status_code == 400
+        assert admin_client.get('/api/v1/export/users/').status_code == 404
+
+    def test_export_without_server_side_cursors(self, feedback, monkeypatch):
+        monkeypatch.setitem(
+            connection.settings_dict, 'DISABLE_SERVER_SIDE_CURSORS', True
+        )
+        rows = list(export_rows('reviews', chunk_size=1))
+        assert [row[0] for row in rows] == [review.pk for review in feedback]
@@ -0,0 +1,146 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import FeedEntry, FeedEvent, Follow, Review, Title
+
+from api.feed import FeedWorker, feed_events
+
+
+def feed(client, **params):
+    response = client.get('/api/v1/users/me/feed/', params)
+    assert response.status_code == 200
+    return response
+
+
+def post_review(client, title, text):
+    response = client.post(
+        f'/api/v1/titles/{title.pk}/reviews/', {'text': text, 'score': 7}
+    )
+    assert response.status_code == 201
+    return response.data['id']
+
+
+@pytest.mark.django_db
+class TestFollow:
+
+    def test_follow_and_unfollow(self, user_client, user, title):
+        url = f'/api/v1/titles/{title.pk}/follow/'
+        assert user_client.post(url).status_code == 201
+        assert user_client.post(url).status_code == 200
+        assert Follow.objects.filter(user=user, title=title).count() == 1
+        title.refresh_from_db()
+        assert title.followers_count == 1
+        assert user_client.delete(url).status_code == 204
+        assert user_client.delete(url).status_code == 204
+        title.refresh_from_db()
+        assert title.followers_count == 0
+
+    def test_requires_authentication(self, client, title):
+        assert client.post(
+            f'/api/v1/titles/{title.pk}/follow/'
+        ).status_code == 401
+        assert client.get('/api/v1/users/me/feed/').status_code == 401
+
+    def test_unknown_title(self, user_client):
+        assert user_client.post('/api/v1/titles/999/follow/').status_code == 404
+
+
+@pytest.mark.django_db
+class TestFeed:
+
+    def test_fan_out_on_write(self, user_client, another_user_client, user,
+                              title):
+        user_client.post(f'/api/v1/titles/{title.pk}/follow/')
+        review_id = post_review(another_user_client, title, 'Отзыв')
+        response = another_user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/{review_id}/comments/',
+            {'text': 'Комментарий'}
+        )
+        assert response.status_code == 201
+        assert feed(user_client).data['results'] == [], (
+            'Рассылка по лентам не должна выполняться в запросе'
+        )
+
+        call_command('process_feed', once=True)
+
+        results = feed(user_client).data['results']
+        assert [(e['kind'], e['text'], e['author']) for e in results] == [
+            ('comment', 'Комментарий', 'TestUserAnother'),
+            ('review', 'Отзыв', 'TestUserAnother'),
+        ]
+        assert results[0]['review'] == review_id
+        assert not FeedEvent.objects.filter(fanned_out=False).exists()
+        assert FeedEntry.objects.count() == 2, (
+            'Автор не должен получать свои события'
+        )
+
+    def test_keyset_pages(self, user_client, user, admin_client, title):
+        titles = [title] + [
+            Title.objects.create(name=f'Произведение {n}', year=2000)
+            for n in range(4)
+        ]
+        for item in titles:
+            user_client.post(f'/api/v1/titles/{item.pk}/follow/')
+            post_review(admin_client, item, item.name)
+        FeedWorker(batch_size=2).fan_out_batch()
+        FeedWorker(batch_size=10).fan_out_batch()
+
+        response = feed(user_client, limit=2)
+        names = [e['text'] for e in response.data['results']]
+        while response.data['next']:
+            response = user_client.get(response.data['next'])
+            names += [e['text'] for e in response.data['results']]
+        assert names == [item.name for item in reversed(titles)]
+
+    def test_popular_titles_read_on_demand(self, settings, user_client,
+                                           another_user_client, admin_client,
+                                           title):
+        settings.FEED_FANOUT_LIMIT = 1
+        popular = Title.objects.create(name='Популярное', year=2000)
+        for item in (title, popular):
+            user_client.post(f'/api/v1/titles/{item.pk}/follow/')
+        another_user_client.post(f'/api/v1/titles/{popular.pk}/follow/')
+        post_review(admin_client, popular, 'Популярный отзыв')
+        post_review(admin_client, title, 'Обычный отзыв')
+        post_review(user_client, popular, 'Свой отзыв')
+        pulled = feed_events.value(mode='pull')
+
+        FeedWorker().fan_out_batch()
+
+        assert feed_events.value(mode='pull') == pulled + 2
+        assert not FeedEntry.objects.filter(event__title=popular).exists()
+        assert [e['text'] for e in feed(user_client).data['results']] == [
+            'Обычный отзыв', 'Популярный отзыв'
+        ]
+        assert [
+            e['text'] for e in feed(another_user_client).data['results']
+        ] == ['Свой отзыв', 'Популярный отзыв']
+
+    def test_pulled_events_stay_after_title_cools_down(
+            self, settings, user_client, another_user_client, admin_client,
+            title):
+        settings.FEED_FANOUT_LIMIT = 1
+        for client in (user_client, another_user_client):
+            client.post(f'/api/v1/titles/{title.pk}/follow/')
+        post_review(admin_client, title, 'Пока популярно')
+        FeedWorker().fan_out_batch()
+        assert not FeedEntry.objects.exists()
+
+        another_user_client.delete(f'/api/v1/titles/{title.pk}/follow/')
+        post_review(another_user_client, title, 'Уже нет')
+        FeedWorker().fan_out_batch()
+
+        assert [e['text'] for e in feed(user_client).data['results']] == [
+            'Уже нет', 'Пока популярно'
+        ], 'События, прочитанные лентами, не должны пропадать'
+
+    def test_deleted_review_leaves_feed(self, user_client, admin_client,
+                                        title):
+        user_client.post(f'/api/v1/titles/{title.pk}/follow/')
+        post_review(admin_client, title, 'Отзыв')
+        FeedWorker().fan_out_batch()
+        Review.objects.get().delete()
+        assert feed(user_client).data['results'] == []
+
+    def test_invalid_params(self, user_client):
+        response = user_client.get('/api/v1/users/me/feed/', {'before': 'x'})
+        assert response.status_code == 400
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from reviews.models import Category, Genre, Title
+
+from api.cache import VERSION_KEY, bump_versions
+from api.filter_index import (CHANGES_KEY, VERSION_NAME, _bitmap, bitmap_ids,
+                              index_fallbacks, index_loads,
+                              title_filter_index)
+
+
+def titles(client, **params):
+    response = client.get('/api/v1/titles/', params)
+    assert response.status_code == 200
+    return sorted(title['name'] for title in response.data['results'])
+
+
+@pytest.fixture
+def catalog(title, category, genres):
+    books = Category.objects.create(name='Книга', slug='books')
+    horror = Genre.objects.create(name='Ужасы', slug='horror')
+    Title.objects.create(name='Оно', year=1986, category=books).genre.set(
+        [horror, genres[0]]
+    )
+    Title.objects.create(name='Без жанра', year=1986, category=category)
+    return books
+
+
+class TestBitmaps:
+
+    def test_round_trip(self):
+        ids = [1, 7, 8, 9, 64, 1000]
+        assert bitmap_ids(_bitmap(ids)) == ids
+        assert bitmap_ids(_bitmap([])) == []
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def test_existing_filters(self, client, catalog):
+        assert titles(client, genre='drama') == ['Оно', 'Побег из Шоушенка']
+        assert titles(client, category='books') == ['Оно']
+        assert titles(client, year=1986) == ['Без жанра', 'Оно']
+        assert titles(client, name='Оно') == ['Оно']
+        assert titles(client, genre='missing') == []
+
+    def test_multiple_values(self, client, catalog):
+        assert titles(client, genre='drama,horror', limit=10) == [
+            'Оно', 'Побег из Шоушенка'
+        ]
+        assert titles(client, category='books,films', year_max=1990) == [
+            'Без жанра', 'Оно'
+        ]
+        assert titles(
+            client, genre='comedy,horror', category='films', year_min=1990
+        ) == ['Побег из Шоушенка']
+        assert titles(client, year_min=1987, year_max=1993) == []
+        assert titles(client, year=1986, name='Оно', genre='horror') == [
+            'Оно'
+        ]
+
+    def test_count_without_duplicates(self, client, catalog):
+        response = client.get('/api/v1/titles/', {'genre': 'drama,comedy'})
+        assert response.data['count'] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIndexUpdates:
+
+    def test_signals_update_loaded_index(self, client, title, genres):
+        assert titles(client, genre='comedy') == ['Побег из Шоушенка']
+        loads = index_loads.value()
+        other = Title.objects.create(name='Новое', year=2001)
+        other.genre.set(genres[1:])
+        title.genre.set(genres[:1])
+        assert titles(client, genre='comedy') == ['Новое']
+        other.delete()
+        assert titles(client, genre='comedy') == []
+        assert index_loads.value() == loads
+
+    def test_other_process_changes_from_log(self, client, title):
+        assert titles(client, year=1994) == ['Побег из Шоушенка']
+        loads = index_loads.value()
+        # Изменение другим процессом: строка в базе, новые версии и
+        # запись журнала индекса.
+        Title.objects.filter(pk=title.pk).update(year=1995)
+        bump_versions('title')
+        version = cache.incr(VERSION_KEY.format(VERSION_NAME))
+        cache.set(CHANGES_KEY.format(version), [title.pk])
+        assert titles(client, year=1994) == []
+        assert titles(client, year=1995) == ['Побег из Шоушенка']
+        assert index_loads.value() == loads
+
+    def test_unknown_changes_load_in_background(self, client, title,
+                                                monkeypatch):
+        assert titles(client, year=1994) == ['Побег из Шоушенка']
+        monkeypatch.setattr(title_filter_index, 'background', True)
+        release = threading.Event()
+        load = title_filter_index.load
+
+        def delayed_load():
+            release.wait(5)
+            load()
+
+        monkeypatch.setattr(title_filter_index, 'load', delayed_load)
+        Title.objects.filter(pk=title.pk).update(year=1995)
+        bump_versions('title')
+        cache.incr(VERSION_KEY.format(VERSION_NAME), 2)
+        loads, fallbacks = index_loads.value(), index_fallbacks.value()
+
+        assert titles(client, year=1995) == ['Побег из Шоушенка']
+        assert index_fallbacks.value() == fallbacks + 1, (
+            'Пока индекс загружается, фильтр отвечает база'
+        )
+        release.set()
+        title_filter_index.loading.join(5)
+        assert index_loads.value() == loads + 1
+        bump_versions('title')
+        assert titles(client, year=1995) == ['Побег из Шоушенка']
+        assert index_fallbacks.value() == fallbacks + 1
+
+    def test_category_delete_reloads_index(self, client, title, category):
+        assert titles(client, category='films') == ['Побег из Шоушенка']
+        category.delete()
+        assert titles(client, category='films') == []
+
+    def test_bulk_create(self, admin_client, client, category, genres):
+        title_filter_index.load()
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Первое', 'year': 2000, 'category': 'films',
+             'genre': ['drama']},
+            {'name': 'Второе', 'year': 2001, 'category': 'films',
+             'genre': ['comedy']},
+        ], format='json')
+        assert response.status_code == 201
+        assert titles(client, genre='comedy', category='films') == ['Второе']
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+def write_catalog(path, reviews):
+    (path / 'category.csv').write_text(
+        'name,slug\nФильм,films\nКнига,books\n', encoding='utf-8'
+    )
+    (path / 'genre.csv').write_text(
+        'name,slug\nДрама,drama\nКомедия,comedy\n', encoding='utf-8'
+    )
+    (path / 'titles.jsonl').write_text('\n'.join(json.dumps(row) for row in (
+        {'id': 10, 'name': 'Фильм', 'year': 1994, 'category': 'films',
+         'genre': ['drama', 'comedy']},
+        {'id': 11, 'name': 'Книга', 'year': 1869, 'category': 'books',
+         'genre': 'drama'},
+    )), encoding='utf-8')
+    (path / 'users.csv').write_text(
+        'username,email,role\n'
+        'reader,reader@yamdb.fake,user\n'
+        'critic,critic@yamdb.fake,moderator\n',
+        encoding='utf-8'
+    )
+    (path / 'review.csv').write_text(
+        'id,title_id,author,text,score,pub_date\n' + reviews,
+        encoding='utf-8'
+    )
+    (path / 'comments.csv').write_text(
+        'id,review_id,author,text,pub_date\n'
+        '1,100,critic,Согласен,2020-01-02T00:00:00\n',
+        encoding='utf-8'
+    )
+
+
+@pytest.mark.django_db
+class TestImportCatalog:
+
+    def test_import(self, tmp_path):
+        write_catalog(tmp_path, (
+            '100,10,reader,Отлично,10,2020-01-01T00:00:00\n'
+            '101,10,critic,Неплохо,6,2020-01-01T00:00:00\n'
+            '102,11,critic,Скучно,3,\n'
+        ))
+        call_command('import_catalog', str(tmp_path), batch_size=2)
+
+        title = Title.objects.get(pk=10)
+        assert title.category.slug == 'films'
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+        assert (title.reviews_count, title.rating) == (2, 8.0), (
+            'Проверьте, что рейтинг пересчитывается после загрузки'
+        )
+        assert Review.objects.get(pk=100).pub_date.year == 2020
+        comment = Comment.objects.get()
+        assert comment.title_id == 10
+        assert User.objects.get(username='critic').role == 'moderator'
+        assert not (tmp_path / '.import_checkpoint.json').exists()
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        write_catalog(tmp_path, (
+            '100,10,reader,Отлично,10,\n'
+            '101,10,critic,Неплохо,6,\n'
+            '102,11,nobody,Скучно,3,\n'
+        ))
+        with pytest.raises(CommandError):
+            call_command('import_catalog', str(tmp_path), batch_size=2)
+        checkpoint = json.loads(
+            (tmp_path / '.import_checkpoint.json').read_text()
+        )
+        assert checkpoint['review'] == 2
+        assert Review.objects.count() == 2
+
+        write_catalog(tmp_path, (
+            '100,10,reader,Отлично,10,\n'
+            '101,10,critic,Неплохо,6,\n'
+            '102,11,critic,Скучно,3,\n'
+        ))
+        call_command('import_catalog', str(tmp_path), batch_size=2)
+        assert Review.objects.count() == 3
+        assert Title.objects.count() == 2
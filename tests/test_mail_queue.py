@@ -0,0 +1,115 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from users.models import FAILED, PENDING, SENDING, SENT, OutgoingEmail
+
+from api.mail import MailWorker, enqueue_mail
+
+
+class RejectingBackend(BaseEmailBackend):
+    """Почтовый сервер, отклоняющий все письма."""
+
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPRecipientsRefused({})
+
+
+class LeaseCheckingBackend(BaseEmailBackend):
+    """Почтовый сервер, запоминающий состояние очереди во время отправки."""
+    seen = []
+
+    def send_messages(self, email_messages):
+        self.seen.append((
+            connection.in_atomic_block,
+            list(OutgoingEmail.objects.values_list('status', flat=True))
+        ))
+        return len(email_messages)
+
+
+@pytest.mark.django_db
+class TestMailQueue:
+
+    def test_signup_enqueues(self, client):
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake',
+        })
+
+        assert response.status_code == 200
+        assert mail.outbox == [], 'Регистрация не должна отправлять почту'
+        email = OutgoingEmail.objects.get()
+        assert email.recipients == ['newbie@yamdb.fake']
+        assert email.status == PENDING
+
+    def test_worker_sends_batches(self):
+        for number in range(5):
+            enqueue_mail('Код', f'Код {number}', 'mail@yamdb.ru',
+                         [f'user{number}@yamdb.fake'])
+
+        call_command('send_queued_mail', once=True, batch_size=2)
+
+        assert len(mail.outbox) == 5
+        assert not OutgoingEmail.objects.exclude(status=SENT).exists()
+        assert not OutgoingEmail.objects.filter(sent_at=None).exists()
+
+    def test_retry_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_mail_queue.RejectingBackend'
+        email = enqueue_mail('Код', 'Код', 'mail@yamdb.ru', ['a@yamdb.fake'])
+        worker = MailWorker(max_attempts=2)
+
+        assert worker.send_batch() == 1
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (PENDING, 1)
+        assert email.send_after > timezone.now()
+        assert worker.send_batch() == 0, (
+            'Отложенное письмо не должно отправляться до истечения задержки'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        worker.send_batch()
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (FAILED, 2)
+        assert 'SMTPRecipientsRefused' in email.last_error
+
+    @pytest.mark.django_db(transaction=True)
+    def test_send_outside_transaction(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_mail_queue.LeaseCheckingBackend'
+        LeaseCheckingBackend.seen = []
+        enqueue_mail('Код', 'Код', 'mail@yamdb.ru', ['a@yamdb.fake'])
+
+        assert MailWorker().send_batch() == 1
+        assert LeaseCheckingBackend.seen == [(False, [SENDING])], (
+            'Письма отправляются вне транзакции, захваченными обработчиком'
+        )
+        assert OutgoingEmail.objects.get().status == SENT
+
+    def test_expired_lease_is_reclaimed(self):
+        email = enqueue_mail('Код', 'Код', 'mail@yamdb.ru', ['a@yamdb.fake'])
+        OutgoingEmail.objects.update(
+            status=SENDING, attempts=1,
+            send_after=timezone.now() + timedelta(minutes=1)
+        )
+        worker = MailWorker()
+        assert worker.send_batch() == 0, 'Арендованное письмо пропускается'
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        assert worker.send_batch() == 1
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (SENT, 2)
+        assert len(mail.outbox) == 1
+
+    def test_lost_lease_is_not_recorded(self):
+        email = enqueue_mail('Код', 'Код', 'mail@yamdb.ru', ['a@yamdb.fake'])
+        worker = MailWorker()
+        batch, lease = worker._claim()
+        # Аренда истекла, и письмо захватил другой обработчик.
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        MailWorker().send_batch()
+        batch[0].status = FAILED
+        worker._record(batch, [], lease)
+        email.refresh_from_db()
+        assert email.status == SENT
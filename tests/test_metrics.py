@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+from urllib.request import urlopen
+
+import pytest
+from api.metrics import render_metrics, serve_metrics, write_state
+from api.middleware import (
+    request_db_queries,
+    request_duration,
+    request_serializer_duration,
+)
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_request_is_labeled_by_view_action(self, client, title):
+        before = request_db_queries.count(view='TitleViewSet.retrieve')
+        client.get(f'/api/v1/titles/{title.pk}/')
+        assert request_duration.count(
+            view='TitleViewSet.retrieve', method='GET', status=200
+        ) >= 1
+        assert request_db_queries.count(
+            view='TitleViewSet.retrieve'
+        ) == before + 1
+        assert request_serializer_duration.count(
+            view='TitleViewSet.retrieve'
+        ) >= 1
+
+    def test_metrics_endpoint_format(self, client, admin_client, title):
+        client.get('/api/v1/titles/')
+        body = admin_client.get('/api/v1/_metrics').content.decode()
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in body
+        assert (
+            'yamdb_http_request_db_queries_count{view="TitleViewSet.list"}'
+        ) in body
+        assert 'yamdb_http_response_size_bytes_bucket{' in body
+
+    def test_metrics_endpoint_is_restricted(self, user_client):
+        response = user_client.get(
+            '/api/v1/_metrics', REMOTE_ADDR='10.0.0.1'
+        )
+        assert response.status_code == 403
+
+    def test_slow_request_log(self, client, title, settings, caplog):
+        settings.SLOW_REQUEST_THRESHOLD = 0
+        with caplog.at_level(logging.WARNING, logger='api.slow_requests'):
+            client.get('/api/v1/titles/')
+        assert 'TitleViewSet.list' in caplog.text
+        assert 'SELECT' in caplog.text, (
+            'Проверьте, что в лог медленных запросов попадает SQL'
+        )
+
+
+def test_worker_metrics_server():
+    server = serve_metrics(0)
+    try:
+        with urlopen(f'http://127.0.0.1:{server.server_port}/') as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert '# TYPE yamdb_http_request_duration_seconds histogram' in body
+
+
+def test_metrics_summed_across_workers(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    counter = ['yamdb_response_cache_requests_total', [
+        [['OtherWorker.list', 'hit'], 2],
+    ]]
+    gauge = ['yamdb_db_pool_connections', [[['replica', 'idle'], 3]]]
+    # Живой воркер и завершившийся (номер процесса больше допустимого).
+    for pid in (os.getppid(), 2 ** 22 + 1):
+        (tmp_path / f'{pid}.json').write_text(json.dumps(dict((
+            counter, gauge
+        ))))
+    body = render_metrics()
+    assert (
+        'yamdb_response_cache_requests_total'
+        '{view="OtherWorker.list",result="hit"} 4'
+    ) in body, 'Счетчики суммируются по всем воркерам'
+    assert (
+        'yamdb_db_pool_connections{alias="replica",state="idle"} 3'
+    ) in body, 'Gauge завершившихся воркеров не учитываются'
+
+    write_state()
+    state = json.loads((tmp_path / f'{os.getpid()}.json').read_text())
+    assert 'yamdb_http_request_duration_seconds' in state
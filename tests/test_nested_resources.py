@@ -0,0 +1,61 @@
+import pytest
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(title, another_user):
+    return Review.objects.create(
+        title=title, author=another_user, text='Отзыв', score=6
+    )
+
+
+@pytest.fixture
+def other_title(category):
+    return Title.objects.create(name='Другое', year=2000, category=category)
+
+
+@pytest.mark.django_db
+class TestNestedResources:
+
+    def test_comment_requires_matching_title(self, user_client, review,
+                                             other_title):
+        comment = Comment.objects.create(
+            title=review.title, review=review, author=review.author, text='a'
+        )
+        wrong = f'/api/v1/titles/{other_title.pk}/reviews/{review.pk}/comments/'
+        assert user_client.get(wrong).status_code == 404
+        assert user_client.get(f'{wrong}{comment.pk}/').status_code == 404
+        assert user_client.post(wrong, {'text': 'б'}).status_code == 404
+        assert Comment.objects.count() == 1
+
+    def test_comment_gets_title(self, user_client, review):
+        response = user_client.post(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/comments/',
+            {'text': 'Ответ'}
+        )
+        assert response.status_code == 201
+        comment = Comment.objects.get(pk=response.data['id'])
+        assert comment.title_id == review.title_id
+
+    def test_review_requires_matching_title(self, user_client, review,
+                                            other_title):
+        assert user_client.get(
+            f'/api/v1/titles/{other_title.pk}/reviews/{review.pk}/'
+        ).status_code == 404
+        assert user_client.post(
+            f'/api/v1/titles/{other_title.pk + 1}/reviews/',
+            {'text': 'Отзыв', 'score': 5}
+        ).status_code == 404
+
+    def test_one_review_per_author(self, another_user_client, user_client,
+                                   review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        assert another_user_client.post(
+            url, {'text': 'Еще', 'score': 5}
+        ).status_code == 400
+        assert user_client.post(
+            url, {'text': 'Первый', 'score': 5}
+        ).status_code == 201
+        assert another_user_client.put(
+            f'{url}{review.pk}/', {'text': 'Новый', 'score': 7}
+        ).status_code == 200
@@ -0,0 +1,61 @@
+import pytest
+from api.pagination import KeysetPagination, LimitOffsetOrCursorPagination
+from reviews.models import Review
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    result = []
+    for number in range(7):
+        author = django_user_model.objects.create_user(
+            username=f'reader{number}', email=f'reader{number}@yamdb.fake'
+        )
+        result.append(Review.objects.create(
+            title=title, author=author, text=f'Отзыв {number}', score=5
+        ))
+    return result
+
+
+@pytest.mark.django_db
+class TestPagination:
+
+    def test_offset_pagination_is_default(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        data = response.json()
+        assert data['count'] == len(reviews)
+        assert len(data['results']) == 5
+
+    def test_cursor_pagination_walks_all_reviews(
+        self, client, title, reviews
+    ):
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor&limit=3'
+        seen = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data
+            seen.extend(item['id'] for item in data['results'])
+            url = data['next']
+        assert seen == [review.pk for review in reviews], (
+            'Проверьте, что курсорная пагинация отдает все отзывы '
+            'по порядку и без повторов'
+        )
+
+    def test_cursor_pagination_for_titles(self, client, title):
+        response = client.get('/api/v1/titles/', {'pagination': 'cursor'})
+        data = response.json()
+        assert data['results'][0]['id'] == title.pk
+        assert data['next'] is None
+
+    def test_page_size_is_capped(self, client, title, reviews, monkeypatch):
+        monkeypatch.setattr(LimitOffsetOrCursorPagination, 'max_limit', 6)
+        monkeypatch.setattr(KeysetPagination, 'max_page_size', 6)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        for params in ({}, {'pagination': 'cursor'}):
+            data = client.get(url, {'limit': 100, **params}).json()
+            assert len(data['results']) == 6, (
+                'Проверьте, что размер страницы ограничен сверху'
+            )
+
+    def test_cursor_mode_ignored_without_ordering(self, client, category):
+        data = client.get('/api/v1/categories/', {'pagination': 'cursor'})
+        assert 'count' in data.json()
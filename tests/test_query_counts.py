@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+PAGE_SIZES = (1, 6)
+
+
+def count_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    assert response.status_code < 400, (
+        f'{method.upper()} {url} вернул {response.status_code}'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.fixture
+def catalog(title, category, genres, django_user_model):
+    reviews = []
+    for number in range(6):
+        other = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        other.genre.set(genres)
+        author = django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=number + 1
+        )
+        Comment.objects.create(
+            title=title, review=review, author=author, text='Комментарий'
+        )
+        reviews.append(review)
+    return reviews
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/',
+        '/api/v1/categories/',
+        '/api/v1/genres/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ))
+    def test_list_does_not_depend_on_page_size(
+        self, user_client, title, catalog, url
+    ):
+        url = url.format(title=title.pk, review=catalog[0].pk)
+        counts = {
+            limit: count_queries(user_client, 'get', url, {'limit': limit})
+            for limit in PAGE_SIZES
+        }
+        assert len(set(counts.values())) == 1, (
+            f'Количество запросов к БД для {url} зависит от размера '
+            f'страницы: {counts}'
+        )
+
+    @pytest.mark.parametrize('method,url,data,expected', (
+        ('get', '/api/v1/titles/', None, 3),
+        ('get', '/api/v1/titles/{title}/', None, 2),
+        ('get', '/api/v1/categories/', None, 2),
+        ('get', '/api/v1/genres/', None, 2),
+        ('get', '/api/v1/titles/{title}/reviews/', None, 3),
+        ('get', '/api/v1/titles/{title}/reviews/{review}/', None, 1),
+        ('get', '/api/v1/titles/{title}/reviews/{review}/comments/', None, 3),
+        ('get', '/api/v1/users/me/', None, 1),
+    ))
+    def test_read_actions(
+        self, user_client, title, catalog, method, url, data, expected
+    ):
+        url = url.format(title=title.pk, review=catalog[0].pk)
+        assert count_queries(user_client, method, url, data) == expected, (
+            f'Изменилось количество запросов к БД для {method.upper()} {url}'
+        )
+
+    def test_write_actions(self, user_client, admin_client, title, catalog):
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{catalog[0].pk}/comments/'
+        expected = (
+            (user_client, 'post', reviews_url, {'text': 'Да', 'score': 5}, 10),
+            (user_client, 'post', comments_url, {'text': 'Да'}, 6),
+            (admin_client, 'post', '/api/v1/titles/', {
+                'name': 'Новое', 'year': 2001,
+                'category': 'films', 'genre': ['drama', 'comedy'],
+            }, 9),
+            (admin_client, 'patch', f'/api/v1/titles/{title.pk}/', {
+                'name': 'Другое',
+            }, 4),
+        )
+        for client, method, url, data, count in expected:
+            assert count_queries(client, method, url, data) == count, (
+                f'Изменилось количество запросов к БД для '
+                f'{method.upper()} {url}'
+            )
@@ -0,0 +1,99 @@
+import pytest
+from api.filters import FilterForTitle
+from django.db import connection
+from reviews.models import Category, Comment, Review, Title
+from users.models import User
+
+POSTGRESQL = connection.vendor == 'postgresql'
+
+
+@pytest.fixture
+def dataset():
+    categories = Category.objects.bulk_create(
+        Category(name=f'Категория {number}', slug=f'category-{number}')
+        for number in range(20)
+    )
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {number}',
+            year=1900 + number % 120,
+            category=categories[number % len(categories)]
+        )
+        for number in range(2000)
+    )
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake')
+        for number in range(300)
+    )
+    titles = list(Title.objects.order_by('id')[:10])
+    authors = list(User.objects.all())
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for title in titles
+        for author in authors
+    )
+    review = Review.objects.first()
+    Comment.objects.bulk_create(
+        Comment(title=review.title, review=review, author=author, text='К')
+        for author in authors
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        if POSTGRESQL:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return {'title': titles[0], 'review': review}
+
+
+def uses_index(queryset, index):
+    return index.upper() in queryset.explain().upper()
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+
+    def test_reviews_list_uses_keyset_index(self, dataset):
+        queryset = Review.objects.filter(
+            title=dataset['title']
+        ).order_by('pub_date', 'id')[:5]
+        assert uses_index(queryset, 'review_title_pub_date_idx')
+
+    def test_comments_list_uses_keyset_index(self, dataset):
+        queryset = Comment.objects.filter(
+            review=dataset['review']
+        ).order_by('pub_date', 'id')[:5]
+        assert uses_index(queryset, 'comment_review_pub_date_idx')
+
+    def test_title_name_filter_uses_index(self, dataset):
+        queryset = FilterForTitle(
+            {'name': 'Произведение 7'}, queryset=Title.objects.all()
+        ).qs
+        assert uses_index(queryset, 'title_name_idx')
+
+    @pytest.mark.parametrize('data', (
+        {'year': 1950},
+        {'category': 'category-3', 'year': 1903},
+        {'category': 'category-3,category-4', 'year_min': 1950},
+    ))
+    def test_indexed_title_filters_use_primary_key(self, dataset, data):
+        queryset = FilterForTitle(data, queryset=Title.objects.all()).qs
+        plan = queryset.explain().upper()
+        assert 'PRIMARY KEY' in plan or 'PKEY' in plan, (
+            f'Проверьте, что фильтр {data} выбирает произведения по '
+            f'первичному ключу: {plan}'
+        )
+
+    @pytest.mark.skipif(
+        not POSTGRESQL, reason='Триграммные индексы есть только в PostgreSQL'
+    )
+    @pytest.mark.parametrize('queryset,index', (
+        (
+            lambda: Category.objects.filter(name__icontains='рия 1'),
+            'category_name_trgm_idx'
+        ),
+        (
+            lambda: User.objects.filter(username__icontains='er2'),
+            'user_username_trgm_idx'
+        ),
+    ))
+    def test_search_uses_trigram_index(self, dataset, queryset, index):
+        assert uses_index(queryset(), index)
@@ -0,0 +1,67 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def _title(self, title):
+        return Title.objects.get(pk=title.pk)
+
+    def test_rating_follows_review_writes(self, title, user, another_user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отлично', score=10
+        )
+        Review.objects.create(
+            title=title, author=another_user, text='Неплохо', score=5
+        )
+        stored = self._title(title)
+        assert (stored.reviews_count, stored.score_sum) == (2, 15), (
+            'Проверьте, что счетчики отзывов обновляются при создании отзыва'
+        )
+        assert stored.rating == 7.5
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 2
+        review.save()
+        assert self._title(title).rating == 3.5, (
+            'Проверьте, что изменение оценки пересчитывает рейтинг'
+        )
+
+        review.delete()
+        stored = self._title(title)
+        assert (stored.reviews_count, stored.rating) == (1, 5.0)
+
+        another_user.delete()
+        stored = self._title(title)
+        assert stored.reviews_count == 0 and stored.rating is None, (
+            'Проверьте, что каскадное удаление отзывов учитывается в рейтинге'
+        )
+
+    def test_api_reads_stored_rating(self, title, user_client):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Шедевр', 'score': 9}
+        )
+        assert response.status_code == 201
+        review_id = response.json()['id']
+        user_client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review_id}/',
+            data={'score': 4}
+        )
+        response = user_client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] == 4
+
+    def test_recalculate_ratings_command(self, title, user, another_user):
+        Review.objects.create(title=title, author=user, text='a', score=8)
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=3
+        )
+        Title.objects.update(reviews_count=0, score_sum=0, rating=None)
+
+        call_command('recalculate_ratings', batch_size=1)
+
+        stored = self._title(title)
+        assert (stored.reviews_count, stored.score_sum) == (2, 11)
+        assert stored.rating == 5.5
@@ -0,0 +1,80 @@
+from contextlib import ExitStack
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+from api.replicas import ReplicaRouter, replica_alias, reset, use_replica
+
+
+@pytest.fixture
+def replica(settings):
+    """Вторая база, указывающая на ту же тестовую базу, что и основная."""
+    connections.databases['replica'] = dict(
+        connections.databases['default']
+    )
+    settings.DATABASE_REPLICAS = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections.databases['replica']
+    del connections._connections.replica
+
+
+def count_queries(client, path, *databases):
+    with ExitStack() as stack:
+        contexts = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in databases
+        ]
+        response = client.get(path)
+    assert response.status_code == 200
+    return [len(context.captured_queries) for context in contexts]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicas:
+
+    def test_router(self, replica, user):
+        router = ReplicaRouter()
+        reset()
+        assert router.db_for_read(Title) is None
+        use_replica(user)
+        assert replica_alias() == 'replica'
+        assert router.db_for_read(Title) == 'replica'
+        assert router.db_for_write(Title) == 'default'
+        assert router.db_for_read(Title) is None
+        assert not router.allow_migrate('replica', 'reviews')
+        reset()
+
+    def test_safe_requests_read_from_replica(self, replica, client, title):
+        default, replica_queries = count_queries(
+            client, f'/api/v1/titles/{title.pk}/reviews/',
+            'default', 'replica'
+        )
+        assert default == 0
+        assert replica_queries > 0
+
+    def test_writer_reads_own_writes(self, replica, user_client,
+                                     another_user_client, title):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 201
+        path = f'/api/v1/titles/{title.pk}/reviews/'
+        assert count_queries(user_client, path, 'replica') == [0]
+        assert count_queries(another_user_client, path, 'replica') != [0]
+
+    def test_fresh_changes_are_not_cached_from_replica(self, replica, client,
+                                                       title):
+        title.save()
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+
+    def test_no_replicas_configured(self, client, title):
+        queries = count_queries(
+            client, f'/api/v1/titles/{title.pk}/', 'default'
+        )
+        assert queries != [0]
+        assert replica_alias() is None
@@ -0,0 +1,93 @@
+import pytest
+from reviews.models import Category, Review
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_title_list_and_detail_are_cached(self, client, title):
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.pk}/'):
+            assert client.get(url)['X-Cache'] == 'MISS'
+            assert client.get(url)['X-Cache'] == 'HIT', (
+                f'Проверьте, что повторный запрос {url} обслуживается из кэша'
+            )
+
+    def test_query_string_is_part_of_key(self, client, title):
+        client.get('/api/v1/titles/', {'genre': 'drama'})
+        response = client.get('/api/v1/titles/', {'genre': 'comedy'})
+        assert response['X-Cache'] == 'MISS'
+        response = client.get('/api/v1/titles/', {'genre': 'comedy'})
+        assert response['X-Cache'] == 'HIT'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_invalidates_title(self, client, title, user):
+        url = f'/api/v1/titles/{title.pk}/'
+        client.get(url)
+        Review.objects.create(title=title, author=user, text='a', score=7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert response.json()['rating'] == 7
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_keeps_title_list_cached(self, client, title, user):
+        client.get('/api/v1/titles/')
+        Review.objects.create(title=title, author=user, text='a', score=7)
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кэш списков произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_invalidates_own_top_pages(self, client, title, user):
+        Category.objects.create(name='Книга', slug='books')
+        url = '/api/v1/titles/top/'
+        touched = ({}, {'genre': 'drama'}, {'category': 'films'},
+                   {'year': 1994})
+        untouched = ({'category': 'books'}, {'year': 2000})
+        for params in touched + untouched:
+            client.get(url, params)
+        Review.objects.create(title=title, author=user, text='a', score=7)
+        for params in touched:
+            response = client.get(url, params)
+            assert response['X-Cache'] == 'MISS', params
+            assert response.json()[0]['rating'] == 7
+        for params in untouched:
+            assert client.get(url, params)['X-Cache'] == 'HIT', params
+
+    def test_other_title_stays_cached(self, client, title, category, user):
+        other = title.__class__.objects.create(
+            name='Другое', year=2000, category=category
+        )
+        url = f'/api/v1/titles/{other.pk}/'
+        client.get(url)
+        Review.objects.create(title=title, author=user, text='a', score=7)
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_category_change_invalidates_lists(self, client, title, category):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/')
+        category.name = 'Кино'
+        category.save()
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['results'][0]['name'] == 'Кино'
+        response = client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['category']['name'] == 'Кино'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_set_invalidates_title(self, client, title, genres):
+        url = f'/api/v1/titles/{title.pk}/'
+        client.get(url)
+        title.genre.set(genres[:1])
+        assert len(client.get(url).json()['genre']) == 1
+
+    def test_metrics_report_hits_and_misses(self, client, admin_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/_metrics')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert 'yamdb_response_cache_requests_total{' in body
+        assert 'view="GenreViewSet.list",result="hit"' in body
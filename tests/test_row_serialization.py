@@ -0,0 +1,71 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+from api.benchmark import SERIALIZATION_CASES, measure_serialization
+from api.renderers import FastJSONRenderer
+from api.rows import RowSerializer
+
+
+@pytest.fixture
+def catalog(title, category, user, another_user):
+    title.description = 'Строка\u2028с разделителем "и" кавычками\n'
+    title.save()
+    Title.objects.create(name='Без категории', year=1990)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв\tс табуляцией', score=8
+    )
+    Review.objects.create(title=title, author=None, text='Ничей', score=3)
+    Comment.objects.create(
+        title=title, review=review, author=another_user, text='Ответ'
+    )
+    Comment.objects.create(
+        title=title, review=review, author=None, text='Аноним'
+    )
+
+
+@pytest.mark.django_db
+class TestRowSerialization:
+
+    @pytest.mark.parametrize('case', SERIALIZATION_CASES, ids=lambda c: c[0])
+    def test_matches_serializer_output(self, catalog, case):
+        _, serializer_class, queryset = case
+        rows = RowSerializer(serializer_class)
+        expected = JSONRenderer().render(
+            serializer_class(queryset(), many=True).data
+        )
+        assert FastJSONRenderer().render(
+            rows.serialize(rows.values(queryset()))
+        ) == expected
+
+    def test_list_responses(self, client, catalog, title):
+        review = Review.objects.filter(author__isnull=False).get()
+        response = client.get('/api/v1/titles/')
+        assert response.data['results'][1]['category'] is None
+        assert response.data['results'][1]['genre'] == []
+        # Средняя оценка 5.5 выводится целым числом, как в сериализаторе.
+        assert response.data['results'][0]['rating'] == 5
+        assert b'\\u2028' in response.content
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
+        assert [c['author'] for c in response.data['results']] == [
+            'TestUserAnother', None
+        ]
+
+    def test_renderer_falls_back_to_json(self):
+        data = {'date': datetime(2020, 1, 1, 12, 30), 'number': Decimal('1.5')}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert FastJSONRenderer().render(
+            {'a': [1]}, 'application/json; indent=2'
+        ) == JSONRenderer().render({'a': [1]}, 'application/json; indent=2')
+
+    def test_benchmark(self, catalog):
+        results = measure_serialization(items=10, repeat=1)
+        assert set(results['resources']) == {'titles', 'reviews', 'comments'}
+        assert all(
+            result['identical'] for result in results['resources'].values()
+        )
@@ -0,0 +1,45 @@
+import pytest
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_query_is_required(self, client):
+        assert client.get('/api/v1/search/').status_code == 400
+
+    def test_finds_titles_and_reviews_ranked(
+        self, client, title, category, user
+    ):
+        Title.objects.create(
+            name='Зеленая миля', year=1999, category=category,
+            description='Тюрьма и чудо'
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='Лучший фильм про тюрьма', score=9
+        )
+        response = client.get('/api/v1/search/', {'q': 'тюрьма'})
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 2
+        first, second = data['results']
+        assert (first['type'], second['type']) == ('title', 'review'), (
+            'Проверьте, что совпадение в описании ранжируется выше, '
+            'чем совпадение в тексте отзыва'
+        )
+        assert second['id'] == review.pk
+        assert second['title_id'] == title.pk
+
+    def test_index_follows_writes(self, client, title, user):
+        url = '/api/v1/search/'
+        assert client.get(url, {'q': 'шоушенка'}).json()['count'] == 1
+        review = Review.objects.create(
+            title=title, author=user, text='Неожиданный финал', score=9
+        )
+        assert client.get(url, {'q': 'финал'}).json()['count'] == 1
+        review.delete()
+        title.name = 'Переименовано'
+        title.save()
+        assert client.get(url, {'q': 'финал'}).json()['count'] == 0
+        assert client.get(url, {'q': 'шоушенка'}).json()['count'] == 0
+        assert client.get(url, {'q': 'переименовано'}).json()['count'] == 1
@@ -0,0 +1,225 @@
+import pytest
+from django.core.management import call_command
+from django.db.models.signals import pre_delete
+from reviews.models import (
+    Comment,
+    FeedEntry,
+    FeedEvent,
+    Follow,
+    Review,
+    Title,
+    TitleRanking,
+)
+
+from api.export import export_rows
+from api.feed import FeedWorker, follow_title
+from users.models import User
+
+
+@pytest.fixture
+def activity(title, user, another_user):
+    """Отзыв user и комментарий another_user к нему, подписка
+    another_user на произведение с разосланным событием."""
+    follow_title(another_user.pk, title.pk)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(
+        title=title, review=review, author=another_user, text='Ответ'
+    )
+    FeedWorker().fan_out_batch()
+    return review
+
+
+def purge(batch_size=1):
+    call_command('purge_deleted', once=True, batch_size=batch_size)
+
+
+@pytest.mark.django_db
+class TestSoftDelete:
+
+    def test_title_hidden_at_once(self, admin_client, client, title,
+                                  activity):
+        title_url = f'/api/v1/titles/{title.pk}/'
+        assert admin_client.delete(title_url).status_code == 204
+        assert client.get(title_url).status_code == 404
+        assert client.get('/api/v1/titles/').data['results'] == []
+        assert client.get(f'{title_url}reviews/').status_code == 404
+        assert not TitleRanking.objects.filter(title=title).exists()
+        assert Title.all_objects.get(pk=title.pk).deleted_at is not None
+        assert Review.objects.filter(title=title).exists(), (
+            'Зависимые строки удаляет команда purge_deleted'
+        )
+
+    def test_bulk_delete(self, admin_client, title):
+        response = admin_client.delete(
+            '/api/v1/titles/bulk/', [title.pk], format='json'
+        )
+        assert response.status_code == 200
+        assert not Title.objects.exists()
+        assert Title.all_objects.exists()
+
+    def test_user_hidden_and_token_revoked(self, admin_client, user_client,
+                                           user):
+        assert admin_client.delete(
+            f'/api/v1/users/{user.username}/'
+        ).status_code == 204
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).status_code == 404
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_deleted_user_names_are_free(self, admin_client, client, user):
+        user.soft_delete()
+        assert user.username == f'deleted-{user.pk}'
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'TestUser', 'email': 'testuser@yamdb.fake',
+        })
+        assert response.status_code == 200
+        User.objects.get(username='TestUser').soft_delete()
+        response = admin_client.post('/api/v1/users/', {
+            'username': 'TestUser', 'email': 'testuser@yamdb.fake',
+        })
+        assert response.status_code == 201
+
+    def test_hard_delete_mode(self, settings, admin_client, title, activity):
+        settings.SOFT_DELETE = False
+        admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert not Title.all_objects.exists()
+        assert not Review.objects.exists()
+
+
+@pytest.mark.django_db
+class TestPurge:
+
+    def test_purge_title(self, title, user, another_user, activity):
+        title.soft_delete()
+        purge()
+        assert not Title.all_objects.exists()
+        for model in (Review, Comment, Follow, FeedEvent, FeedEntry):
+            assert not model.objects.exists(), model.__name__
+        user.refresh_from_db()
+        another_user.refresh_from_db()
+        assert (user.reviews_count, user.score_sum) == (0, 0)
+        assert another_user.comments_count == 0
+
+    def test_purge_user(self, title, user, another_user, activity):
+        other = Title.objects.create(name='Другое', year=2000)
+        follow_title(user.pk, other.pk)
+        user.soft_delete()
+        purge()
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists(), (
+            'Комментарии к отзывам пользователя удаляются вместе с ними'
+        )
+        title.refresh_from_db()
+        other.refresh_from_db()
+        another_user.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            0, 0, None
+        )
+        assert other.followers_count == 0
+        assert another_user.comments_count == 0
+        assert Follow.objects.filter(user=another_user).exists()
+
+    def test_batches_do_not_load_rows(self, title, user, another_user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.bulk_create(
+            Comment(title=title, review=review, author=another_user, text='.')
+            for _ in range(10)
+        )
+        call_command('reconcile_user_stats')
+        title.soft_delete()
+        loaded = []
+
+        def collected(sender, instance, **kwargs):
+            loaded.append(instance)
+
+        pre_delete.connect(collected, sender=Comment)
+        try:
+            purge(batch_size=4)
+        finally:
+            pre_delete.disconnect(collected, sender=Comment)
+        assert not Comment.objects.exists()
+        assert loaded == [], 'Комментарии не должны загружаться в память'
+
+
+@pytest.mark.django_db
+class TestDeletedTitleChildren:
+
+    def test_children_of_deleted_title_hidden(self, user_client, client,
+                                              title, activity):
+        comment = Comment.objects.get()
+        review_url = f'/api/v1/titles/{title.pk}/reviews/{activity.pk}/'
+        urls = (
+            review_url,
+            f'{review_url}comments/',
+            f'{review_url}comments/{comment.pk}/',
+        )
+        assert all(client.get(url).status_code == 200 for url in urls)
+        title.soft_delete()
+        for url in urls:
+            assert client.get(url).status_code == 404, url
+        assert user_client.post(
+            f'{review_url}comments/', {'text': 'Еще'}
+        ).status_code == 404
+        assert user_client.patch(
+            review_url, {'text': 'Другой'}
+        ).status_code == 404
+
+    def test_search_and_export_skip_deleted_title(self, client, title,
+                                                  activity):
+        url = '/api/v1/search/'
+        assert client.get(url, {'q': 'отзыв'}).json()['count'] == 1
+        title.soft_delete()
+        assert client.get(url, {'q': 'отзыв'}).json()['count'] == 0
+        assert client.get(url, {'q': 'шоушенка'}).json()['count'] == 0
+        assert list(export_rows('reviews')) == []
+        assert list(export_rows('comments')) == []
+
+    def test_feed_skips_deleted_title(self, settings, another_user_client,
+                                      admin, title, activity):
+        settings.FEED_FANOUT_LIMIT = 0
+        Review.objects.create(title=title, author=admin, text='Еще', score=5)
+        FeedWorker().fan_out_batch()
+        url = '/api/v1/users/me/feed/'
+        assert len(another_user_client.get(url).data['results']) == 2
+        title.soft_delete()
+        assert another_user_client.get(url).data['results'] == []
+
+
+@pytest.mark.django_db
+class TestDeletedUserContent:
+
+    def test_reviews_hidden_and_rating_adjusted(
+            self, client, another_user_client, title, user, another_user,
+            activity):
+        Review.objects.create(
+            title=title, author=another_user, text='Другой отзыв', score=2
+        )
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(reviews_url).data['count'] == 2
+        user.soft_delete()
+
+        assert [
+            review['text'] for review in client.get(reviews_url).data['results']
+        ] == ['Другой отзыв']
+        assert client.get(f'{reviews_url}{activity.pk}/').status_code == 404
+        assert client.get(
+            f'{reviews_url}{activity.pk}/comments/'
+        ).status_code == 404
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            1, 2, 2
+        )
+        assert [row[4] for row in export_rows('reviews')] == ['Другой отзыв']
+        assert list(export_rows('comments')) == []
+        assert client.get('/api/v1/search/', {'q': 'отзыв'}).json()[
+            'count'
+        ] == 1
+        assert another_user_client.get(
+            '/api/v1/users/me/feed/'
+        ).data['results'] == []
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import throttled_requests
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_signup_email_limit(self, client, settings):
+        settings.API_THROTTLE_RATES = {'signup.email': '2/hour'}
+        before = throttled_requests.value(rule='signup.email')
+        statuses = [
+            client.post('/api/v1/auth/signup/', data={
+                'username': f'user{number}', 'email': 'same@yamdb.fake',
+            }).status_code
+            for number in range(3)
+        ]
+
+        assert statuses[:2] != [429, 429]
+        assert statuses[2] == 429
+        assert throttled_requests.value(rule='signup.email') == before + 1
+
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'other', 'email': 'other@yamdb.fake',
+        })
+        assert response.status_code == 200, (
+            'Ограничение по email не должно влиять на другие адреса'
+        )
+
+    def test_rejected_before_db(self, client, settings):
+        settings.API_THROTTLE_RATES = {'token.ip': '1/minute'}
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        client.post('/api/v1/auth/token/', data=data)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/token/', data=data)
+
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+        assert context.captured_queries == []
+
+    def test_rule_without_rate(self, client, settings):
+        settings.API_THROTTLE_RATES = {}
+        for _ in range(5):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'nobody', 'confirmation_code': 'code',
+            })
+            assert response.status_code == 404
+
+    def test_spoofed_forwarded_for(self, client, settings):
+        settings.API_THROTTLE_RATES = {'token.ip': '1/minute'}
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        # nginx дописывает адрес клиента в конец X-Forwarded-For.
+        statuses = [
+            client.post(
+                '/api/v1/auth/token/', data=data,
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}, 203.0.113.7'
+            ).status_code
+            for number in range(2)
+        ]
+
+        assert statuses == [404, 429], (
+            'Подмена X-Forwarded-For клиентом не должна обходить ограничение'
+        )
@@ -0,0 +1,90 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Review, Title, TitleRanking
+
+URL = '/api/v1/titles/top/'
+
+
+@pytest.fixture
+def ranked(title, genres, user, another_user):
+    books = Category.objects.create(name='Книга', slug='books')
+    other = Title.objects.create(name='Война и мир', year=1869,
+                                 category=books)
+    other.genre.set(genres[:1])
+    unrated = Title.objects.create(name='Без отзывов', year=1994)
+    Review.objects.create(title=title, author=user, text='Да', score=6)
+    Review.objects.create(title=title, author=another_user, text='Да',
+                          score=8)
+    Review.objects.create(title=other, author=user, text='Да', score=9)
+    return title, other, unrated
+
+
+def ids(response):
+    assert response.status_code == 200, response.content
+    return [item['id'] for item in response.json()]
+
+
+@pytest.mark.django_db
+class TestTopTitles:
+
+    def test_top(self, client, ranked):
+        title, other, _ = ranked
+
+        assert ids(client.get(URL)) == [other.pk, title.pk], (
+            'Произведения без отзывов не входят в рейтинг'
+        )
+        assert ids(client.get(URL, {'limit': 1})) == [other.pk]
+        assert ids(client.get(URL, {'category': 'films'})) == [title.pk]
+        assert ids(client.get(URL, {'genre': 'comedy'})) == [title.pk]
+        assert ids(client.get(URL, {'year': 1869})) == [other.pk]
+        assert ids(client.get(URL, {'min_reviews': 2})) == [title.pk]
+        assert client.get(URL, {'category': 'nope'}).status_code == 404
+        assert client.get(
+            URL, {'category': 'films', 'year': 1994}
+        ).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_incremental_updates(self, client, ranked, admin):
+        title, other, unrated = ranked
+
+        review = Review.objects.get(title=other)
+        review.score = 1
+        review.save()
+        assert ids(client.get(URL)) == [title.pk, other.pk]
+
+        Review.objects.create(title=unrated, author=admin, text='Да',
+                              score=10)
+        assert ids(client.get(URL))[0] == unrated.pk
+
+        other = Title.objects.get(pk=other.pk)
+        other.year = 1994
+        other.save()
+        assert ids(client.get(URL, {'year': 1994})) == [
+            unrated.pk, title.pk, other.pk
+        ]
+
+        title.genre.remove(*title.genre.filter(slug='comedy'))
+        assert ids(client.get(URL, {'genre': 'comedy'})) == []
+
+        Category.objects.get(slug='films').delete()
+        assert not TitleRanking.objects.filter(
+            scope__startswith='category:'
+        ).exclude(title__category__isnull=False).exists()
+
+    def test_rebuild_matches_incremental(self, ranked):
+        incremental = set(TitleRanking.objects.values_list(
+            'scope', 'threshold', 'title_id', 'rating', 'reviews_count'
+        ))
+        call_command('recalculate_ratings')
+        rebuilt = set(TitleRanking.objects.values_list(
+            'scope', 'threshold', 'title_id', 'rating', 'reviews_count'
+        ))
+        assert incremental == rebuilt
+
+    def test_queries_do_not_depend_on_catalog(self, client, ranked):
+        with CaptureQueriesContext(connection) as context:
+            ids(client.get(URL, {'genre': 'drama', 'limit': 2}))
+
+        assert len(context.captured_queries) == 4
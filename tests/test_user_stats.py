@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Comment, Review, Title
+
+from users.models import User
+
+
+def stats(client, url='/api/v1/users/me/'):
+    response = client.get(url, {'stats': 'true'})
+    assert response.status_code == 200
+    return {
+        name: response.data[name] for name in (
+            'reviews_count', 'comments_count', 'average_score',
+        )
+    }
+
+
+@pytest.mark.django_db
+class TestUserStats:
+
+    def test_hidden_by_default(self, user_client, admin_client, user):
+        assert 'reviews_count' not in user_client.get(
+            '/api/v1/users/me/'
+        ).data
+        response = admin_client.get('/api/v1/users/', {'stats': 'true'})
+        assert 'reviews_count' in response.data['results'][0]
+
+    def test_counters_follow_writes(self, user_client, another_user_client,
+                                    user, title):
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        review_id = user_client.post(
+            reviews_url, {'text': 'Отзыв', 'score': 8}
+        ).data['id']
+        other = Title.objects.create(name='Другое', year=2000)
+        user_client.post(
+            f'/api/v1/titles/{other.pk}/reviews/', {'text': 'Еще', 'score': 3}
+        )
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        comment_id = user_client.post(
+            comments_url, {'text': 'Комментарий'}
+        ).data['id']
+        another_user_client.post(comments_url, {'text': 'Чужой'})
+        assert stats(user_client) == {
+            'reviews_count': 2, 'comments_count': 1, 'average_score': 5.5,
+        }
+        assert user_client.get(
+            '/api/v1/users/me/', {'stats': 'true'}
+        ).data['last_activity'] is not None
+
+        user_client.patch(f'{reviews_url}{review_id}/', {'score': 10})
+        user_client.delete(f'{comments_url}{comment_id}/')
+        other.delete()
+        assert stats(user_client) == {
+            'reviews_count': 1, 'comments_count': 0, 'average_score': 10.0,
+        }
+
+    def test_profile_save_keeps_counters(self, user_client, user, title):
+        Review.objects.create(title=title, author=user, text='Да', score=4)
+        stale = User.objects.get(pk=user.pk)
+        Review.objects.create(
+            title=Title.objects.create(name='Еще', year=2000),
+            author=user, text='Да', score=6
+        )
+        stale.bio = 'Новая биография'
+        stale.save()
+        user.refresh_from_db()
+        assert (user.reviews_count, user.bio) == (2, 'Новая биография')
+
+    def test_reconcile(self, user, another_user, title):
+        review = Review.objects.create(
+            title=title, author=user, text='Да', score=9
+        )
+        Comment.objects.create(
+            title=title, review=review, author=another_user, text='Нет'
+        )
+        User.objects.update(
+            reviews_count=5, comments_count=5, score_sum=1, last_activity=None
+        )
+
+        call_command('reconcile_user_stats', batch_size=1)
+
+        user.refresh_from_db()
+        another_user.refresh_from_db()
+        assert (user.reviews_count, user.comments_count, user.score_sum) == (
+            1, 0, 9
+        )
+        assert user.last_activity == review.pub_date
+        assert (another_user.reviews_count, another_user.comments_count) == (
+            0, 1
+        )
+        assert another_user.last_activity is not None